@@ -0,0 +1,186 @@
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, case, func, or_
+
+from models import db, Interview, Question, JobProfile, JobProfileAnalytics, CategoryAnalytics, DailyAnalytics
+from backend.config import ANALYTICS_REFRESH_INTERVAL, ANALYTICS_DAYS
+from backend.score_aggregation import BORDERLINE_SCORE, PASS_SCORE
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+
+def completion_seconds():
+    """SQL expression for the seconds an interview took from start to completion."""
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(Interview.completed_at) - func.julianday(Interview.created_at)) * 86400
+    return func.extract('epoch', Interview.completed_at - Interview.created_at)
+
+
+def _completed_totals():
+    """Aggregates over the completed interviews in a group, in JobProfileAnalytics/DailyAnalytics column order."""
+    completed = Interview.status == 'completed'
+    scored = and_(completed, Interview.score.isnot(None))
+    return (
+        func.count(case((completed, Interview.id))),
+        func.count(case((and_(completed, Interview.score >= PASS_SCORE), Interview.id))),
+        func.count(case((and_(completed, Interview.score >= BORDERLINE_SCORE, Interview.score < PASS_SCORE), Interview.id))),
+        func.count(case((scored, Interview.id))),
+        func.sum(case((scored, Interview.score))),
+        func.sum(case((completed, completion_seconds())))
+    )
+
+
+def _day_range(day):
+    return and_(Interview.completed_at >= datetime.combine(day, datetime.min.time()),
+                Interview.completed_at < datetime.combine(day + timedelta(days=1), datetime.min.time()))
+
+
+def refresh_job_profile(job_profile_id, days=None):
+    """
+    Recompute the summary rows of one job profile from its interviews and questions.
+
+    The profile and category rows are rebuilt with one grouped query each. Daily rows are
+    rebuilt only for the given days (dates), or for every day if days is None. Commits.
+    """
+    now = datetime.utcnow()
+    profile_interviews = Interview.job_profile_id == job_profile_id
+
+    started, completed, passed, borderline, scored, score_total, seconds_total, last_completed_at = db.session.query(
+        func.count(Interview.id), *_completed_totals(), func.max(Interview.completed_at)
+    ).filter(profile_interviews).one()
+    JobProfileAnalytics.query.filter_by(job_profile_id=job_profile_id).delete(synchronize_session=False)
+    if started:
+        db.session.add(JobProfileAnalytics(
+            job_profile_id=job_profile_id, interviews=started, completed=completed, passed=passed,
+            borderline=borderline, failed=completed - passed - borderline, scored=scored,
+            score_total=score_total or 0, completion_seconds_total=seconds_total or 0,
+            last_completed_at=last_completed_at, refreshed_at=now
+        ))
+
+    category, question_type = func.coalesce(Question.category, ''), func.coalesce(Question.type, '')
+    categories = db.session.query(
+        category, question_type, func.count(Question.answer), func.count(Question.score), func.sum(Question.score)
+    ).join(Interview, Question.interview_id == Interview.id).filter(
+        profile_interviews, Interview.status == 'completed'
+    ).group_by(category, question_type)
+    CategoryAnalytics.query.filter_by(job_profile_id=job_profile_id).delete(synchronize_session=False)
+    db.session.add_all(
+        CategoryAnalytics(job_profile_id=job_profile_id, category=name, type=kind, answers=answers, scored=scored,
+                          score_total=total or 0, refreshed_at=now)
+        for name, kind, answers, scored, total in categories
+    )
+
+    if days is None or days:
+        completed_on = func.date(Interview.completed_at)
+        daily = db.session.query(completed_on, *_completed_totals()).filter(
+            profile_interviews, Interview.status == 'completed', Interview.completed_at.isnot(None)
+        )
+        stale = DailyAnalytics.query.filter_by(job_profile_id=job_profile_id)
+        if days is not None:
+            daily = daily.filter(or_(*[_day_range(day) for day in days]))
+            stale = stale.filter(DailyAnalytics.day.in_(days))
+        stale.delete(synchronize_session=False)
+        db.session.add_all(
+            DailyAnalytics(
+                day=day if isinstance(day, date) else date.fromisoformat(day), job_profile_id=job_profile_id,
+                completed=count, passed=passed, scored=scored, score_total=score_total or 0,
+                completion_seconds_total=seconds_total or 0, refreshed_at=now
+            )
+            for day, count, passed, _, scored, score_total, seconds_total in daily.group_by(completed_on)
+        )
+
+    db.session.commit()
+
+
+def refresh_all():
+    """Rebuild every summary table from scratch. Returns the number of job profiles refreshed."""
+    profile_ids = [profile_id for profile_id, in db.session.query(JobProfile.id)]
+    for model in (JobProfileAnalytics, CategoryAnalytics, DailyAnalytics):
+        model.query.filter(model.job_profile_id.notin_(profile_ids)).delete(synchronize_session=False)
+    for profile_id in profile_ids:
+        refresh_job_profile(profile_id)
+    return len(profile_ids)
+
+
+def request_analytics_refresh(interview):
+    """Queue a refresh of the summary rows an interview counts towards."""
+    day = interview.completed_at.date().isoformat() if interview.completed_at else None
+    return job_queue.enqueue_unique('refresh_analytics', {'job_profile_id': interview.job_profile_id, 'day': day})
+
+
+def schedule_full_refresh(delay=0):
+    """Queue the periodic full refresh unless it is already queued."""
+    if ANALYTICS_REFRESH_INTERVAL > 0:
+        return job_queue.enqueue_unique('refresh_all_analytics', {}, delay=delay)
+    return None
+
+
+@job_queue.handler('refresh_analytics')
+def run_analytics_refresh(payload):
+    """Background job: refresh one job profile's summary rows, for one day of the daily table if given."""
+    days = [date.fromisoformat(payload['day'])] if payload.get('day') else []
+    refresh_job_profile(payload['job_profile_id'], days)
+    return {'job_profile_id': payload['job_profile_id'], 'days': len(days)}
+
+
+@job_queue.handler('refresh_all_analytics')
+def run_full_refresh(payload):
+    """Background job: rebuild all summary tables, then make sure the next periodic run is scheduled."""
+    refreshed = refresh_all()
+    schedule_full_refresh(delay=ANALYTICS_REFRESH_INTERVAL)
+    return {'job_profiles': refreshed}
+
+
+def profile_summaries():
+    """Summary rows per job profile with the profile title, plus totals over all profiles."""
+    rows = db.session.query(JobProfileAnalytics, JobProfile.title).join(
+        JobProfile, JobProfile.id == JobProfileAnalytics.job_profile_id
+    ).order_by(JobProfile.title).all()
+    profiles = [dict(summary.to_dict(), title=title) for summary, title in rows]
+
+    totals = JobProfileAnalytics(
+        job_profile_id=None,
+        **{column: sum(getattr(summary, column) for summary, _ in rows) for column in (
+            'interviews', 'completed', 'passed', 'borderline', 'failed', 'scored', 'score_total',
+            'completion_seconds_total'
+        )}
+    ).to_dict()
+    return profiles, totals
+
+
+def category_summaries(job_profile_id=None):
+    """Average answer score per question category and type, for one job profile or all of them."""
+    query = db.session.query(
+        CategoryAnalytics.category, CategoryAnalytics.type, func.sum(CategoryAnalytics.answers),
+        func.sum(CategoryAnalytics.scored), func.sum(CategoryAnalytics.score_total)
+    )
+    if job_profile_id:
+        query = query.filter(CategoryAnalytics.job_profile_id == job_profile_id)
+    rows = query.group_by(CategoryAnalytics.category, CategoryAnalytics.type).order_by(
+        CategoryAnalytics.category, CategoryAnalytics.type
+    )
+    return [
+        CategoryAnalytics(job_profile_id=job_profile_id, category=category, type=kind, answers=answers,
+                          scored=scored, score_total=total).to_dict()
+        for category, kind, answers, scored, total in rows
+    ]
+
+
+def daily_summaries(job_profile_id=None, days=ANALYTICS_DAYS):
+    """Completions per day over the last days, newest first, for one job profile or all of them."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    query = db.session.query(
+        DailyAnalytics.day, func.sum(DailyAnalytics.completed), func.sum(DailyAnalytics.passed),
+        func.sum(DailyAnalytics.scored), func.sum(DailyAnalytics.score_total),
+        func.sum(DailyAnalytics.completion_seconds_total)
+    ).filter(DailyAnalytics.day >= since)
+    if job_profile_id:
+        query = query.filter(DailyAnalytics.job_profile_id == job_profile_id)
+    rows = query.group_by(DailyAnalytics.day).order_by(DailyAnalytics.day.desc())
+    return [
+        DailyAnalytics(day=day, job_profile_id=job_profile_id, completed=completed, passed=passed, scored=scored,
+                       score_total=score_total, completion_seconds_total=seconds_total).to_dict()
+        for day, completed, passed, scored, score_total, seconds_total in rows
+    ]
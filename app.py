@@ -6,14 +6,52 @@ from functools import wraps
 from dotenv import load_dotenv
 import re
 
-from flask import Flask, request, jsonify, render_template, redirect, url_for, flash, session
+from flask import Flask, Response, request, jsonify, render_template, redirect, url_for, flash, session, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_cors import CORS
+from sqlalchemy import inspect
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from models import db, User, Interview, Question, JobProfile
+import click
+
+from models import db, User, Interview, Question, JobProfile, BackgroundJob, RescoreRun
 from backend.ollama_client import get_ollama_client
-from backend.utils import evaluate_answer
+from backend.ollama_router import llm_route
+from backend.utils import evaluate_answer_with_ollama
+from backend.config import (
+    EVALUATION_REPORT_INSTRUCTIONS, QUERY_ASSISTANT_TEMPLATE, SPECULATIVE_QUESTIONS, QUESTION_BANK_ENABLED, METRICS_ENABLED, PROMPT_TOKEN_BUDGET_REPORT, INCREMENTAL_REPORT_ENABLED,
+    ASYNC_COMPLETION, REPORT_WEBHOOK_URL, REPORT_WEBHOOK_SECRET, PUBLIC_BASE_URL,
+    CONVERSATION_CONTEXT_ENABLED, CONVERSATION_CONTEXT_MAX_TOKENS, ANALYTICS_DAYS, SEARCH_PAGE_SIZE
+)
+from backend.conversation import context_key, pack_context, unpack_context
+from backend.metrics import init_request_metrics, render_metrics
+from backend.model_tiers import get_model_tiers
+from backend.prescoring import AnswerKeyFilter, scoring_stats, split_answer_key
+from backend.token_budget import (
+    clip_answer, count_tokens, enforce_budget, fit_transcript, llm_usage_scope, token_usage_stats
+)
+from backend.speculation import BRANCHES, classify_answer, get_question_speculator
+from backend.prompt_templates import compiled_profile, normalize_criteria
+from backend.score_aggregation import BORDERLINE_SCORE, PASS_SCORE, result_for_score
+from backend.structured_output import EVALUATION_REPORT_SCHEMA, generate_structured
+from backend.response_cache import get_response_cache
+from backend.webhooks import send_webhook
+from jobs import job_queue
+from migrate import apply_migrations, migration_status, stamp_migrations
+from entity_cache import get_job_profile, get_user, invalidate_job_profile, invalidate_user
+from rescoring import process_rescore_run, resume_rescore, start_rescore
+from candidate_scores import rank_job_profile, request_ranking, score_interview, summary_score_lines
+from analytics import (
+    category_summaries, daily_summaries, profile_summaries, refresh_all, request_analytics_refresh, schedule_full_refresh
+)
+from question_bank import (
+    QUESTION_TYPE_INSTRUCTIONS, draw_banked_question, invalidate_question_bank, output_instructions, stock_question_bank
+)
+from transcript_summary import build_incremental_report_prompt, request_summary_update
+from transcript_search import ensure_search_index, get_search_index, reindex_all, search_interviews
+from dashboard_queries import (
+    DASHBOARD_PAGE_SIZE, dashboard_page, dashboard_row, dashboard_summary, parse_dashboard_filters
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -46,6 +84,13 @@ login_manager.login_view = 'login'
 # Initialize database
 db.init_app(app)
 
+# Initialize background job queue
+job_queue.init_app(app)
+
+# Record per-route timings and SQL statement counts for /metrics
+if METRICS_ENABLED:
+    init_request_metrics(app)
+
 # Define the interviewer prompt
 interviewer_prompt = """
 You are a **strict technical interviewer**. Your sole responsibility is to assess the candidate's technical competency across the following subjects:
@@ -115,7 +160,8 @@ JOB_ROLES = {
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # A cached, read-only snapshot; views that change the user load it with db.session.get
+    return get_user(user_id)
 
 # Role-based access control decorator
 def admin_required(f):
@@ -127,6 +173,11 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+@app.context_processor
+def score_bands():
+    # The result badges use the same limits as result_for_score
+    return {'pass_score': PASS_SCORE, 'borderline_score': BORDERLINE_SCORE}
+
 # Routes
 @app.route('/')
 def index():
@@ -233,12 +284,14 @@ def profile():
             flash('All fields are required.', 'danger')
             return render_template('profile.html')
             
-        # Update user profile
-        current_user.name = name
-        current_user.age = int(age)
-        current_user.experience = int(experience)
+        # Update user profile (current_user is a cached snapshot, so change the stored row)
+        user = db.session.get(User, current_user.id)
+        user.name = name
+        user.age = int(age)
+        user.experience = int(experience)
         
         db.session.commit()
+        invalidate_user(user.id)
         
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('interview_setup'))
@@ -259,14 +312,15 @@ def interview_setup():
         return redirect(url_for('profile'))
         
     if request.method == 'POST':
-        job_profile_id = request.form.get('job_profile_id')
+        # A missing or non-numeric id comes back as None
+        job_profile_id = request.form.get('job_profile_id', type=int)
         
         if not job_profile_id:
             flash('Please select a job profile.', 'danger')
             return redirect(url_for('interview_setup'))
             
         # Get the job profile
-        job_profile = JobProfile.query.get(job_profile_id)
+        job_profile = get_job_profile(job_profile_id)
         if not job_profile or not job_profile.is_active:
             flash('Selected job profile is not available.', 'danger')
             return redirect(url_for('interview_setup'))
@@ -315,6 +369,7 @@ def interview_chat(interview_id):
         return jsonify({'error': 'No message provided'}), 400
         
     user_message = data['message']
+    evaluation_job_id = None
     
     # Find the question with the highest order for this interview that doesn't have an answer yet
     # This assumes the user is answering questions in sequential order.
@@ -325,43 +380,50 @@ def interview_chat(interview_id):
         question_to_answer.answered_at = datetime.utcnow()
 
         # Get user details for evaluation context
-        user = User.query.get(interview.user_id)
+        user = get_user(interview.user_id)
 
-        # Evaluate the answer using the imported function
         # Ensure job_profile relationship is loaded or accessed correctly
-        job_profile_title = interview.job_profile.title if interview.job_profile else ''
-
-        evaluation = evaluate_answer(
-            question=question_to_answer.text,
-            answer=user_message,
-            role=job_profile_title, # Use job profile title as role for evaluation context
-            experience=user.experience or 'mid' # Use user experience or default to 'mid'
-        )
-
-        # Update question with score and feedback from evaluation
-        if isinstance(evaluation, dict) and "error" not in evaluation:
-            # evaluate_answer in backend.utils returns a score out of 10
-            question_to_answer.score = evaluation.get('score', 0)
-            question_to_answer.feedback = json.dumps(evaluation) # Store full evaluation feedback as JSON
-        else:
-            # Log error if evaluation failed and set default score/feedback
-            logger.error(f"Failed to evaluate answer for question {question_to_answer.id}: {evaluation.get('error', 'Unknown error')}")
-            question_to_answer.score = 0
-            question_to_answer.feedback = json.dumps({'error': 'Evaluation failed'})
-
-        db.session.commit()
-        logger.debug(f"Successfully saved answer and evaluation for Question ID: {question_to_answer.id}, Score: {question_to_answer.score}")
+        job_profile = get_job_profile(interview.job_profile_id)
+        job_profile_title = job_profile.title if job_profile else ''
+
+        # Score the answer in the background so the candidate doesn't wait for it;
+        # Question.score/feedback are filled in by run_answer_evaluation
+        # The answer and its jobs are committed together with the rest of the turn
+        evaluation_job_id = job_queue.enqueue('evaluate_answer', {
+            'interview_id': interview.id,
+            'question_id': question_to_answer.id,
+            'role': job_profile_title, # Use job profile title as role for evaluation context
+            'experience': user.experience or 'mid' # Use user experience or default to 'mid'
+        }, commit=False).id
+        logger.debug(f"Saved answer for Question ID: {question_to_answer.id}, queued evaluation job {evaluation_job_id}")
+
+        # Fold the answer into the running summary now so /complete has little left to do
+        if INCREMENTAL_REPORT_ENABLED:
+            request_summary_update(interview, commit=False)
 
     # Now, generate the AI's response (which is either the next question or a completion message)
     # This should happen regardless of whether an answer was saved/evaluated, to keep the chat flow going.
+    if data.get('stream'):
+        # The stream runs after this view returns, so the answer has to be stored first
+        db.session.commit()
+        # Send the next question token by token; the Question row is saved when the stream ends
+        headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        if evaluation_job_id:
+            headers['X-Evaluation-Job'] = str(evaluation_job_id)
+        return Response(
+            stream_with_context(stream_interview_response(interview.id, user_message)),
+            mimetype='text/event-stream',
+            headers=headers
+        )
+
     response = generate_interview_response(interview, user_message)
 
-    # If generate_interview_response created a new question, commit that change as well
-    # (though generate_interview_response already commits, being explicit here doesn't hurt)
+    # Saving a new question commits the answer with it; this covers turns without one
     db.session.commit()
 
     return jsonify({
-        'response': response
+        'response': response,
+        'evaluation_job_id': evaluation_job_id
     })
 
 @app.route('/api/interviews/<int:interview_id>/complete', methods=['POST'])
@@ -373,21 +435,89 @@ def complete_interview(interview_id):
     if interview.user_id != current_user.id:
         return jsonify({'error': 'Unauthorized'}), 403
         
-    # Update interview status
-    interview.status = 'completed'
+    # Completing twice (e.g. a double click) returns the existing report or job
+    if interview.status == 'completed':
+        return jsonify({
+            'success': True,
+            'redirect': url_for('interview_result', interview_id=interview.id)
+        })
+    if interview.status == 'generating_report':
+        return report_accepted(interview)
+        
+    data = request.get_json(silent=True) or {}
     interview.completed_at = datetime.utcnow()
     
+    # Generate the report in the background so a slow model can't time out the request
+    if data.get('async', ASYNC_COMPLETION):
+        interview.status = 'generating_report'
+        job = job_queue.enqueue('generate_report', {'interview_id': interview.id})
+        interview.report_job_id = job.id
+        db.session.commit()
+        return report_accepted(interview)
+        
     # Generate evaluation
-    evaluation = generate_evaluation_report(interview)
+    store_interview_report(interview, generate_evaluation_report(interview))
+    
+    return jsonify({
+        'success': True,
+        'redirect': url_for('interview_result', interview_id=interview.id)
+    })
+
+def report_accepted(interview):
+    """202 response for a report that is being generated in the background."""
+    return jsonify({
+        'success': True,
+        'job_id': interview.report_job_id,
+        'status_url': url_for('interview_report_status', interview_id=interview.id),
+        'redirect': url_for('interview_result', interview_id=interview.id)
+    }), 202
+
+def store_interview_report(interview, evaluation):
+    """Save an evaluation report on the interview and mark it completed."""
+    interview.status = 'completed'
+    interview.completed_at = interview.completed_at or datetime.utcnow()
     interview.report = evaluation['report']
     interview.feedback = evaluation['summary']
     interview.result = evaluation['result']
     interview.score = evaluation['score']
-    
     db.session.commit()
     
+    # The new score shifts the other candidates' percentiles and the recruiter analytics
+    request_ranking(interview.job_profile_id)
+    request_analytics_refresh(interview)
+
+def report_status(interview):
+    """Where the interview's report is: 'ready', 'pending', 'failed' or 'not_started'."""
+    if interview.status == 'completed':
+        return 'ready'
+    if interview.status != 'generating_report':
+        return 'not_started'
+    job = db.session.get(BackgroundJob, interview.report_job_id) if interview.report_job_id else None
+    if job and job.status == 'dead':
+        return 'failed'
+    return 'pending'
+
+@app.route('/api/interviews/<int:interview_id>/report', methods=['GET'])
+@login_required
+def interview_report_status(interview_id):
+    """Poll the status of an interview's evaluation report."""
+    interview = Interview.query.get_or_404(interview_id)
+    
+    # Security check - allow both the candidate and recruiters to access
+    if interview.user_id != current_user.id and current_user.role != 'recruiter':
+        return jsonify({'error': 'Unauthorized'}), 403
+        
+    job = db.session.get(BackgroundJob, interview.report_job_id) if interview.report_job_id else None
     return jsonify({
-        'success': True,
+        'interview_id': interview.id,
+        'status': report_status(interview),
+        'job': {
+            'id': job.id,
+            'status': job.status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'last_error': job.last_error if current_user.role == 'recruiter' else None
+        } if job else None,
         'redirect': url_for('interview_result', interview_id=interview.id)
     })
 
@@ -401,22 +531,261 @@ def interview_result(interview_id):
         flash('You do not have permission to access this interview.', 'danger')
         return redirect(url_for('index'))
         
+    # The report is still being generated; the page polls until it is ready
+    if interview.status == 'generating_report':
+        return render_template('result.html', interview=interview, report_status=report_status(interview))
+        
     if interview.status != 'completed':
         flash('This interview has not been completed yet.', 'warning')
         return redirect(url_for('interview_session', interview_id=interview.id))
         
-    return render_template('result.html', interview=interview)
+    return render_template('result.html', interview=interview, report_status='ready')
 
 @app.route('/dashboard')
 @login_required
 @admin_required
 def dashboard():
-    # Get all interviews for the dashboard
-    interviews = Interview.query.order_by(Interview.created_at.desc()).all()
+    # Get one filtered page of interviews plus totals for the whole filtered set
+    filters = parse_dashboard_filters(request.args)
+    interviews, next_cursor = dashboard_page(filters, cursor=request.args.get('after'))
+    summary = dashboard_summary(filters)
+    job_profiles = JobProfile.query.with_entities(JobProfile.id, JobProfile.title).order_by(JobProfile.title).all()
+    
+    return render_template(
+        'dashboard.html',
+        interviews=interviews,
+        summary=summary,
+        filters=filters,
+        job_profiles=job_profiles,
+        next_cursor=next_cursor
+    )
+
+@app.route('/api/dashboard/interviews', methods=['GET'])
+@login_required
+@admin_required
+def dashboard_interviews():
+    """Paginated, filtered interview list for the recruiter dashboard."""
+    filters = parse_dashboard_filters(request.args)
+    limit = request.args.get('limit', DASHBOARD_PAGE_SIZE, type=int)
+    interviews, next_cursor = dashboard_page(filters, cursor=request.args.get('after'), limit=limit)
+    
+    return jsonify({
+        'interviews': [dashboard_row(interview) for interview in interviews],
+        'next_cursor': next_cursor,
+        'summary': dashboard_summary(filters)
+    })
+
+@app.route('/dashboard/analytics')
+@login_required
+@admin_required
+def analytics_dashboard():
+    """Recruiter analytics from the summary tables: outcomes per job profile, scores per category, daily trend."""
+    job_profile_id = request.args.get('job_profile_id', type=int)
+    profiles, totals = profile_summaries()
+    
+    return render_template(
+        'analytics.html',
+        profiles=profiles,
+        totals=totals,
+        categories=category_summaries(job_profile_id),
+        daily=daily_summaries(job_profile_id),
+        job_profile_id=job_profile_id
+    )
+
+@app.route('/api/analytics/job-profiles', methods=['GET'])
+@login_required
+@admin_required
+def analytics_job_profiles():
+    """Interview outcomes and time to complete per job profile, with totals."""
+    profiles, totals = profile_summaries()
+    return jsonify({'job_profiles': profiles, 'totals': totals})
+
+@app.route('/api/analytics/categories', methods=['GET'])
+@login_required
+@admin_required
+def analytics_categories():
+    """Average answer score per question category and type, optionally for one job profile."""
+    job_profile_id = request.args.get('job_profile_id', type=int)
+    return jsonify({'job_profile_id': job_profile_id, 'categories': category_summaries(job_profile_id)})
+
+@app.route('/api/analytics/daily', methods=['GET'])
+@login_required
+@admin_required
+def analytics_daily():
+    """Completed interviews per day, newest first, optionally for one job profile."""
+    job_profile_id = request.args.get('job_profile_id', type=int)
+    days = max(1, min(request.args.get('days', ANALYTICS_DAYS, type=int), 366))
+    return jsonify({'job_profile_id': job_profile_id, 'days': days, 'daily': daily_summaries(job_profile_id, days)})
+
+@app.route('/api/analytics/refresh', methods=['POST'])
+@login_required
+@admin_required
+def analytics_refresh():
+    """Queue a full rebuild of the analytics summary tables."""
+    # Separate from the scheduled run, which may not be due for a while
+    job = job_queue.enqueue_unique('refresh_all_analytics', {'requested': True})
+    return jsonify({'success': True, 'job_id': job.id, 'status_url': url_for('job_status', job_id=job.id)}), 202
+
+def search_args(args):
+    """Query, filters and page of a transcript search request."""
+    return {
+        'query': (args.get('q') or '').strip(),
+        'job_profile_id': args.get('job_profile_id', type=int),
+        'status': args.get('status') or None,
+        'page': args.get('page', 1, type=int)
+    }
+
+@app.route('/dashboard/search')
+@login_required
+@admin_required
+def search_dashboard():
+    """Search page over candidate answers, reports and questions."""
+    search = search_args(request.args)
+    results = search_interviews(per_page=SEARCH_PAGE_SIZE, **search) if search['query'] else None
+    job_profiles = JobProfile.query.with_entities(JobProfile.id, JobProfile.title).order_by(JobProfile.title).all()
+    
+    return render_template('search.html', search=search, results=results, job_profiles=job_profiles)
+
+@app.route('/api/search', methods=['GET'])
+@login_required
+@admin_required
+def search_api():
+    """Ranked, paginated full-text search over candidate answers, reports and questions."""
+    search = search_args(request.args)
+    if not search['query']:
+        return jsonify({'error': 'Search query (q) is required'}), 400
+    limit = max(1, min(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 100))
+    results = search_interviews(per_page=limit, **search)
+    if results is None:
+        return jsonify({'error': 'Search is not available'}), 503
+    
+    return jsonify({
+        'query': search['query'],
+        'results': [
+            dict(dashboard_row(result['interview']), rank=result['rank'], snippet=result['snippet'])
+            for result in results['results']
+        ],
+        'total': results['total'],
+        'page': results['page'],
+        'pages': results['pages']
+    })
+
+@app.route('/api/jobs/<int:job_id>', methods=['GET'])
+@login_required
+def job_status(job_id):
+    """Return the status of a background job."""
+    job = BackgroundJob.query.get_or_404(job_id)
+    
+    # Candidates may only look at jobs for their own interviews
+    if current_user.role != 'recruiter':
+        interview = Interview.query.get(job.payload.get('interview_id')) if job.payload else None
+        if not interview or interview.user_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
+            
+    return jsonify({'job': job.to_dict()})
+
+@app.route('/api/jobs/dead-letter', methods=['GET'])
+@login_required
+@admin_required
+def dead_letter_jobs():
+    """List background jobs that ran out of retries."""
+    kind = request.args.get('kind')
+    query = BackgroundJob.query.filter_by(status='dead')
+    if kind:
+        query = query.filter_by(kind=kind)
+    jobs = query.order_by(BackgroundJob.finished_at.desc()).limit(200).all()
     
-    return render_template('dashboard.html', interviews=interviews)
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+@app.route('/api/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+@admin_required
+def retry_job(job_id):
+    """Requeue a dead-lettered background job."""
+    job = BackgroundJob.query.get_or_404(job_id)
+    if job.status not in ('dead', 'done'):
+        return jsonify({'error': f'Job is {job.status}'}), 409
+        
+    job_queue.retry(job)
+    return jsonify({'job': job.to_dict()})
+
+@app.route('/api/rescore', methods=['POST'])
+@login_required
+@admin_required
+def create_rescore_run():
+    """Start rescoring historical answers in the background."""
+    data = request.get_json() or {}
+    try:
+        filters = {
+            'job_profile_id': int(data['job_profile_id']) if data.get('job_profile_id') else None,
+            'interview_ids': [int(i) for i in data.get('interview_ids') or []],
+            'completed_only': bool(data.get('completed_only', True))
+        }
+        batch_size = int(data['batch_size']) if data.get('batch_size') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid rescore filters'}), 400
+        
+    run = start_rescore(filters, batch_size, created_by=current_user.id)
+    return jsonify({'run': run.to_dict(), 'status_url': url_for('rescore_run_status', run_id=run.id)}), 202
+
+@app.route('/api/rescore/<int:run_id>', methods=['GET'])
+@login_required
+@admin_required
+def rescore_run_status(run_id):
+    """Return the progress of a rescore run."""
+    run = RescoreRun.query.get_or_404(run_id)
+    return jsonify({'run': run.to_dict()})
+
+@app.route('/api/rescore/<int:run_id>/pause', methods=['POST'])
+@login_required
+@admin_required
+def pause_rescore_run(run_id):
+    """Stop a rescore run after the chunk it is working on."""
+    run = RescoreRun.query.get_or_404(run_id)
+    if run.status not in ('queued', 'running'):
+        return jsonify({'error': f'Rescore run is {run.status}'}), 409
+        
+    run.status = 'paused'
+    db.session.commit()
+    return jsonify({'run': run.to_dict()})
+
+@app.route('/api/rescore/<int:run_id>/resume', methods=['POST'])
+@login_required
+@admin_required
+def resume_rescore_run(run_id):
+    """Continue a paused or failed rescore run from its last checkpoint."""
+    run = RescoreRun.query.get_or_404(run_id)
+    if run.status not in ('paused', 'failed'):
+        return jsonify({'error': f'Rescore run is {run.status}'}), 409
+        
+    resume_rescore(run)
+    return jsonify({'run': run.to_dict()}), 202
+
+@app.route('/api/llm/stats', methods=['GET'])
+@login_required
+@admin_required
+def llm_stats():
+    """Return response cache, speculative question, token usage, Ollama backend and per-model concurrency, model tier and answer scoring statistics for this worker."""
+    response_cache = get_response_cache()
+    return jsonify({
+        'response_cache': response_cache.stats() if response_cache else None,
+        'token_usage': token_usage_stats(),
+        'ollama_backends': get_ollama_client().router.stats(),
+        'ollama_models': get_ollama_client().limiter.stats(),
+        'model_tiers': get_model_tiers().stats(),
+        'answer_scoring': scoring_stats(),
+        'speculation': get_question_speculator().stats() if SPECULATIVE_QUESTIONS else None
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Request, LLM and database metrics for this worker in the Prometheus text format."""
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/query/ask', methods=['POST'])
+@login_required
 def ask_question():
     """
     Process a query and return AI-generated response in markdown format.
@@ -444,8 +813,15 @@ def ask_question():
         # Log the incoming query
         logger.info(f"Processing query: {query}")
         
-        # Generate a sample markdown response for demonstration
-        response_text = generate_sample_response(query, context)
+        # Answer on the query assistant's model tiers, with the sample response as a fallback
+        result = get_ollama_client().generate_response(
+            QUERY_ASSISTANT_TEMPLATE.format(query=query, context=context), task='query'
+        )
+        if result["success"]:
+            response_text = result["response"]
+        else:
+            logger.warning(f"Query assistant falling back to a sample response: {result.get('error')}")
+            response_text = generate_sample_response(query, context)
         
         # Return the response
         return jsonify({
@@ -478,18 +854,21 @@ def add_job_profile():
             profile = JobProfile(
                 title=data['title'],
                 description=data['description'],
-                evaluation_criteria={
+                evaluation_criteria=normalize_criteria({
                     'technical_skills': data.getlist('technical_skills'),
                     'soft_skills': data.getlist('soft_skills'),
                     'experience_requirements': data.get('experience_requirements'),
                     'evaluation_focus': data.get('evaluation_focus'),
                     'custom_prompt': data.get('custom_prompt')
-                }
+                })[0]
             )
             
             db.session.add(profile)
             db.session.commit()
             
+            if QUESTION_BANK_ENABLED:
+                stock_question_bank(profile)
+            
             flash('Job profile added successfully!', 'success')
             return redirect(url_for('job_profiles'))
             
@@ -513,15 +892,20 @@ def edit_job_profile(profile_id):
             # Update profile
             profile.title = data['title']
             profile.description = data['description']
-            profile.evaluation_criteria = {
+            profile.evaluation_criteria = normalize_criteria({
                 'technical_skills': data.getlist('technical_skills'),
                 'soft_skills': data.getlist('soft_skills'),
                 'experience_requirements': data.get('experience_requirements'),
                 'evaluation_focus': data.get('evaluation_focus'),
                 'custom_prompt': data.get('custom_prompt')
-            }
+            })[0]
             
             db.session.commit()
+            invalidate_job_profile(profile.id)
+            
+            # Questions stocked for the old profile no longer fit it
+            if QUESTION_BANK_ENABLED:
+                invalidate_question_bank(profile)
             
             flash('Job profile updated successfully!', 'success')
             return redirect(url_for('job_profiles'))
@@ -542,6 +926,7 @@ def delete_job_profile(profile_id):
     try:
         db.session.delete(profile)
         db.session.commit()
+        invalidate_job_profile(profile_id)
         flash('Job profile deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -559,6 +944,7 @@ def toggle_job_profile(profile_id):
     try:
         profile.is_active = not profile.is_active
         db.session.commit()
+        invalidate_job_profile(profile.id)
         status = 'activated' if profile.is_active else 'deactivated'
         flash(f'Job profile {status} successfully!', 'success')
     except Exception as e:
@@ -695,134 +1081,430 @@ Would you like more specific information about any aspect of the interview proce
 *This response was generated to demonstrate the markdown formatting capabilities. In a production environment, this would be replaced with an actual AI-generated response tailored to your query.*
 """
 
+def next_question_type(asked):
+    """Type of the question that follows the given number of asked questions."""
+    return ["mcq", "concept", "coding"][min(asked // 4, 2)]
+
+def prepare_interview_turn(interview, user_message):
+    """
+    Work out what the interviewer should say next. Nothing is committed here.
+
+    Returns a dict with either a ready-made 'message' (the interview is over or cannot
+    continue), or the 'type' and 'order' of the next question together with either its
+    speculatively drafted 'text' or the 'prompt' to send to Ollama.
+    """
+    # Get the job profile
+    job_profile = get_job_profile(interview.job_profile_id)
+    if not job_profile:
+        return {'message': "Error: Job profile not found."}
+
+    # The latest question; questions are numbered from 1, so its order is the number asked
+    last_question = Question.query.filter_by(interview_id=interview.id).order_by(Question.order.desc()).first()
+    existing_questions = last_question.order if last_question else 0
+
+    # If we haven't asked any questions yet, generate the first question
+    if existing_questions == 0:
+        # Get user details for context
+        user = get_user(interview.user_id)
+
+        # Serve the first question straight from the pre-generated bank when it has one
+        if QUESTION_BANK_ENABLED:
+            banked = draw_banked_question(interview, job_profile, user.experience, 'concept')
+            if banked:
+                return {'text': banked, 'type': 'concept', 'order': 1}
+
+        # Prepare the prompt for the first question
+        instructions = f"""
+You are starting the interview. The candidate has {user.experience} years of experience.
+
+Generate a technical question that is appropriate for their experience level.
+The question should be challenging but fair.
+Focus on the technical skills required for this position.
+Return ONLY the question text, nothing else."""
+
+        return question_turn(job_profile, instructions, 'concept', 1)
+
+    # If we have questions, evaluate the user's response and generate next question
+    elif existing_questions < 10:  # Limit to 10 questions
+        # interview_chat has already saved user_message as the answer to last_question
+        question_type = next_question_type(existing_questions)
+
+        # Use a follow-up drafted while the candidate was answering, if one is ready
+        if SPECULATIVE_QUESTIONS and last_question:
+            branch = classify_answer(last_question.text, user_message, compiled_profile(job_profile).technical_skills)
+            draft = get_question_speculator().take(interview.id, last_question.id, branch)
+            if draft:
+                logger.debug(f"Using speculative '{branch}' draft for interview {interview.id}")
+                return {'text': draft, 'type': question_type, 'order': existing_questions + 1}
+
+        # Prepare the prompt for evaluation and next question; long answers (e.g. code) are clipped
+        instructions = f"""
+The candidate just answered this question:
+"{last_question.text}"
+
+Their answer was: "{clip_answer(user_message)}"
+
+Based on their answer and the job requirements, generate a follow-up technical question that:
+1. Is more challenging if they answered well
+2. Is at the same level if they answered partially
+3. Is slightly easier if they struggled
+4. Covers a different technical skill from the required skills list
+5. Is {QUESTION_TYPE_INSTRUCTIONS[question_type]}
+
+{output_instructions(question_type)}"""
+
+        return question_turn(job_profile, instructions, question_type, existing_questions + 1)
+
+    else: # Interview is complete
+        return {'message': "Thank you for completing all the questions. I'll now generate your evaluation report. Please click the 'Complete Interview' button to see your results."}
+
+def question_turn(job_profile, instructions, question_type, order):
+    """
+    A turn whose question Ollama has to generate.
+
+    'prompt' is the complete prompt; 'instructions' is only the part after the job profile
+    prefix, which is all that needs sending when the interview's conversation context
+    (built from the same 'prompt_version') already holds the prefix and the earlier turns.
+    """
+    compiled = compiled_profile(job_profile)
+    return {
+        'prompt': enforce_budget(compiled.render(instructions), 'interview_question'),
+        'instructions': enforce_budget(instructions.strip(), 'interview_question'),
+        'prompt_version': compiled.version,
+        'type': question_type,
+        'order': order
+    }
+
+def conversation_request(interview, turn):
+    """
+    The prompt, Ollama context and model to generate a turn's question with.
+
+    A stored context is only continued on the question tier model that produced it;
+    without one the model is None and the question tiers pick it.
+    """
+    if CONVERSATION_CONTEXT_ENABLED and interview.llm_context and interview.llm_context_key:
+        # The key is a hash, so find the question tier model it was made for
+        model = next((model for model in get_model_tiers().models('question')
+                      if context_key(model, turn['prompt_version']) == interview.llm_context_key), None)
+        if model:
+            conversation = unpack_context(interview.llm_context)
+            if len(conversation) + count_tokens(turn['instructions']) <= CONVERSATION_CONTEXT_MAX_TOKENS:
+                return turn['instructions'], conversation, model
+            logger.debug(f"Conversation context of interview {interview.id} is full, sending the full prompt")
+    return turn['prompt'], None, None
+
+def remember_conversation(interview, turn, result):
+    """Keep the context Ollama returned for the next turn; saved with the generated question."""
+    if not CONVERSATION_CONTEXT_ENABLED:
+        return
+    interview.llm_context = pack_context(result.get('context'))
+    interview.llm_context_key = context_key(result['model'], turn['prompt_version']) if interview.llm_context else None
+
+def is_usable_question(text):
+    """Whether generated text looks like the single question the prompts ask for."""
+    text = text.strip()
+    return '?' in text and len(text.split()) <= 120
+
+def record_question_quality(result):
+    if not result.get('cached'):
+        get_model_tiers().record_quality('question', result['model'], is_usable_question(result['response']))
+
+def save_interview_question(interview, text, turn):
+    """Store the generated question text for the turn prepared by prepare_interview_turn."""
+    # A multiple-choice question's answer key is kept for scoring, never shown
+    text, answer_key = split_answer_key(text)
+    new_question = Question(
+        interview_id=interview.id,
+        text=text,
+        category="Technical",
+        type=turn['type'],
+        answer_key=answer_key if turn['type'] == 'mcq' else None,
+        order=turn['order']
+    )
+
+    db.session.add(new_question)
+    db.session.commit()
+
+    if SPECULATIVE_QUESTIONS and new_question.order < 10:
+        start_question_speculation(interview, new_question)
+
+    return new_question
+
+def start_question_speculation(interview, question):
+    """Draft a harder, same-level and easier follow-up to the question in the background."""
+    job_profile = get_job_profile(interview.job_profile_id)
+    if not job_profile:
+        return
+
+    instructions = {
+        'harder': 'Is more challenging than the previous question',
+        'same': 'Is at the same difficulty level as the previous question',
+        'easier': 'Is slightly easier than the previous question'
+    }
+    # The drafts replace the next turn's question, so they must be of its type
+    question_type = next_question_type(question.order)
+    compiled = compiled_profile(job_profile)
+    prompts = {}
+    for branch in BRANCHES:
+        prompts[branch] = enforce_budget(compiled.render(f"""
+The candidate was just asked this question:
+"{question.text}"
+
+Generate a follow-up technical question that:
+1. {instructions[branch]}
+2. Covers a different technical skill from the required skills list
+3. Is {QUESTION_TYPE_INSTRUCTIONS[question_type]}
+
+{output_instructions(question_type)}"""), 'interview_question')
+
+    with llm_usage_scope(job_profile.id, 'speculation'), llm_route(interview.id):
+        get_question_speculator().start(interview.id, question.id, prompts)
+
 def generate_interview_response(interview, user_message):
     """Generate a response for the interview chatbot using Ollama."""
     try:
-        # Get the job profile
-        job_profile = JobProfile.query.get(interview.job_profile_id)
-        if not job_profile:
-            return "Error: Job profile not found."
+        turn = prepare_interview_turn(interview, user_message)
+        if 'message' in turn:
+            return turn['message']
+        if 'text' in turn:
+            return save_interview_question(interview, turn['text'], turn).text
 
-        # Get existing questions for this interview
-        existing_questions = Question.query.filter_by(interview_id=interview.id).count()
+        # Store the turn so far rather than hold its transaction open during the call
+        db.session.commit()
 
-        # If we haven't asked any questions yet, generate the first question
-        if existing_questions == 0:
-            # Get user details for context
-            user = User.query.get(interview.user_id)
+        # Get response from Ollama, continuing the interview's conversation where possible
+        ollama = get_ollama_client()
+        prompt, conversation, model = conversation_request(interview, turn)
+        with llm_usage_scope(interview.job_profile_id), llm_route(interview.id):
+            result = ollama.generate_response(prompt, conversation=conversation, task='question', model=model)
+            if not result["success"] and conversation:
+                # The conversation's model failed; start over on whichever question tier answers
+                result = ollama.generate_response(turn['prompt'], task='question')
 
-            # Prepare the prompt for the first question
-            prompt = f"""You are a technical interviewer conducting an interview for a {job_profile.title} position.
-            The candidate has {user.experience} years of experience.
-            
-            Job Profile Details:
-            - Description: {job_profile.description}
-            - Technical Skills Required: {', '.join(job_profile.evaluation_criteria['technical_skills'])}
-            - Soft Skills Required: {', '.join(job_profile.evaluation_criteria['soft_skills'])}
-            - Experience Requirements: {job_profile.evaluation_criteria['experience_requirements']}
-            - Evaluation Focus: {job_profile.evaluation_criteria['evaluation_focus']}
-            
-            Custom Evaluation Instructions:
-            {job_profile.evaluation_criteria['custom_prompt']}
-            
-            Generate a technical question that is appropriate for their experience level.
-            The question should be challenging but fair.
-            Focus on the technical skills required for this position.
-            Return ONLY the question text, nothing else."""
-
-            # Get response from Ollama
-            ollama = get_ollama_client()
-            result = ollama.generate_response(prompt)
-
-            if not result["success"]:
-                return "I apologize, but I'm having trouble generating questions at the moment. Please try again."
-
-            # Create a new question
-            new_question = Question(
-                interview_id=interview.id,
-                text=result["response"].strip(),
-                category="Technical",
-                type="concept",
-                order=1
-            )
+        if not result["success"]:
+            banked = draw_fallback_question(interview, turn)
+            if banked:
+                return save_interview_question(interview, banked, turn).text
+            return "I apologize, but I'm having trouble generating questions at the moment. Please try again."
 
-            db.session.add(new_question)
-            db.session.commit()
+        record_question_quality(result)
+        remember_conversation(interview, turn, result)
+        return save_interview_question(interview, result["response"], turn).text
 
-            return new_question.text
-
-        # If we have questions, evaluate the user's response and generate next question
-        elif existing_questions < 10:  # Limit to 10 questions
-            # Get the last question
-            last_question = Question.query.filter_by(interview_id=interview.id).order_by(Question.order.desc()).first()
-
-            # Save the user's answer to the last question
-            if last_question:
-                last_question.answer = user_message
-                last_question.answered_at = datetime.utcnow()
-                # Optionally, you could call an evaluation function here and save feedback/score per question
-                db.session.commit()
-                logger.debug(f"Saved answer for question {last_question.id} in generate_interview_response.")
-
-            # Prepare the prompt for evaluation and next question
-            prompt = f"""You are a technical interviewer evaluating a candidate for a {job_profile.title} position.
-
-            Job Profile Details:
-            - Description: {job_profile.description}
-            - Technical Skills Required: {', '.join(job_profile.evaluation_criteria['technical_skills'])}
-            - Soft Skills Required: {', '.join(job_profile.evaluation_criteria['soft_skills'])}
-            - Experience Requirements: {job_profile.evaluation_criteria['experience_requirements']}
-            - Evaluation Focus: {job_profile.evaluation_criteria['evaluation_focus']}
-
-            Custom Evaluation Instructions:
-            {job_profile.evaluation_criteria['custom_prompt']}
-
-            The candidate just answered this question:
-            "{last_question.text}"
-
-            Their answer was: "{user_message}"
-
-            Based on their answer and the job requirements, generate a follow-up technical question that:
-            1. Is more challenging if they answered well
-            2. Is at the same level if they answered partially
-            3. Is slightly easier if they struggled
-            4. Covers a different technical skill from the required skills list
-
-            Return ONLY the question text, nothing else."""
-
-            # Get response from Ollama
-            ollama = get_ollama_client()
-            result = ollama.generate_response(prompt)
-
-            if not result["success"]:
-                return "I apologize, but I'm having trouble generating questions at the moment. Please try again."
-
-            # Create a new question
-            new_question = Question(
-                interview_id=interview.id,
-                text=result["response"].strip(),
-                category="Technical",
-                type=["mcq", "concept", "coding"][min(existing_questions // 4, 2)],
-                order=existing_questions + 1
-            )
+    except Exception as e:
+        logger.error(f"Error in generate_interview_response: {str(e)}")
+        return "I apologize, but I encountered an error. Please try again."
 
-            db.session.add(new_question)
-            db.session.commit()
+def draw_fallback_question(interview, turn):
+    """Fall back to a banked question of the right type when Ollama fails to generate one."""
+    if not QUESTION_BANK_ENABLED:
+        return None
+    job_profile = get_job_profile(interview.job_profile_id)
+    user = get_user(interview.user_id)
+    return draw_banked_question(interview, job_profile, user.experience, turn['type'])
+
+def sse_event(data, event=None):
+    """Format a payload as a single Server-Sent Event."""
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+def stream_question(interview, turn):
+    """Stream a turn's question, starting over from the full prompt if the conversation's model fails first."""
+    ollama = get_ollama_client()
+    prompt, conversation, model = conversation_request(interview, turn)
+    streamed = False
+    for chunk in ollama.generate_response_stream(prompt, conversation=conversation, task='question', model=model):
+        if chunk['done'] and not chunk['success'] and conversation and not streamed:
+            break
+        streamed = True
+        yield chunk
+    else:
+        return
+    yield from ollama.generate_response_stream(turn['prompt'], task='question')
+
+def stream_interview_response(interview_id, user_message):
+    """
+    Stream the interviewer's next question as Server-Sent Events.
 
-            return new_question.text
+    Emits a default event per token ({"token": ...}), then a 'done' event with the full
+    response once the question has been saved, or an 'error' event if generation failed.
+    """
+    try:
+        # The view's session is gone by the time the stream is consumed, so reload the interview
+        interview = Interview.query.get(interview_id)
+        turn = prepare_interview_turn(interview, user_message)
+        if 'message' in turn:
+            yield sse_event({'response': turn['message']}, event='done')
+            return
+        if 'text' in turn:
+            new_question = save_interview_question(interview, turn['text'], turn)
+            yield sse_event({'response': new_question.text, 'question_id': new_question.id}, event='done')
+            return
+
+        # Store the turn so far rather than hold its transaction open during the stream
+        db.session.commit()
 
-        else: # Interview is complete
-            return "Thank you for completing all the questions. I'll now generate your evaluation report. Please click the 'Complete Interview' button to see your results."
+        # Multiple-choice answer keys are held back from the token stream
+        key_filter = AnswerKeyFilter()
+        with llm_usage_scope(interview.job_profile_id), llm_route(interview.id):
+            for chunk in stream_question(interview, turn):
+                if not chunk['done']:
+                    token = key_filter.feed(chunk['token'])
+                    if token:
+                        yield sse_event({'token': token})
+                elif chunk['success']:
+                    tail = key_filter.finish()
+                    if tail:
+                        yield sse_event({'token': tail})
+                    record_question_quality(chunk)
+                    remember_conversation(interview, turn, chunk)
+                    new_question = save_interview_question(interview, chunk['response'], turn)
+                    yield sse_event({'response': new_question.text, 'question_id': new_question.id}, event='done')
+                else:
+                    banked = draw_fallback_question(interview, turn)
+                    if banked:
+                        new_question = save_interview_question(interview, banked, turn)
+                        yield sse_event({'response': new_question.text, 'question_id': new_question.id}, event='done')
+                    else:
+                        yield sse_event({'error': "I apologize, but I'm having trouble generating questions at the moment. Please try again."}, event='error')
 
     except Exception as e:
-        logger.error(f"Error in generate_interview_response: {str(e)}")
-        return "I apologize, but I encountered an error. Please try again."
+        logger.error(f"Error in stream_interview_response: {str(e)}")
+        db.session.rollback()
+        yield sse_event({'error': "I apologize, but I encountered an error. Please try again."}, event='error')
+
+@job_queue.handler('evaluate_answer')
+def run_answer_evaluation(payload):
+    """Background job: score a saved answer and store the evaluation on its Question."""
+    question = Question.query.get(payload['question_id'])
+    if not question or not question.answer:
+        return {'skipped': True}
+
+    interview = Interview.query.get(question.interview_id)
+    job_profile = get_job_profile(interview.job_profile_id) if interview else None
+    evaluation = evaluate_answer_with_ollama(
+        question=question.text,
+        answer=question.answer,
+        role=payload['role'],
+        experience=payload['experience'],
+        question_type=question.type,
+        answer_key=question.answer_key,
+        technical_skills=compiled_profile(job_profile).technical_skills if job_profile else None
+    )
+
+    # Raising lets the job queue retry and eventually dead-letter the evaluation
+    if not isinstance(evaluation, dict) or "error" in evaluation:
+        error = evaluation.get('error', 'Unknown error') if isinstance(evaluation, dict) else 'Unexpected evaluation result'
+        raise RuntimeError(f"Failed to evaluate answer for question {question.id}: {error}")
+
+    # evaluate_answer_with_ollama in backend.utils returns a score out of 10
+    question.score = evaluation.get('score', 0)
+    question.feedback = json.dumps(evaluation) # Store full evaluation feedback as JSON
+    
+    # An evaluation finishing after the report was written still counts towards the interview score
+    if interview and interview.status == 'completed':
+        score_interview(interview)
+    db.session.commit()
+    if interview and interview.status == 'completed':
+        request_ranking(interview.job_profile_id)
+        request_analytics_refresh(interview)
+    logger.debug(f"Stored evaluation for Question ID: {question.id}, Score: {question.score}")
+
+    return {'question_id': question.id, 'score': question.score}
+
+@job_queue.handler('generate_report')
+def run_report_generation(payload):
+    """Background job: generate the final report of an asynchronously completed interview."""
+    interview = Interview.query.get(payload['interview_id'])
+    if not interview or interview.status != 'generating_report':
+        return {'skipped': True}
+
+    # Raising lets the job queue retry; a retry or restart resumes from the stored running summary
+    evaluation = generate_evaluation_report(interview)
+    if evaluation['result'] == 'error':
+        raise RuntimeError(f"Failed to generate the evaluation report for interview {interview.id}: {evaluation['report']}")
+    store_interview_report(interview, evaluation)
+
+    if REPORT_WEBHOOK_URL:
+        job_queue.enqueue('report_webhook', {'interview_id': interview.id})
+
+    return {'interview_id': interview.id, 'score': interview.score}
+
+@job_queue.handler('report_webhook')
+def run_report_webhook(payload):
+    """Background job: tell the recruiter webhook that an interview report is ready."""
+    interview = Interview.query.get(payload['interview_id'])
+    if not interview or interview.status != 'completed':
+        return {'skipped': True}
+
+    candidate = User.query.get(interview.user_id)
+    status_code = send_webhook(REPORT_WEBHOOK_URL, 'interview.report_ready', {
+        'interview_id': interview.id,
+        'candidate': {'id': candidate.id, 'name': candidate.name, 'email': candidate.email} if candidate else None,
+        'job_profile': {'id': interview.job_profile.id, 'title': interview.job_profile.title} if interview.job_profile else None,
+        'score': interview.score,
+        'completed_at': interview.completed_at.isoformat() if interview.completed_at else None,
+        'result_url': f"{PUBLIC_BASE_URL.rstrip('/')}/interview/{interview.id}/result"
+    }, secret=REPORT_WEBHOOK_SECRET)
+
+    return {'status_code': status_code}
+
+def build_evaluation_report_prompt(user, job_profile, questions):
+    """Final report prompt with the Q&A transcript fitted into PROMPT_TOKEN_BUDGET_REPORT."""
+    compiled = compiled_profile(job_profile)
+
+    def render(transcript):
+        return compiled.render(f"""
+You are now evaluating the candidate's performance.
+
+Candidate Information:
+- Name: {user.name}
+- Experience: {user.experience} years
+- Position: {job_profile.title}
+
+Interview Questions and Answers:
+{transcript}
+
+{EVALUATION_REPORT_INSTRUCTIONS.format(basis="the candidate's responses")}""")
+
+    # Whatever the rest of the prompt leaves of the budget goes to the transcript
+    available = PROMPT_TOKEN_BUDGET_REPORT - count_tokens(render(''))
+    transcript, shortened = fit_transcript([(q.text, q.answer) for q in questions], available)
+    if shortened:
+        logger.info(f"Shortened the transcript of {len(questions)} questions to fit the report prompt budget")
+    return enforce_budget(render(transcript), 'evaluation_report')
+
+def render_evaluation_report(evaluation):
+    """The markdown report shown to recruiters and candidates, from the structured evaluation."""
+    def bullets(points):
+        return "\n".join(f"- {point}" for point in points) or "- Not specified"
+
+    return f"""# Evaluation Report
+
+## Overall Assessment
+{evaluation['overall_assessment']}
+
+## Technical Skills
+{evaluation['technical_skills']}
+
+## Soft Skills
+{evaluation['soft_skills']}
+
+## Strengths
+{bullets(evaluation['strengths'])}
+
+## Areas for Improvement
+{bullets(evaluation['areas_for_improvement'])}
+
+## Recommendation
+**{evaluation['recommendation']}**
+"""
 
 def generate_evaluation_report(interview):
     """Generate an evaluation report for the completed interview using Ollama."""
     try:
         # Get user details
-        user = User.query.get(interview.user_id)
+        user = get_user(interview.user_id)
         if not user:
             logger.error(f"User not found for interview {interview.id}")
             return {
@@ -833,7 +1515,7 @@ def generate_evaluation_report(interview):
             }
 
         # Get the job profile
-        job_profile = JobProfile.query.get(interview.job_profile_id)
+        job_profile = get_job_profile(interview.job_profile_id)
         if not job_profile:
             logger.error(f"Job profile not found for interview {interview.id}")
             return {
@@ -854,41 +1536,17 @@ def generate_evaluation_report(interview):
                 'score': 0
             }
 
-        # Prepare the prompt for evaluation
-        questions_text = "\n".join([f"Q{i+1}: {q.text}\nA{i+1}: {q.answer or 'No answer provided'}\n" for i, q in enumerate(questions)])
-
-        prompt = f"""You are a technical interviewer evaluating a candidate's performance.
-
-Candidate Information:
-- Name: {user.name}
-- Experience: {user.experience} years
-- Position: {job_profile.title}
+        # Build the report from the running summary when it is (nearly) up to date,
+        # otherwise from the full transcript fitted into the report budget
+        prompt = None
+        if INCREMENTAL_REPORT_ENABLED:
+            prompt = build_incremental_report_prompt(user, job_profile, interview, questions)
+        if not prompt:
+            prompt = build_evaluation_report_prompt(user, job_profile, questions)
 
-Job Profile Requirements:
-- Description: {job_profile.description}
-- Technical Skills Required: {', '.join(job_profile.evaluation_criteria['technical_skills'])}
-- Soft Skills Required: {', '.join(job_profile.evaluation_criteria['soft_skills'])}
-- Experience Requirements: {job_profile.evaluation_criteria['experience_requirements']}
-- Evaluation Focus: {job_profile.evaluation_criteria['evaluation_focus']}
-
-Custom Evaluation Instructions:
-{job_profile.evaluation_criteria['custom_prompt']}
-
-Interview Questions and Answers:
-{questions_text}
-
-Based on the candidate's responses and the job requirements, generate a detailed evaluation report in markdown format that includes:
-1. Overall assessment
-2. Technical skills evaluation (based on required technical skills)
-3. Soft skills evaluation (based on required soft skills)
-4. Strengths and weaknesses
-5. Final recommendation (Pass/Borderline/Fail)
-
-Format the response in markdown with appropriate headers and sections."""
-
-        # Get response from Ollama
-        ollama = get_ollama_client()
-        result = ollama.generate_response(prompt)
+        # Get the structured evaluation from Ollama
+        with llm_usage_scope(job_profile.id), llm_route(interview.id):
+            result = generate_structured(prompt, EVALUATION_REPORT_SCHEMA, 'evaluation_report', task='report')
 
         if not result["success"]:
             error_msg = result.get("error", "Unknown error")
@@ -900,31 +1558,19 @@ Format the response in markdown with appropriate headers and sections."""
                 'score': 0
             }
 
-        # Parse the response to extract score and result
-        report_text = result["response"]
-
-        # Calculate score based on answers
-        answered = sum(1 for q in questions if q.answer and q.answer.strip())
-        score = round((answered / len(questions)) * 100) if questions else 0
+        evaluation = result["data"]
+        report_text = render_evaluation_report(evaluation)
 
-        # Set result based on score thresholds only
-        if score >= 70:
-            result_value = 'pass'
-        elif score >= 50:
-            result_value = 'borderline'
-        else:
-            result_value = 'fail'
+        # Weighted average of the question scores, cached on the interview with its standing
+        score = score_interview(interview)
+        result_value = result_for_score(score)
 
         # Generate a shorter summary
-        try:
-            strengths = report_text.split("Strengths")[1].split("Areas for Improvement")[0] if "Strengths" in report_text else "Not specified"
-            improvements = report_text.split("Areas for Improvement")[1].split("Recommendation")[0] if "Areas for Improvement" in report_text else "Not specified"
-        except Exception as e:
-            logger.error(f"Error parsing report sections: {str(e)}")
-            strengths = "Not specified"
-            improvements = "Not specified"
+        strengths = "; ".join(evaluation['strengths']) or "Not specified"
+        improvements = "; ".join(evaluation['areas_for_improvement']) or "Not specified"
 
-        summary = f"""## Assessment Summary\n- **Score**: {score}%\n- **Result**: {result_value.upper()}\n- **Strengths**: {strengths}\n- **Areas for Improvement**: {improvements}\n"""
+        # The percentile changes as other candidates complete, so it is shown from the interview instead
+        summary = f"""## Assessment Summary\n{summary_score_lines(score)}\n- **Strengths**: {strengths}\n- **Areas for Improvement**: {improvements}\n"""
 
         return {
             'report': report_text,
@@ -945,7 +1591,13 @@ Format the response in markdown with appropriate headers and sections."""
 # Create all tables (do NOT drop tables in production)
 with app.app_context():
     # db.drop_all()  # DO NOT DROP TABLES IN PRODUCTION
+    fresh_database = not inspect(db.engine).has_table('interviews')
     db.create_all()
+    if fresh_database:
+        # The new schema already matches the models, so no migration needs to run on it
+        stamp_migrations(db.engine)
+    # The search index is dialect specific, so it is created here rather than by a migration
+    search_index_created = ensure_search_index(db.engine)
     # Create a recruiter user if none exists
     recruiter = User.query.filter_by(role='recruiter').first()
     if not recruiter:
@@ -959,5 +1611,88 @@ with app.app_context():
         db.session.commit()
         logger.info("Created recruiter user")
 
+# Keep the periodic analytics refresh scheduled; a no-op while its next run is queued
+with app.app_context():
+    pending_migrations = [version for version, _, applied in migration_status(db.engine) if not applied]
+    if pending_migrations:
+        # The job table may still lack columns; `flask migrate` has to run first
+        logger.warning(f"Pending migrations {', '.join(pending_migrations)}, run `flask migrate` before starting workers")
+    else:
+        schedule_full_refresh()
+        # Fill a search index added to an existing database
+        if search_index_created and not fresh_database:
+            job_queue.enqueue_unique('reindex_search', {})
+
+@app.cli.command('jobs-worker')
+@click.option('--workers', default=2, help='Number of worker threads.')
+def jobs_worker(workers):
+    """Run background job workers in the foreground."""
+    job_queue.run_forever(workers)
+
+@app.cli.command('migrate')
+@click.option('--status', is_flag=True, help='List migrations instead of applying them.')
+def migrate_command(status):
+    """Apply pending database migrations from the migrations directory."""
+    if status:
+        for version, name, applied in migration_status(db.engine):
+            click.echo(f"{version}_{name}: {'applied' if applied else 'pending'}")
+        return
+    applied = apply_migrations(db.engine)
+    click.echo(f"Applied {len(applied)} migration(s)" + (f": {', '.join(applied)}" if applied else ""))
+
+@app.cli.command('rescore')
+@click.option('--job-profile-id', type=int, help='Only rescore interviews for this job profile.')
+@click.option('--interview-id', 'interview_ids', type=int, multiple=True, help='Only rescore these interviews.')
+@click.option('--include-unfinished', is_flag=True, help='Also rescore interviews that are not completed.')
+@click.option('--batch-size', type=int, help='Answers scored per LLM prompt.')
+@click.option('--resume', 'resume_id', type=int, help='Continue an earlier run from its checkpoint.')
+def rescore_command(job_profile_id, interview_ids, include_unfinished, batch_size, resume_id):
+    """Rescore answered questions with the current model, in the foreground."""
+    if resume_id:
+        run = db.session.get(RescoreRun, resume_id)
+        if run is None:
+            raise click.ClickException(f"Rescore run {resume_id} not found")
+        if run.status == 'done':
+            raise click.ClickException(f"Rescore run {resume_id} is already done")
+        run.status = 'queued'
+        db.session.commit()
+    else:
+        run = start_rescore({
+            'job_profile_id': job_profile_id,
+            'interview_ids': list(interview_ids),
+            'completed_only': not include_unfinished
+        }, batch_size, background=False)
+    click.echo(f"Rescore run {run.id}: {run.total} answers, resuming after question {run.last_question_id or 0}")
+    
+    def report(run):
+        click.echo(f"  {run.processed}/{run.total} ({run.to_dict()['percent']}%), {run.failed} failed")
+        
+    run = process_rescore_run(run.id, progress=report)
+    click.echo(f"Rescore run {run.id} {run.status}: {run.processed - run.failed} rescored, {run.failed} failed"
+               + (f" (last error: {run.last_error})" if run.last_error else ""))
+
+@app.cli.command('rank-candidates')
+@click.option('--job-profile-id', type=int, help='Only rank candidates for this job profile.')
+@click.option('--recompute', is_flag=True, help='Recompute interview scores from the question scores first.')
+def rank_candidates_command(job_profile_id, recompute):
+    """Refresh cached interview scores, normalized scores and percentile ranks."""
+    profile_ids = [job_profile_id] if job_profile_id else [profile_id for profile_id, in db.session.query(JobProfile.id)]
+    for profile_id in profile_ids:
+        click.echo(f"Job profile {profile_id}: {rank_job_profile(profile_id, recompute=recompute)} candidates ranked")
+
+@app.cli.command('refresh-analytics')
+def refresh_analytics_command():
+    """Rebuild the recruiter analytics summary tables in the foreground."""
+    click.echo(f"Refreshed analytics for {refresh_all()} job profile(s)")
+
+@app.cli.command('search-reindex')
+def search_reindex_command():
+    """Rebuild the transcript search index in the foreground."""
+    if get_search_index() is None:
+        raise click.ClickException("Transcript search is disabled or not supported on this database")
+    click.echo(f"Indexed {reindex_all()} interview(s)")
+
 if __name__ == '__main__':
+    # Start background job workers (JOB_WORKERS=0 leaves the queue to `flask jobs-worker`)
+    job_queue.start()
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
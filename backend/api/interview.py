@@ -2,9 +2,11 @@ import logging
 import json
 from datetime import datetime
 from flask import Blueprint, request, jsonify
+from sqlalchemy import literal
 from sqlalchemy.exc import SQLAlchemyError
 from backend.app import db
 from backend.models import User, Interview, Question
+from backend.score_aggregation import percent, result_for_score, weighted_sums
 from backend.utils import generate_interview_questions, evaluate_answer, generate_final_report, format_markdown_report
 
 # Initialize blueprint and logger
@@ -143,7 +145,6 @@ def complete_interview(interview_id):
         
         # Prepare responses for report generation
         responses = []
-        total_score = 0
         
         for q in questions:
             if not q.answer:
@@ -160,20 +161,13 @@ def complete_interview(interview_id):
                 "score": q.score or 0,
                 "feedback": feedback
             })
-            
-            total_score += q.score or 0
-        
-        # Calculate average score
-        avg_score = total_score / len(questions) if questions else 0
-        normalized_score = min(100, avg_score * 10)  # Scale to 100
-        
-        # Set result based on score thresholds
-        if normalized_score >= 70:
-            result_value = 'pass'
-        elif normalized_score >= 50:
-            result_value = 'borderline'
-        else:
-            result_value = 'fail'
+        
+        # Average question score in percent, aggregated by the database
+        points, maximum = db.session.query(*weighted_sums(Question.score, literal(1))).filter(
+            Question.interview_id == interview_id
+        ).one()
+        normalized_score = percent(points, maximum)
+        result_value = result_for_score(normalized_score)
         
         # Generate final report
         report = generate_final_report(
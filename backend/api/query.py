@@ -5,6 +5,7 @@ from flask import Blueprint, request, jsonify
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from backend.model_pool import get_model_pool, ModelPoolError
 
 # Load environment variables
 load_dotenv()
@@ -57,30 +58,27 @@ def ask_question():
         Your response:
         """
         
-        # Initialize the language model
+        # Borrow a loaded language model from the pool
         try:
-            # First try using Llama model from utils
-            from backend.utils import get_llama_model
-            llm = get_llama_model()
+            # Format the prompt with user inputs
+            formatted_prompt = template.format(
+                query=query,
+                context=context
+            )
             
-            if llm:
-                # Format the prompt with user inputs
-                formatted_prompt = template.format(
-                    query=query,
-                    context=context
-                )
-                
-                # Generate the response
+            # Generate the response
+            with get_model_pool().checkout() as llm:
                 response_text = llm(formatted_prompt)
+            
+            # Return the response
+            return jsonify({
+                "response": response_text,
+                "format": response_format
+            }), 200
                 
-                # Return the response
-                return jsonify({
-                    "response": response_text,
-                    "format": response_format
-                }), 200
-            else:
-                return jsonify({"error": "AI model initialization failed"}), 500
-                
+        except ModelPoolError as pool_error:
+            logger.error(f"Model pool unavailable: {str(pool_error)}")
+            return jsonify({"error": "AI model initialization failed"}), 503
         except Exception as model_error:
             logger.error(f"Error using local model: {str(model_error)}")
             return jsonify({"error": f"Failed to process query: {str(model_error)}"}), 500
@@ -137,4 +135,10 @@ def evaluate_response():
         
     except Exception as e:
         logger.error(f"Error in evaluate_response: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@query_bp.route('/model-pool', methods=['GET'])
+def model_pool_stats():
+    """Return hit/miss and checkout wait statistics for the Llama model pool."""
+    return jsonify({"model_pool": get_model_pool().stats()}), 200
@@ -1,6 +1,6 @@
 import os
 import logging
-from flask import Flask
+from flask import Flask, Response
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
@@ -36,6 +36,17 @@ app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 # Initialize the app with the extension
 db.init_app(app)
 
+# Record per-route timings and SQL statement counts for /metrics
+from backend.config import METRICS_ENABLED
+from backend.metrics import init_request_metrics, render_metrics
+
+if METRICS_ENABLED:
+    init_request_metrics(app)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 with app.app_context():
     # Import models
     from backend import models  # noqa: F401
@@ -11,26 +11,189 @@ API_PORT = 8000
 # Llama model configuration
 LLAMA_MODEL = "llama3.2:1b"
 
+# Ollama server and HTTP client settings
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:latest")
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "10"))  # Keep-alive connections per client
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "120"))  # Max seconds between bytes from Ollama
+OLLAMA_MAX_RETRIES = int(os.getenv("OLLAMA_MAX_RETRIES", "2"))
+OLLAMA_RETRY_BACKOFF = float(os.getenv("OLLAMA_RETRY_BACKOFF", "0.5"))  # Base delay in seconds, doubled per retry
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))  # In-flight requests per model, 0 for no limit
+
+# Several Ollama hosts: comma separated "url" or "url=weight" entries, defaulting to
+# OLLAMA_BASE_URL alone. Requests go to the healthy backend with the fewest in-flight
+# requests per unit of weight; an interview's calls stick to one backend. A backend
+# failing OLLAMA_BREAKER_FAILURES times in a row is skipped for OLLAMA_BREAKER_COOLDOWN seconds
+OLLAMA_BACKENDS = os.getenv("OLLAMA_BACKENDS", "")  # e.g. http://gpu1:11434=2,http://gpu2:11434
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+OLLAMA_BREAKER_COOLDOWN = float(os.getenv("OLLAMA_BREAKER_COOLDOWN", "30"))
+OLLAMA_HEALTH_CHECK_INTERVAL = float(os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL", "15"))  # Seconds, 0 to disable
+
+# Model tiers per task: comma separated Ollama models, preferred first, all defaulting to
+# OLLAMA_MODEL. A call moves down the list when a model fails or times out, or when
+# OLLAMA_TIER_MAX_INFLIGHT calls to it are already running in this process
+OLLAMA_QUESTION_MODELS = os.getenv("OLLAMA_QUESTION_MODELS", OLLAMA_MODEL)  # e.g. llama3.2:1b
+OLLAMA_SCORING_MODELS = os.getenv("OLLAMA_SCORING_MODELS", OLLAMA_MODEL)
+OLLAMA_REPORT_MODELS = os.getenv("OLLAMA_REPORT_MODELS", OLLAMA_MODEL)  # e.g. llama3.1:8b,llama3.2:latest
+OLLAMA_QUERY_MODELS = os.getenv("OLLAMA_QUERY_MODELS", OLLAMA_MODEL)
+OLLAMA_TIER_MAX_INFLIGHT = int(os.getenv("OLLAMA_TIER_MAX_INFLIGHT", "4"))
+
+# LLM response cache: in-memory LRU plus an optional SQLite file shared by workers.
+# Calls with a temperature above RESPONSE_CACHE_MAX_TEMPERATURE always go to the model.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))  # Seconds, 0 for no expiry
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH")  # e.g. /tmp/recruitbot-llm-cache.sqlite3
+RESPONSE_CACHE_DISK_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_DISK_MAX_ENTRIES", "20000"))
+RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.7"))
+
+# Llama model pool: loaded instances per worker process, seconds a caller may wait
+# for a free instance, and how many callers may queue before checkouts are rejected
+LLAMA_POOL_SIZE = int(os.getenv("LLAMA_POOL_SIZE", "1"))
+LLAMA_POOL_CHECKOUT_TIMEOUT = float(os.getenv("LLAMA_POOL_CHECKOUT_TIMEOUT", "30"))
+LLAMA_POOL_MAX_WAITERS = int(os.getenv("LLAMA_POOL_MAX_WAITERS", "16"))
+
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 # Application Settings
 DEBUG = os.getenv("DEBUG", "True") == "True"
 
+# Background job queue (stored in the application database)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Worker threads per process, 0 to rely on `flask jobs-worker`
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # Seconds between polls when idle
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Attempts before a job is dead-lettered
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))  # Base delay in seconds, doubled per retry
+JOB_LEASE_TIMEOUT = float(os.getenv("JOB_LEASE_TIMEOUT", "120"))  # Running jobs without a heartbeat for this long are requeued
+
+# Pre-generated question bank per job profile, experience bucket and question type
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "True") == "True"
+QUESTION_BANK_DEPTH = int(os.getenv("QUESTION_BANK_DEPTH", "5"))  # Questions kept in stock per bucket and type
+
+# Speculative question drafts: pre-generate harder/same/easier follow-ups while the
+# candidate is answering and pick one with a cheap classifier when the answer arrives
+SPECULATIVE_QUESTIONS = os.getenv("SPECULATIVE_QUESTIONS", "False") == "True"
+SPECULATIVE_WORKERS = int(os.getenv("SPECULATIVE_WORKERS", "3"))
+SPECULATIVE_DRAFT_TTL = float(os.getenv("SPECULATIVE_DRAFT_TTL", "900"))  # Seconds before unused drafts are dropped
+SPECULATIVE_WAIT = float(os.getenv("SPECULATIVE_WAIT", "20"))  # Seconds to wait for a draft that is still generating
+
+# Request metrics served at /metrics in the Prometheus text format. Requests slower
+# than METRICS_SLOW_REQUEST_SECONDS are logged with a per-stage breakdown (0 to disable)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", "0"))
+
+# Completion: generate the final report in a background job and return 202 straight
+# away. A webhook, if configured, is POSTed when a report is ready, signed with
+# HMAC-SHA256 of the body in X-RecruitBot-Signature when a secret is set
+ASYNC_COMPLETION = os.getenv("ASYNC_COMPLETION", "True") == "True"
+REPORT_WEBHOOK_URL = os.getenv("REPORT_WEBHOOK_URL")
+REPORT_WEBHOOK_SECRET = os.getenv("REPORT_WEBHOOK_SECRET")
+REPORT_WEBHOOK_TIMEOUT = float(os.getenv("REPORT_WEBHOOK_TIMEOUT", "10"))
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")  # e.g. https://recruitbot.example.com, used for links in webhooks
+
+# Incremental evaluation report: each answer is folded into a running summary in the
+# background, so /complete only needs one small call. Completion catches up on at most
+# INCREMENTAL_REPORT_MAX_CATCHUP unsummarized answers before falling back to the full prompt
+INCREMENTAL_REPORT_ENABLED = os.getenv("INCREMENTAL_REPORT_ENABLED", "True") == "True"
+INCREMENTAL_REPORT_MAX_CATCHUP = int(os.getenv("INCREMENTAL_REPORT_MAX_CATCHUP", "2"))
+RUNNING_SUMMARY_MAX_TOKENS = int(os.getenv("RUNNING_SUMMARY_MAX_TOKENS", "300"))
+
+# Conversation context: follow-up questions send only the new turn together with the
+# context tokens Ollama returned for the previous question. Keep the limit below the
+# model's num_ctx; an interview whose context outgrows it starts again from the full prompt
+CONVERSATION_CONTEXT_ENABLED = os.getenv("CONVERSATION_CONTEXT_ENABLED", "True") == "True"
+CONVERSATION_CONTEXT_MAX_TOKENS = int(os.getenv("CONVERSATION_CONTEXT_MAX_TOKENS", "3000"))
+
+# Batch rescoring of stored answers: questions are read RESCORE_CHUNK_SIZE at a time,
+# scored RESCORE_BATCH_SIZE per prompt on RESCORE_WORKERS concurrent Ollama calls
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "5"))
+RESCORE_CHUNK_SIZE = int(os.getenv("RESCORE_CHUNK_SIZE", "100"))
+RESCORE_WORKERS = int(os.getenv("RESCORE_WORKERS", "4"))
+
+# Cache of User and JobProfile rows: a per-request identity map plus a per-process LRU.
+# Edits are invalidated in the process that makes them; other workers see them within ENTITY_CACHE_TTL
+ENTITY_CACHE_ENABLED = os.getenv("ENTITY_CACHE_ENABLED", "True") == "True"
+ENTITY_CACHE_TTL = float(os.getenv("ENTITY_CACHE_TTL", "30"))  # Seconds
+ENTITY_CACHE_MAX_ENTRIES = int(os.getenv("ENTITY_CACHE_MAX_ENTRIES", "2000"))
+
+# Answer pre-scoring: multiple-choice answers with a stored answer key, empty answers and
+# "I don't know" are scored by rules without the LLM; everything else goes to the model
+PRESCORE_ENABLED = os.getenv("PRESCORE_ENABLED", "True") == "True"
+
+# Structured output: evaluations and reports ask Ollama for JSON matching a schema (set
+# STRUCTURED_OUTPUT_SCHEMAS=False for servers older than 0.5, which only know plain JSON mode).
+# Output that fails validation gets up to STRUCTURED_OUTPUT_MAX_REPAIRS short repair calls
+STRUCTURED_OUTPUT_SCHEMAS = os.getenv("STRUCTURED_OUTPUT_SCHEMAS", "True") == "True"
+STRUCTURED_OUTPUT_MAX_REPAIRS = int(os.getenv("STRUCTURED_OUTPUT_MAX_REPAIRS", "1"))
+
+# Interview scores: the weighted average of the question scores, weighting each question by
+# its type and category ("type=weight" lists; unlisted types and categories weigh 1).
+# Scores of at least PASS_SCORE percent pass, scores of at least BORDERLINE_SCORE are borderline
+SCORE_TYPE_WEIGHTS = os.getenv("SCORE_TYPE_WEIGHTS", "mcq=1,concept=1.5,coding=2")
+SCORE_CATEGORY_WEIGHTS = os.getenv("SCORE_CATEGORY_WEIGHTS", "")  # e.g. DSA=1.5,OOP=1
+PASS_SCORE = float(os.getenv("PASS_SCORE", "70"))
+BORDERLINE_SCORE = float(os.getenv("BORDERLINE_SCORE", "50"))
+
+# Recruiter analytics: summary tables refreshed per job profile when interviews complete, and
+# in full every ANALYTICS_REFRESH_INTERVAL seconds by a background job (0 disables the full refresh)
+ANALYTICS_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", "3600"))
+ANALYTICS_DAYS = int(os.getenv("ANALYTICS_DAYS", "30"))  # Days shown in the daily trend
+
+# Full-text search over answers, reports and questions (tsvector on PostgreSQL, FTS5 on SQLite)
+SEARCH_ENABLED = os.getenv("SEARCH_ENABLED", "True") == "True"
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+
+# Prompt size budgets in (estimated) tokens. Prompts over budget are cut down
+# deterministically: long answers are clipped, older transcript answers summarized
+PROMPT_TOKEN_BUDGET_QUESTION = int(os.getenv("PROMPT_TOKEN_BUDGET_QUESTION", "1500"))  # Next-question prompts
+PROMPT_TOKEN_BUDGET_REPORT = int(os.getenv("PROMPT_TOKEN_BUDGET_REPORT", "6000"))  # Final evaluation report prompt
+PROMPT_TOKEN_BUDGET_ANSWER = int(os.getenv("PROMPT_TOKEN_BUDGET_ANSWER", "500"))  # One candidate answer
+PROMPT_TOKEN_BUDGET_PROFILE_FIELD = int(os.getenv("PROMPT_TOKEN_BUDGET_PROFILE_FIELD", "300"))  # One job profile text field
+
 # Prompt Templates
+# Shared start of every interviewer prompt for a job profile; compiled once per profile
+# version by backend/prompt_templates.py and followed by the per-call instructions
+JOB_PROFILE_PROMPT_TEMPLATE = """You are a technical interviewer for a {title} position.
+
+Job Profile Details:
+- Description: {description}
+- Technical Skills Required: {technical_skills}
+- Soft Skills Required: {soft_skills}
+- Experience Requirements: {experience_requirements}
+- Evaluation Focus: {evaluation_focus}
+
+Custom Evaluation Instructions:
+{custom_prompt}"""
+
 INTERVIEW_QUESTION_TEMPLATE = """
 You are RecruitBot, an AI-powered interview assistant. Generate {num_questions} interview questions for a candidate applying for a {role} position with {experience} years of experience. 
 The questions should be relevant to the role and suitable for their experience level.
 Format the output as a JSON array of question objects.
 """
 
+QUERY_ASSISTANT_TEMPLATE = """
+You are RecruitBot, an AI assistant specializing in interview preparation and career advice.
+
+User Query: {query}
+
+Additional Context: {context}
+
+Please provide a helpful, detailed response to the query.
+Format your response in markdown syntax to make it easy to read.
+Include sections, bullet points, and other markdown formatting as appropriate.
+Keep your response professional, informative, and supportive.
+
+Your response:
+"""
+
 ANSWER_EVALUATION_TEMPLATE = """
 You are RecruitBot, an AI-powered interview evaluator. Evaluate the following answer for a candidate applying for a {role} position with {experience} years of experience.
 
 Question: {question}
 
 Candidate Answer: {answer}
-
+{rubric}
 Provide a detailed evaluation with the following:
 1. Score (0-10)
 2. Strengths
@@ -38,7 +201,46 @@ Provide a detailed evaluation with the following:
 4. Additional insights
 5. Overall feedback
 
-Format the output as JSON.
+Return ONLY a JSON object with the keys "score" (a number from 0 to 10), "strengths", "areas_for_improvement",
+"additional_insights" and "overall_feedback" (each a string).
+"""
+
+BATCH_ANSWER_EVALUATION_TEMPLATE = """
+You are RecruitBot, an AI-powered interview evaluator. Evaluate each of the following answers from candidates applying for a {role} position.
+
+Evaluation instructions:
+{instructions}
+
+{items}
+
+Score every answer on its own from 0 to 10, taking the candidate's years of experience into account.
+Return ONLY a JSON object {{"evaluations": [...]}} with one object per answer, in the same order, each with the keys:
+"id" (the answer id given above), "score", "strengths", "areas_for_improvement", "additional_insights", "overall_feedback".
+"""
+
+# Closing instructions of both final report prompts; {basis} is what the report is based on
+EVALUATION_REPORT_INSTRUCTIONS = """
+Based on {basis} and the job requirements, evaluate the candidate.
+Return ONLY a JSON object with the keys:
+"overall_assessment" (one paragraph), "technical_skills" (evaluation against the required technical skills),
+"soft_skills" (evaluation against the required soft skills), "strengths" (a list of short points),
+"areas_for_improvement" (a list of short points) and "recommendation" ("Pass", "Borderline" or "Fail").
+"""
+
+# Sent back to the model when its JSON output does not match the schema
+JSON_REPAIR_TEMPLATE = """
+Your previous output does not match the required JSON schema.
+
+Problems:
+{errors}
+
+Schema:
+{schema}
+
+Previous output:
+{output}
+
+Return ONLY the corrected JSON. Keep the content, fix only the problems listed.
 """
 
 FINAL_EVALUATION_TEMPLATE = """
@@ -58,3 +260,4 @@ Provide a final evaluation with:
 
 Format your response in markdown for a readable report.
 """
+
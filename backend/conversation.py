@@ -0,0 +1,39 @@
+import sys
+import zlib
+import base64
+import hashlib
+from array import array
+from typing import List, Optional
+
+# Token ids are stored as little-endian unsigned 32-bit integers
+TOKEN_TYPECODE = "I"
+
+
+def pack_context(tokens: Optional[List[int]]) -> Optional[str]:
+    """Compress an Ollama context array into text for storage, a few characters per token."""
+    if not tokens:
+        return None
+    packed = array(TOKEN_TYPECODE, tokens)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return base64.b64encode(zlib.compress(packed.tobytes())).decode("ascii")
+
+
+def unpack_context(packed: Optional[str]) -> List[int]:
+    """Inverse of pack_context."""
+    if not packed:
+        return []
+    tokens = array(TOKEN_TYPECODE)
+    tokens.frombytes(zlib.decompress(base64.b64decode(packed)))
+    if sys.byteorder == "big":
+        tokens.byteswap()
+    return tokens.tolist()
+
+
+def context_key(model: str, prompt_version: str) -> str:
+    """
+    Fixed-length key naming the model and prompt version a stored context belongs to.
+
+    Ollama model tags have no length limit, so the pair is hashed to fit the 64-character column.
+    """
+    return hashlib.sha256(f"{model}:{prompt_version}".encode("utf-8")).hexdigest()
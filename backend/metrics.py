@@ -0,0 +1,284 @@
+import time
+import logging
+import threading
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+
+from flask import request, g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.config import METRICS_SLOW_REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans fast DB-only routes up to multi-minute LLM calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge:
+    """Value that goes up and down, such as requests in flight, with a fixed set of label names."""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    """Cumulative histogram with a fixed set of label names."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, {'le': _format_value(bound)}), count
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), counts[-1]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.register(Histogram(
+    'recruitbot_request_seconds', 'Time to handle a request, including streamed bodies.',
+    ('endpoint', 'method', 'status')
+))
+REQUEST_DB_QUERIES = registry.register(Histogram(
+    'recruitbot_request_db_queries', 'SQL statements executed per request.',
+    ('endpoint',), buckets=QUERY_COUNT_BUCKETS
+))
+REQUEST_DB_SECONDS = registry.register(Histogram(
+    'recruitbot_request_db_seconds', 'Time spent in SQL statements per request.', ('endpoint',)
+))
+STAGE_SECONDS = registry.register(Histogram(
+    'recruitbot_stage_seconds', 'Time spent in instrumented stages such as LLM calls.', ('stage',)
+))
+STAGE_ERRORS = registry.register(Counter(
+    'recruitbot_stage_errors_total', 'Instrumented stages that raised an exception.', ('stage',)
+))
+DB_QUERIES = registry.register(Counter(
+    'recruitbot_db_queries_total', 'SQL statements executed, inside and outside requests.'
+))
+SLOW_REQUESTS = registry.register(Counter(
+    'recruitbot_slow_requests_total', 'Requests slower than METRICS_SLOW_REQUEST_SECONDS.', ('endpoint',)
+))
+
+# Per-request breakdown; a ContextVar so streamed responses and asyncio tasks see their own
+_current_request = ContextVar('recruitbot_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.stages = {}
+
+    def add_stage(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+class timed(ContextDecorator):
+    """
+    Time a stage, as a context manager or decorator.
+
+    The duration is recorded in recruitbot_stage_seconds and, inside a request,
+    added to that request's stage breakdown for the slow-request log.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._started = threading.local()
+
+    def __enter__(self):
+        starts = getattr(self._started, 'stack', None)
+        if starts is None:
+            starts = self._started.stack = []
+        starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started.stack.pop()
+        STAGE_SECONDS.observe(seconds, stage=self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage)
+        current = _current_request.get()
+        if current is not None:
+            current.add_stage(self.stage, seconds)
+        return False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['query_start'].pop()
+    DB_QUERIES.inc()
+    current = _current_request.get()
+    if current is not None:
+        current.queries += 1
+        current.query_time += seconds
+
+
+def slow_request_breakdown(current, total):
+    """Describe where a request's time went, largest stage first."""
+    parts = [f"{stage}={seconds:.3f}s" for stage, seconds in sorted(current.stages.items(), key=lambda item: -item[1])]
+    parts.append(f"db={current.query_time:.3f}s ({current.queries} queries)")
+    # Stages may overlap the DB time (e.g. a stage that queries), so "other" is a floor of 0
+    other = total - current.query_time - sum(current.stages.values())
+    parts.append(f"other={max(other, 0.0):.3f}s")
+    return ', '.join(parts)
+
+
+def _finish_request(current, endpoint, method, path, status):
+    total = time.perf_counter() - current.started
+    REQUEST_SECONDS.observe(total, endpoint=endpoint, method=method, status=status)
+    REQUEST_DB_QUERIES.observe(current.queries, endpoint=endpoint)
+    REQUEST_DB_SECONDS.observe(current.query_time, endpoint=endpoint)
+
+    if METRICS_SLOW_REQUEST_SECONDS and total >= METRICS_SLOW_REQUEST_SECONDS:
+        SLOW_REQUESTS.inc(endpoint=endpoint)
+        logger.warning(f"Slow request {method} {path} ({endpoint}) took {total:.3f}s: "
+                       f"{slow_request_breakdown(current, total)}")
+
+
+def init_request_metrics(app):
+    """Record timings, SQL statement counts and stage breakdowns for every request of a Flask app."""
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_metrics():
+        current = RequestMetrics()
+        g.request_metrics = current
+        _current_request.set(current)
+
+    @app.after_request
+    def record_request_metrics(response):
+        current = g.pop('request_metrics', None)
+        if current is None:
+            return response
+
+        # Streamed bodies are still being generated here (and teardown can run before they
+        # are), so the request is only finished once the server closes the response
+        endpoint = request.endpoint or 'unmatched'
+        method, path, status = request.method, request.path, str(response.status_code)
+
+        def finish():
+            _finish_request(current, endpoint, method, path, status)
+            if _current_request.get() is current:
+                _current_request.set(None)
+
+        response.call_on_close(finish)
+        return response
+
+
+def render_metrics():
+    """Prometheus text exposition of all metrics recorded in this process."""
+    return registry.render()
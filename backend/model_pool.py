@@ -0,0 +1,175 @@
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from backend.config import LLAMA_POOL_SIZE, LLAMA_POOL_CHECKOUT_TIMEOUT, LLAMA_POOL_MAX_WAITERS
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPoolError(Exception):
+    """Raised when a model instance cannot be lent out of the pool."""
+
+
+class ModelPool:
+    """
+    A bounded pool of loaded model instances shared by all threads of a worker process.
+
+    Instances are created lazily (at most ``size`` of them) and reused across calls,
+    so the model weights are only read from disk once per instance instead of on
+    every request. Each instance is lent to one caller at a time.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 1,
+                 checkout_timeout: float = 30.0, max_waiters: int = 16):
+        self.factory = factory
+        self.size = max(1, size)
+        self.checkout_timeout = checkout_timeout
+        self.max_waiters = max(0, max_waiters)
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []  # Most recently returned last, so warm instances are reused first
+        self._created = 0
+        self._waiting = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "load_failures": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    def _check_pid(self):
+        # Instances loaded in a parent process must not be shared with forked workers
+        if self._pid != os.getpid():
+            logger.info(f"Model pool inherited across fork, resetting for pid {os.getpid()}")
+            self._reset()
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        timeout = self.checkout_timeout if timeout is None else timeout
+        with self._available:
+            self._check_pid()
+
+            if not self._idle and self._created >= self.size:
+                if self._waiting >= self.max_waiters:
+                    self._stats["rejected"] += 1
+                    raise ModelPoolError("Model pool checkout queue is full")
+
+                # Wait for another caller to give an instance back, or for a failed load to free its slot
+                self._waiting += 1
+                started = time.monotonic()
+                try:
+                    while not self._idle and self._created >= self.size:
+                        remaining = started + timeout - time.monotonic()
+                        if remaining <= 0:
+                            self._stats["timeouts"] += 1
+                            raise ModelPoolError(f"Timed out after {timeout}s waiting for a model instance")
+                        self._available.wait(remaining)
+                finally:
+                    waited = time.monotonic() - started
+                    self._waiting -= 1
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += waited
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+
+            # Reuse an already loaded instance if one is idle
+            if self._idle:
+                self._stats["hits"] += 1
+                return self._idle.pop()
+
+            # Otherwise load a new one while we are below the pool size
+            self._created += 1
+
+        return self._load()
+
+    def _load(self) -> Any:
+        started = time.monotonic()
+        try:
+            instance = self.factory()
+        except Exception as e:
+            logger.error(f"Error loading model into pool: {str(e)}")
+            instance = None
+
+        with self._available:
+            if instance is None:
+                self._created -= 1
+                self._stats["load_failures"] += 1
+                # The slot is free again; let a waiting caller try loading it
+                self._available.notify()
+            else:
+                self._stats["misses"] += 1
+
+        if instance is None:
+            raise ModelPoolError("Failed to initialize AI model")
+
+        logger.info(f"Loaded model instance {self._created}/{self.size} in {time.monotonic() - started:.2f}s")
+        return instance
+
+    def _release(self, instance: Any):
+        with self._available:
+            if self._pid != os.getpid():
+                return
+            self._idle.append(instance)
+            self._available.notify()
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """
+        Borrow a model instance for the duration of a ``with`` block.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a free instance, defaults to the pool setting
+
+        Raises:
+            ModelPoolError: If no instance could be loaded or lent out in time
+        """
+        instance = self._acquire(timeout)
+        try:
+            yield instance
+        finally:
+            self._release(instance)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of pool usage counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self.size,
+                "loaded": self._created,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+            })
+        checkouts = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / checkouts, 4) if checkouts else 0.0
+        stats["wait_time_avg"] = round(stats["wait_time_total"] / stats["waits"], 4) if stats["waits"] else 0.0
+        return stats
+
+
+_model_pool = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """Get the process-wide Llama model pool, creating it on first use."""
+    global _model_pool
+    if _model_pool is None:
+        with _model_pool_lock:
+            if _model_pool is None:
+                from backend.utils import get_llama_model
+                _model_pool = ModelPool(
+                    get_llama_model,
+                    size=LLAMA_POOL_SIZE,
+                    checkout_timeout=LLAMA_POOL_CHECKOUT_TIMEOUT,
+                    max_waiters=LLAMA_POOL_MAX_WAITERS
+                )
+    return _model_pool
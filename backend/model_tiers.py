@@ -0,0 +1,139 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any
+
+from backend.config import (
+    OLLAMA_MODEL, OLLAMA_QUESTION_MODELS, OLLAMA_SCORING_MODELS, OLLAMA_REPORT_MODELS, OLLAMA_QUERY_MODELS,
+    OLLAMA_TIER_MAX_INFLIGHT
+)
+from backend.metrics import registry, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+TIER_SECONDS = registry.register(Histogram(
+    "recruitbot_llm_tier_seconds", "Time per LLM call by task and model tier.", ("task", "model")
+))
+TIER_CALLS = registry.register(Counter(
+    "recruitbot_llm_tier_calls_total", "LLM calls by task, model tier and outcome (ok, failed, cached, skipped_busy).",
+    ("task", "model", "outcome")
+))
+TIER_QUALITY = registry.register(Counter(
+    "recruitbot_llm_tier_quality_total", "Checked LLM outputs by task, model tier and whether they were usable.",
+    ("task", "model", "result")
+))
+
+
+def parse_models(spec: str) -> List[str]:
+    """Comma separated model names, preferred first."""
+    return [model.strip() for model in (spec or "").split(",") if model.strip()] or [OLLAMA_MODEL]
+
+
+class CallRecord:
+    """Outcome of one tiered call: set ok once it succeeded, cached if the response cache answered it."""
+
+    def __init__(self):
+        self.ok = False
+        self.cached = False
+
+
+class ModelTiers:
+    """
+    Ollama models per task, preferred model first.
+
+    candidates() lists the models a call should try in order. A model that already has
+    max_inflight calls running in this process is skipped while a lower tier remains,
+    and callers move on to the next model when one fails or times out. Latency, outcome
+    and output quality are recorded per task and model so the tiers can be compared.
+    """
+
+    def __init__(self, task_models: Dict[str, List[str]], max_inflight: int = OLLAMA_TIER_MAX_INFLIGHT):
+        self.task_models = task_models
+        self.max_inflight = max_inflight
+        self._inflight = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def models(self, task: str) -> List[str]:
+        return self.task_models.get(task) or [OLLAMA_MODEL]
+
+    def candidates(self, task: str) -> List[str]:
+        """Models to try for a call, in order, leaving out busy models while a lower tier is free."""
+        models = self.models(task)
+        with self._lock:
+            for i, model in enumerate(models[:-1]):
+                if self._inflight.get(model, 0) < self.max_inflight:
+                    return models[i:]
+                TIER_CALLS.inc(task=task, model=model, outcome="skipped_busy")
+                self._count(task, model, "skipped_busy")
+            return models[-1:]
+
+    def _count(self, task: str, model: str, key: str, amount: float = 1):
+        stats = self._stats.setdefault((task, model), {"calls": 0, "ok": 0, "failed": 0, "skipped_busy": 0,
+                                                       "seconds": 0.0, "usable": 0, "unusable": 0})
+        stats[key] += amount
+
+    @contextmanager
+    def track(self, task: str, model: str):
+        """Count a call to a model as in flight and record its latency and outcome."""
+        record = CallRecord()
+        with self._lock:
+            self._inflight[model] = self._inflight.get(model, 0) + 1
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - started
+            with self._lock:
+                self._inflight[model] -= 1
+            # Cache hits say nothing about the model's speed
+            if record.cached:
+                TIER_CALLS.inc(task=task, model=model, outcome="cached")
+            else:
+                outcome = "ok" if record.ok else "failed"
+                TIER_SECONDS.observe(seconds, task=task, model=model)
+                TIER_CALLS.inc(task=task, model=model, outcome=outcome)
+                with self._lock:
+                    self._count(task, model, "calls")
+                    self._count(task, model, outcome)
+                    self._count(task, model, "seconds", seconds)
+
+    def record_quality(self, task: str, model: str, usable: bool):
+        """Record whether a model's output could be used as is (e.g. parsed, well formed)."""
+        TIER_QUALITY.inc(task=task, model=model, result="usable" if usable else "unusable")
+        with self._lock:
+            self._count(task, model, "usable" if usable else "unusable")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = [(key, dict(stats)) for key, stats in self._stats.items()]
+            inflight = dict(self._inflight)
+        rows = []
+        for (task, model), stats in sorted(items):
+            checked = stats["usable"] + stats["unusable"]
+            rows.append({
+                "task": task,
+                "model": model,
+                "tier": self.models(task).index(model) if model in self.models(task) else None,
+                "in_flight": inflight.get(model, 0),
+                "calls": stats["calls"],
+                "failed": stats["failed"],
+                "skipped_busy": stats["skipped_busy"],
+                "mean_seconds": round(stats["seconds"] / stats["calls"], 3) if stats["calls"] else None,
+                "usable_ratio": round(stats["usable"] / checked, 3) if checked else None,
+            })
+        return rows
+
+
+model_tiers = ModelTiers({
+    "question": parse_models(OLLAMA_QUESTION_MODELS),
+    "scoring": parse_models(OLLAMA_SCORING_MODELS),
+    "report": parse_models(OLLAMA_REPORT_MODELS),
+    "query": parse_models(OLLAMA_QUERY_MODELS),
+})
+
+
+def get_model_tiers() -> ModelTiers:
+    """Get the model tiers singleton."""
+    return model_tiers
@@ -1,51 +1,289 @@
+import time
+import random
 import requests
 import json
 import logging
-from typing import Optional, Dict, Any
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Optional, Dict, Any, Iterator, List, Union
+from requests.adapters import HTTPAdapter
+from backend.response_cache import get_response_cache
+from backend.metrics import registry, timed, Gauge, Histogram
+from backend.model_tiers import CallRecord, get_model_tiers
+from backend.ollama_router import OllamaRouter, parse_backends
+from backend.token_budget import record_llm_usage, usage_from_response
+
+from backend.config import (
+    OLLAMA_BASE_URL, OLLAMA_BACKENDS, OLLAMA_MODEL, OLLAMA_POOL_SIZE, OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_READ_TIMEOUT, OLLAMA_MAX_RETRIES, OLLAMA_RETRY_BACKOFF, OLLAMA_MAX_CONCURRENCY
+)
 
 logger = logging.getLogger(__name__)
 
+# Responses worth retrying: Ollama overloaded, restarting or behind a proxy that timed out
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+MODEL_IN_FLIGHT = registry.register(Gauge(
+    "recruitbot_ollama_in_flight", "Ollama requests running per model in this process.", ("model",)
+))
+MODEL_QUEUED = registry.register(Gauge(
+    "recruitbot_ollama_queued", "Ollama requests waiting for a per-model concurrency slot.", ("model",)
+))
+MODEL_WAIT_SECONDS = registry.register(Histogram(
+    "recruitbot_ollama_queue_wait_seconds", "Time Ollama requests waited for a per-model concurrency slot.", ("model",)
+))
+
+
+# Sampling temperature used when callers don't ask for a specific one
+DEFAULT_TEMPERATURE = 0.7
+
+
+def build_generate_payload(model: str, prompt: str, context: Optional[str] = None, stream: bool = False,
+                           temperature: float = DEFAULT_TEMPERATURE, conversation: Optional[List[int]] = None,
+                           format: Optional[Union[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Build the request body for Ollama's /api/generate endpoint.
+
+    conversation is the "context" array Ollama returned for the previous call of the
+    same conversation; the prompt then only needs to carry what is new. format is
+    "json" or a JSON schema the output must follow.
+    """
+    # Prepare the full prompt with context if provided
+    full_prompt = f"{context}\n\n{prompt}" if context else prompt
+
+    payload = {
+        "model": model,
+        "prompt": full_prompt,
+        "stream": stream,
+        "options": {
+            "temperature": temperature,
+            "top_p": 0.9,
+            "top_k": 40
+        }
+    }
+    if conversation:
+        payload["context"] = conversation
+    if format:
+        payload["format"] = format
+    return payload
+
+
+def retry_delay(attempt: int, backoff: float) -> float:
+    """Exponential backoff with full jitter for the given (zero-based) retry attempt."""
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+def response_cache_key(payload: Dict[str, Any], use_cache: bool = True) -> Optional[str]:
+    """Return the response cache key for a generate payload, or None if the call must not be cached."""
+    cache = get_response_cache()
+    # A prompt continuing a conversation means something different in every conversation
+    if cache is None or not use_cache or payload.get("context"):
+        return None
+    if not cache.cacheable(payload["options"].get("temperature")):
+        cache.record_bypass()
+        return None
+    options = dict(payload["options"], format=payload["format"]) if payload.get("format") else payload["options"]
+    return cache.make_key(payload["model"], payload["prompt"], options)
+
+
+def _release_on_close(response: requests.Response, release):
+    """Call release once a streamed response has been read to the end or closed."""
+    close = response.close
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            release()
+            response.close = close
+
+    response.close = close_and_release
+    return response
+
+
+class ModelLimiter:
+    """
+    Per-model semaphore bounding the Ollama requests this process runs at once.
+
+    Requests over max_concurrency wait for a slot instead of piling up on the model
+    server; the in-flight and queued counts are kept per model for stats and metrics.
+    A max_concurrency of 0 or less disables the limit but keeps the counts.
+    """
+
+    def __init__(self, max_concurrency: int = OLLAMA_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._semaphores = {}
+        self._in_flight = {}
+        self._queued = {}
+        self._lock = threading.Lock()
+
+    def _add(self, counts: Dict[str, int], gauge: Gauge, model: str, amount: int):
+        with self._lock:
+            counts[model] = counts.get(model, 0) + amount
+        gauge.inc(amount, model=model)
+
+    @contextmanager
+    def slot(self, model: str):
+        """Hold one of the model's concurrency slots for the duration of the block."""
+        semaphore = None
+        if self.max_concurrency > 0:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(model, threading.BoundedSemaphore(self.max_concurrency))
+
+        self._add(self._queued, MODEL_QUEUED, model, 1)
+        started = time.monotonic()
+        try:
+            if semaphore is not None:
+                semaphore.acquire()
+        finally:
+            self._add(self._queued, MODEL_QUEUED, model, -1)
+        MODEL_WAIT_SECONDS.observe(time.monotonic() - started, model=model)
+
+        self._add(self._in_flight, MODEL_IN_FLIGHT, model, 1)
+        try:
+            yield
+        finally:
+            self._add(self._in_flight, MODEL_IN_FLIGHT, model, -1)
+            if semaphore is not None:
+                semaphore.release()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            models = sorted(set(self._in_flight) | set(self._queued))
+            return [{
+                "model": model,
+                "in_flight": self._in_flight.get(model, 0),
+                "queued": self._queued.get(model, 0),
+                "max_concurrency": self.max_concurrency
+            } for model in models]
+
+
 class OllamaClient:
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3.2:latest"):
-        self.base_url = base_url
+    def __init__(self, base_url: Optional[str] = None, model: str = OLLAMA_MODEL,
+                 pool_size: int = OLLAMA_POOL_SIZE, connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+                 read_timeout: float = OLLAMA_READ_TIMEOUT, max_retries: int = OLLAMA_MAX_RETRIES,
+                 retry_backoff: float = OLLAMA_RETRY_BACKOFF, router: Optional[OllamaRouter] = None,
+                 max_concurrency: int = OLLAMA_MAX_CONCURRENCY):
+        # An explicit base_url pins the client to one host; otherwise OLLAMA_BACKENDS is used
+        self.router = router or OllamaRouter(
+            [(base_url, 1.0)] if base_url else parse_backends(OLLAMA_BACKENDS, OLLAMA_BASE_URL)
+        )
+        self.base_url = self.router.backends[0].url
         self.model = model
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.limiter = ModelLimiter(max_concurrency)
+
+        # Size the connection pool for the threads sharing this client
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.router.backends), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _post(self, path: str, payload: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """
+        POST to an Ollama backend chosen by the router, retrying connection failures and
+        overload responses with backoff (on another backend if the router picks one).
+        """
+        for attempt in range(self.max_retries + 1):
+            backend = self.router.acquire()
+            try:
+                response = self.session.post(
+                    f"{backend.url}{path}",
+                    json=payload,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+            except requests.exceptions.RequestException as e:
+                self.router.release(backend, success=False)
+                if attempt == self.max_retries or not isinstance(e, requests.exceptions.ConnectionError):
+                    raise
+                logger.warning(f"Could not reach Ollama at {backend.url}, retrying ({attempt + 1}/{self.max_retries}): {str(e)}")
+            else:
+                success = response.status_code < 500 and response.status_code != 429
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    if stream:
+                        return _release_on_close(response, lambda: self.router.release(backend, success))
+                    self.router.release(backend, success)
+                    return response
+                response.close()
+                self.router.release(backend, success=False)
+                logger.warning(f"Ollama at {backend.url} returned {response.status_code}, retrying ({attempt + 1}/{self.max_retries})")
+            time.sleep(retry_delay(attempt, self.retry_backoff))
         
-    def generate_response(self, prompt: str, context: Optional[str] = None) -> Dict[str, Any]:
+    def _models(self, task: Optional[str], model: Optional[str], conversation: Optional[List[int]]) -> List[str]:
+        """Models to try in order: an explicit model, else the task's tiers, else the client's model."""
+        if model:
+            return [model]
+        models = get_model_tiers().candidates(task) if task else [self.model]
+        # Context tokens only mean something to the model that produced them
+        return models[:1] if conversation else models
+
+    @staticmethod
+    def _track(task: Optional[str], model: str):
+        return get_model_tiers().track(task, model) if task else nullcontext(CallRecord())
+
+    @timed("ollama.generate")
+    def generate_response(self, prompt: str, context: Optional[str] = None, use_cache: bool = True,
+                          temperature: float = DEFAULT_TEMPERATURE, conversation: Optional[List[int]] = None,
+                          task: Optional[str] = None, model: Optional[str] = None,
+                          format: Optional[Union[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Generate a response using Ollama.
         
         Args:
             prompt (str): The input prompt for the model
             context (Optional[str]): Additional context for the model
+            use_cache (bool): Whether a cached response for the same prompt may be returned
+            temperature (float): Sampling temperature; values above the cache limit always reach the model
+            conversation (Optional[List[int]]): Context tokens returned by a previous call to continue from;
+                pass the model that returned them too, the call is not moved to another tier
+            task (Optional[str]): "question", "scoring", "report" or "query"; the call uses the task's model
+                tiers and falls back to the next one when a model fails or times out
+            model (Optional[str]): A specific model, overriding the task's tiers and the client's default
+            format (Optional[Union[str, Dict[str, Any]]]): "json" or a JSON schema to constrain the output to
             
         Returns:
-            Dict[str, Any]: The model's response
+            Dict[str, Any]: The model's response, with the conversation's new "context" tokens and
+            the "model" that produced it
         """
+        models = self._models(task, model, conversation)
+        for i, candidate in enumerate(models):
+            with self._track(task, candidate) as call:
+                result = self._generate(candidate, prompt, context, use_cache, temperature, conversation, format)
+                call.ok = result["success"]
+                call.cached = result.get("cached", False)
+            result["model"] = candidate
+            if result["success"] or i == len(models) - 1:
+                return result
+            logger.warning(f"{task} call to {candidate} failed, falling back to {models[i + 1]}: {result['error']}")
+
+    def _generate(self, model: str, prompt: str, context: Optional[str], use_cache: bool, temperature: float,
+                  conversation: Optional[List[int]], format: Optional[Union[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """One generate call to one model; see generate_response."""
         try:
-            # Prepare the full prompt with context if provided
-            full_prompt = f"{context}\n\n{prompt}" if context else prompt
-            
+            payload = build_generate_payload(model, prompt, context, temperature=temperature,
+                                             conversation=conversation, format=format)
+
+            # Serve repeated prompts from the response cache
+            cache_key = response_cache_key(payload, use_cache)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    return {"response": cached, "success": True, "cached": True}
+
             # Make request to Ollama API
-            response = self.session.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": full_prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "top_k": 40
-                    }
-                }
-            )
-            
-            # Check if request was successful
-            response.raise_for_status()
-            
-            # Parse and return the response
-            result = response.json()
+            with self.limiter.slot(model):
+                started = time.monotonic()
+                response = self._post("/api/generate", payload)
+
+                # Check if request was successful
+                response.raise_for_status()
+
+                # Parse and return the response
+                result = response.json()
             
             # Check if we got a valid response
             if not result.get("response"):
@@ -54,10 +292,18 @@ class OllamaClient:
                     "error": "Empty response from Ollama",
                     "success": False
                 }
+
+            usage = usage_from_response(result, time.monotonic() - started)
+            record_llm_usage(usage)
+
+            if cache_key:
+                get_response_cache().set(cache_key, result["response"])
                 
             return {
                 "response": result.get("response", ""),
-                "success": True
+                "success": True,
+                "usage": usage,
+                "context": result.get("context")
             }
             
         except requests.exceptions.RequestException as e:
@@ -79,6 +325,109 @@ class OllamaClient:
                 "success": False
             }
 
+    def generate_response_stream(self, prompt: str, context: Optional[str] = None, use_cache: bool = True,
+                                 temperature: float = DEFAULT_TEMPERATURE, conversation: Optional[List[int]] = None,
+                                 task: Optional[str] = None, model: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a response using Ollama, yielding tokens as they are produced.
+
+        A cached response is replayed as a single token. A failing model is only replaced
+        by the next tier while it has not streamed any tokens yet.
+
+        Args:
+            prompt (str): The input prompt for the model
+            context (Optional[str]): Additional context for the model
+            use_cache (bool): Whether a cached response for the same prompt may be returned
+            temperature (float): Sampling temperature; values above the cache limit always reach the model
+            conversation (Optional[List[int]]): Context tokens returned by a previous call to continue from;
+                pass the model that returned them too, the call is not moved to another tier
+            task (Optional[str]): "question", "scoring", "report" or "query"; the call uses the task's model tiers
+            model (Optional[str]): A specific model, overriding the task's tiers and the client's default
+
+        Yields:
+            Dict[str, Any]: ``{"token": str, "done": False}`` for every chunk, then a final
+            ``{"done": True, "success": True, "response": str, "context": list, "model": str}`` with the
+            full text, or ``{"done": True, "success": False, "error": str, "model": str}`` if generation failed
+        """
+        models = self._models(task, model, conversation)
+        for i, candidate in enumerate(models):
+            streamed = False
+            with self._track(task, candidate) as call:
+                for chunk in self._generate_stream(candidate, prompt, context, use_cache, temperature, conversation):
+                    if chunk["done"]:
+                        break
+                    streamed = True
+                    yield chunk
+                call.ok = chunk["success"]
+                call.cached = chunk.get("cached", False)
+            chunk["model"] = candidate
+            if chunk["success"] or streamed or i == len(models) - 1:
+                yield chunk
+                return
+            logger.warning(f"{task} call to {candidate} failed, falling back to {models[i + 1]}: {chunk['error']}")
+
+    def _generate_stream(self, model: str, prompt: str, context: Optional[str], use_cache: bool,
+                         temperature: float, conversation: Optional[List[int]]) -> Iterator[Dict[str, Any]]:
+        """One streamed generate call to one model; see generate_response_stream."""
+        try:
+            payload = build_generate_payload(model, prompt, context, stream=True, temperature=temperature,
+                                             conversation=conversation)
+
+            cache_key = response_cache_key(payload, use_cache)
+            if cache_key:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    yield {"token": cached, "done": False}
+                    yield {"response": cached, "done": True, "success": True, "cached": True}
+                    return
+
+            # Make a streaming request to Ollama API; the model's slot is held until the stream is read or abandoned
+            with self.limiter.slot(model):
+                started = time.monotonic()
+                with timed("ollama.generate_stream"), self._post("/api/generate", payload, stream=True) as response:
+                    response.raise_for_status()
+
+                    # Ollama streams one JSON object per line; the last one carries the token counts
+                    tokens = []
+                    chunk = {}
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise ValueError(chunk["error"])
+                        token = chunk.get("response", "")
+                        if token:
+                            tokens.append(token)
+                            yield {"token": token, "done": False}
+                        if chunk.get("done"):
+                            break
+
+            full_response = "".join(tokens)
+            if not full_response:
+                logger.error("Ollama returned empty response")
+                yield {"error": "Empty response from Ollama", "done": True, "success": False}
+                return
+
+            usage = usage_from_response(chunk, time.monotonic() - started)
+            record_llm_usage(usage)
+
+            if cache_key:
+                get_response_cache().set(cache_key, full_response)
+
+            yield {"response": full_response, "done": True, "success": True, "usage": usage,
+                   "context": chunk.get("context")}
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error communicating with Ollama: {str(e)}")
+            yield {"error": f"Failed to communicate with Ollama: {str(e)}", "done": True, "success": False}
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing Ollama response: {str(e)}")
+            yield {"error": f"Invalid response from Ollama: {str(e)}", "done": True, "success": False}
+        except Exception as e:
+            logger.error(f"Unexpected error in Ollama client: {str(e)}")
+            yield {"error": f"Unexpected error: {str(e)}", "done": True, "success": False}
+
 # Create a singleton instance
 ollama_client = OllamaClient()
 
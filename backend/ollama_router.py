@@ -0,0 +1,211 @@
+import math
+import time
+import random
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, Tuple
+
+import requests
+
+from backend.config import (
+    OLLAMA_BREAKER_FAILURES, OLLAMA_BREAKER_COOLDOWN, OLLAMA_HEALTH_CHECK_INTERVAL, OLLAMA_CONNECT_TIMEOUT
+)
+from backend.metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+BACKEND_REQUESTS = registry.register(Counter(
+    "recruitbot_ollama_backend_requests_total", "Requests sent to each Ollama backend by outcome.", ("backend", "outcome")
+))
+
+# Key that calls inside llm_route share a backend by; set with llm_route
+_route_key = ContextVar("recruitbot_llm_route_key", default=None)
+
+
+class NoBackendAvailable(requests.exceptions.ConnectionError):
+    """Every Ollama backend is unhealthy or has its circuit breaker open."""
+
+
+def parse_backends(spec: str, default_url: str) -> List[Tuple[str, float]]:
+    """
+    Parse OLLAMA_BACKENDS: comma separated "url" or "url=weight" entries.
+
+    Falls back to a single backend at default_url when the list is empty.
+    """
+    backends = []
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        url, _, weight = entry.rpartition("=") if "=" in entry else (entry, "", "1")
+        backends.append((url.strip().rstrip("/"), float(weight)))
+    return backends or [(default_url.rstrip("/"), 1.0)]
+
+
+@contextmanager
+def llm_route(key: Optional[Any]):
+    """Send the LLM calls made inside the block to the same backend as other calls with this key."""
+    token = _route_key.set(str(key) if key is not None else None)
+    try:
+        yield
+    finally:
+        _route_key.reset(token)
+
+
+class Backend:
+    """One Ollama host with its in-flight request count, health and circuit breaker state."""
+
+    def __init__(self, url: str, weight: float = 1.0):
+        self.url = url
+        self.weight = weight
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.requests = 0
+        self.errors = 0
+
+    def state(self, now: float, cooldown: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if now - self.opened_at >= cooldown else "open"
+
+    def to_dict(self, now: float, cooldown: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "breaker": self.state(now, cooldown),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+class OllamaRouter:
+    """
+    Spreads Ollama requests over several backends.
+
+    Requests go to the usable backend with the fewest in-flight requests per unit of
+    weight. Requests made inside llm_route(key) instead go to the backend the key
+    hashes to (weighted rendezvous hashing), so every worker process sends an interview
+    to the same host and its prompt cache is reused; they only move when that backend
+    is unusable. A backend is unusable while a health check fails or while its circuit
+    breaker is open: the breaker opens after failure_threshold consecutive failures and
+    lets a single trial request through after cooldown seconds.
+
+    Args:
+        backends (List[Tuple[str, float]]): (url, weight) pairs
+        failure_threshold (int): Consecutive failures that open a backend's breaker
+        cooldown (float): Seconds an open breaker waits before a trial request
+        health_interval (float): Seconds between health checks, 0 to disable them
+    """
+
+    def __init__(self, backends: List[Tuple[str, float]], failure_threshold: int = OLLAMA_BREAKER_FAILURES,
+                 cooldown: float = OLLAMA_BREAKER_COOLDOWN, health_interval: float = OLLAMA_HEALTH_CHECK_INTERVAL):
+        self.backends = [Backend(url, weight) for url, weight in backends]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    def _usable(self, backend: Backend, now: float) -> bool:
+        if not backend.healthy:
+            return False
+        state = backend.state(now, self.cooldown)
+        return state == "closed" or (state == "half_open" and not backend.trial_running)
+
+    @staticmethod
+    def _rendezvous_score(key: str, backend: Backend) -> float:
+        digest = hashlib.sha256(f"{key}|{backend.url}".encode()).digest()
+        # Uniform in (0, 1); the weighted score favours heavier backends proportionally
+        uniform = (int.from_bytes(digest[:8], "big") + 1) / (2 ** 64 + 2)
+        return backend.weight / -math.log(uniform)
+
+    def _pick(self, now: float, key: Optional[str]) -> Backend:
+        usable = [backend for backend in self.backends if self._usable(backend, now)]
+        if not usable:
+            # With nowhere else to go, a lone backend is always tried
+            if len(self.backends) == 1:
+                return self.backends[0]
+            raise NoBackendAvailable("No Ollama backend is available")
+        if key is not None:
+            return max(usable, key=lambda backend: self._rendezvous_score(key, backend))
+        lowest = min((backend.outstanding + 1) / backend.weight for backend in usable)
+        return random.choice([b for b in usable if (b.outstanding + 1) / b.weight == lowest])
+
+    def acquire(self, key: Optional[str] = None) -> Backend:
+        """
+        Choose a backend for one request and count it as in flight.
+
+        Every acquire must be followed by exactly one release. The key defaults to the
+        one set by the enclosing llm_route block.
+        """
+        self._ensure_health_checks()
+        key = key if key is not None else _route_key.get()
+        with self._lock:
+            now = time.monotonic()
+            backend = self._pick(now, key)
+            if backend.state(now, self.cooldown) == "half_open":
+                backend.trial_running = True
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, success: bool):
+        """Finish a request and update the backend's circuit breaker."""
+        with self._lock:
+            backend.outstanding -= 1
+            was_trial = backend.trial_running
+            backend.trial_running = False
+            if success:
+                if backend.opened_at is not None:
+                    logger.info(f"Ollama backend {backend.url} recovered, closing its circuit breaker")
+                backend.failures = 0
+                backend.opened_at = None
+            else:
+                backend.errors += 1
+                backend.failures += 1
+                if was_trial or (backend.opened_at is None and backend.failures >= self.failure_threshold):
+                    logger.warning(f"Opening the circuit breaker of Ollama backend {backend.url} "
+                                   f"after {backend.failures} consecutive failures")
+                    backend.opened_at = time.monotonic()
+        BACKEND_REQUESTS.inc(backend=backend.url, outcome="success" if success else "failure")
+
+    def check_health(self, timeout: float = OLLAMA_CONNECT_TIMEOUT):
+        """Probe every backend's /api/tags and mark it healthy or not."""
+        for backend in self.backends:
+            try:
+                healthy = requests.get(f"{backend.url}/api/tags", timeout=timeout).status_code == 200
+            except requests.exceptions.RequestException:
+                healthy = False
+            if healthy != backend.healthy:
+                logger.warning(f"Ollama backend {backend.url} is now {'healthy' if healthy else 'unhealthy'}")
+            backend.healthy = healthy
+
+    def _health_loop(self):
+        while True:
+            time.sleep(self.health_interval)
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error(f"Ollama health check failed: {str(e)}")
+
+    def _ensure_health_checks(self):
+        # A single backend is still used when unhealthy, so there is nothing to check
+        if self._health_thread is not None or len(self.backends) < 2 or self.health_interval <= 0:
+            return
+        with self._lock:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(target=self._health_loop, name="ollama-health", daemon=True)
+                self._health_thread.start()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [backend.to_dict(now, self.cooldown) for backend in self.backends]
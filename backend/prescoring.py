@@ -0,0 +1,186 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.config import PRESCORE_ENABLED
+from backend.metrics import registry, Counter
+
+ANSWERS_SCORED = registry.register(Counter(
+    "recruitbot_answer_scoring_total", "Answers scored by the stage that decided the score (answer_key, rules, model).",
+    ("stage",)
+))
+
+STAGES = ("answer_key", "rules", "model")
+
+# "Answer: B" on its own line after a generated multiple-choice question
+ANSWER_KEY_LINE = re.compile(r"^\s*\**\s*(?:correct\s+)?answer\s*\**\s*[:\-]\s*\**\s*\(?([A-D])\)?\W*$", re.I | re.M)
+# The same grammar split for a line still being streamed: ANSWER_KEY_LEAD strips the opening
+# "**", and once the words are complete the rest must be a start of ANSWER_KEY_TAIL
+ANSWER_KEY_LEAD = re.compile(r"^\s*\**\s*")
+ANSWER_KEY_WORDS = ("correct answer", "answer")
+ANSWER_KEY_TAIL = re.compile(r"^\s*\**\s*(?:[:\-]\s*\**\s*\(?(?:[A-D]\W*)?)?$", re.I)
+
+# A bare option letter: "B", "(b)", "B)", "B. Hash table", "Option B"
+MCQ_CHOICE = re.compile(r"^\s*(?:(?:option|answer)\s*[:\-]?\s*)?\(?([A-D])(?:[\).:]|\s*$)", re.I)
+
+# "None", "nothing" and "pass" are left out: they can be right answers to code questions
+NON_ANSWER = re.compile(
+    r"^(?:i\s+(?:do\s*n[o']?t|dont|have\s+no)\s+(?:know|idea)|idk|no\s+idea|not\s+sure|no\s+clue|skip|"
+    r"n/?a|-+|\?+|\.+)[\s.!?]*$",
+    re.I
+)
+
+_counts = {stage: 0 for stage in STAGES}
+_lock = threading.Lock()
+
+
+def split_answer_key(text: str) -> Tuple[str, Optional[str]]:
+    """Remove the "Answer: X" line from a generated question; returns (question text, key or None)."""
+    match = ANSWER_KEY_LINE.search(text or "")
+    if not match:
+        return (text or "").strip(), None
+    return (text[:match.start()] + text[match.end():]).strip(), match.group(1).upper()
+
+
+class AnswerKeyFilter:
+    """
+    Holds back a streamed "Answer: X" line so the key never reaches the candidate.
+
+    feed() returns the part of each token that is safe to show; finish() whatever was
+    still held back once the stream ends.
+    """
+
+    def __init__(self):
+        self.line = ""
+        self.passing = False
+
+    def _could_be_key(self) -> bool:
+        """Whether the line so far can still turn into an ANSWER_KEY_LINE."""
+        head = re.sub(r"\s+", " ", ANSWER_KEY_LEAD.sub("", self.line, count=1)).lower()
+        for words in ANSWER_KEY_WORDS:
+            if words.startswith(head):
+                return True
+            if head.startswith(words):
+                return bool(ANSWER_KEY_TAIL.match(head[len(words):]))
+        return False
+
+    def feed(self, token: str) -> str:
+        shown = []
+        for char in token:
+            if self.passing:
+                shown.append(char)
+                if char == "\n":
+                    self.passing = False
+                continue
+            self.line += char
+            if char == "\n":
+                if not ANSWER_KEY_LINE.match(self.line):
+                    shown.append(self.line)
+                self.line = ""
+            elif not self._could_be_key():
+                shown.append(self.line)
+                self.line = ""
+                self.passing = True
+        return "".join(shown)
+
+    def finish(self) -> str:
+        held, self.line = self.line, ""
+        return "" if ANSWER_KEY_LINE.match(held) else held
+
+
+def keyword_overlap(text: str, terms: List[str]) -> List[str]:
+    """The terms that occur in the text as whole words, ignoring case."""
+    return [
+        term for term in terms
+        if term and re.search(rf"(?<!\w){re.escape(term)}(?!\w)", text or "", re.I)
+    ]
+
+
+def rubric_overlap(question: str, answer: Optional[str],
+                   technical_skills: Optional[List[str]]) -> Optional[Dict[str, List[str]]]:
+    """
+    The job profile's technical skills an answer is expected to cover, and those it mentions.
+
+    Skills named in the question are expected; when it names none, all of them are.
+    Returns None for a profile without technical skills. This is a hint for the evaluator
+    and is never used to score on its own, since a short answer can be right without
+    naming a skill.
+    """
+    skills = [skill for skill in technical_skills or [] if skill]
+    if not skills:
+        return None
+    expected = keyword_overlap(question, skills) or skills
+    return {"expected": expected, "mentioned": keyword_overlap(answer, expected)}
+
+
+def _evaluation(score: float, stage: str, strengths: str, improvements: str, feedback: str) -> Dict[str, Any]:
+    record_scoring_stage(stage)
+    return {
+        "score": score,
+        "strengths": strengths,
+        "areas_for_improvement": improvements,
+        "additional_insights": "",
+        "overall_feedback": feedback,
+        "scored_by": stage
+    }
+
+
+def prescore_answer(question: str, answer: Optional[str], question_type: Optional[str] = None,
+                    answer_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Score an answer without the LLM when the outcome is certain.
+
+    Multiple-choice answers naming an option are checked against the question's answer
+    key, and empty answers and "I don't know" score 0. Anything else, however short, may
+    still be right ("TCP", "Quicksort") and is left to the model.
+
+    Args:
+        question (str): The question text
+        answer (Optional[str]): The candidate's answer
+        question_type (Optional[str]): 'mcq', 'concept' or 'coding'
+        answer_key (Optional[str]): Correct option letter of a multiple-choice question
+
+    Returns:
+        Optional[Dict[str, Any]]: An evaluation shaped like the model's, with "scored_by",
+        or None if the answer needs the model
+    """
+    if not PRESCORE_ENABLED:
+        return None
+    text = (answer or "").strip()
+
+    if not text:
+        return _evaluation(0, "rules", "None", "Answer the question.", "No answer was given.")
+    if NON_ANSWER.match(text):
+        return _evaluation(0, "rules", "None", "Attempt an answer, even a partial one.",
+                           "The candidate did not attempt an answer.")
+
+    if question_type == "mcq" and answer_key:
+        choice = MCQ_CHOICE.match(text)
+        if choice:
+            chosen = choice.group(1).upper()
+            if chosen == answer_key.upper():
+                return _evaluation(10, "answer_key", f"Chose the correct option ({chosen}).", "None",
+                                   "Correct answer.")
+            return _evaluation(0, "answer_key", "None", f"The correct option was {answer_key.upper()}.",
+                               f"Incorrect answer: chose {chosen}.")
+
+    return None
+
+
+def record_scoring_stage(stage: str):
+    """Count an answer as scored by the given stage; callers record "model" themselves."""
+    ANSWERS_SCORED.inc(stage=stage)
+    with _lock:
+        _counts[stage] += 1
+
+
+def scoring_stats() -> Dict[str, Any]:
+    """Answers scored per stage in this process, with the fraction each stage handled."""
+    with _lock:
+        counts = dict(_counts)
+    total = sum(counts.values())
+    return {
+        "total": total,
+        "counts": counts,
+        "fractions": {stage: round(count / total, 3) if total else None for stage, count in counts.items()}
+    }
@@ -0,0 +1,108 @@
+import hashlib
+import logging
+from typing import Any, Dict, List, Tuple
+
+from backend.config import JOB_PROFILE_PROMPT_TEMPLATE, PROMPT_TOKEN_BUDGET_PROFILE_FIELD
+from backend.metrics import registry, Counter
+from backend.response_cache import MemoryTier
+from backend.token_budget import truncate_text
+
+logger = logging.getLogger(__name__)
+
+# Compiled profiles kept per worker; old versions age out of the LRU
+MAX_COMPILED_PROFILES = 500
+
+LIST_FIELDS = ("technical_skills", "soft_skills")
+TEXT_FIELDS = ("experience_requirements", "evaluation_focus", "custom_prompt")
+
+PROFILE_COMPILES = registry.register(Counter(
+    "recruitbot_prompt_profile_compiles_total", "Job profile prompt prefixes compiled (cache misses)."
+))
+
+_compiled = MemoryTier(MAX_COMPILED_PROFILES, 0)
+
+
+def normalize_criteria(criteria: Any) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Coerce a job profile's evaluation_criteria into the shape the prompts expect.
+
+    Skill fields become lists of non-empty strings (a comma separated string is split),
+    text fields become strings. Unknown keys are ignored.
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: The normalized criteria and a description of
+        every value that had to be coerced or dropped
+    """
+    problems = []
+    if not isinstance(criteria, dict):
+        if criteria is not None:
+            problems.append(f"evaluation_criteria is a {type(criteria).__name__}, not an object")
+        criteria = {}
+
+    normalized = {}
+    for field in LIST_FIELDS:
+        value = criteria.get(field) or []
+        if isinstance(value, str):
+            value = value.split(",")
+        elif not isinstance(value, (list, tuple)):
+            problems.append(f"{field} is a {type(value).__name__}, not a list")
+            value = []
+        skills = [str(skill).strip() for skill in value if skill is not None]
+        normalized[field] = [skill for skill in skills if skill]
+
+    for field in TEXT_FIELDS:
+        value = criteria.get(field)
+        if value is not None and not isinstance(value, str):
+            problems.append(f"{field} is a {type(value).__name__}, not text")
+            value = str(value)
+        normalized[field] = (value or "").strip()
+
+    return normalized, problems
+
+
+class CompiledProfile:
+    """
+    The static, job-profile specific part of every interviewer prompt.
+
+    Prompts start with the same prefix for the whole interview, so Ollama can reuse the
+    evaluated prefix from its prompt cache and only process the per-turn instructions.
+    """
+
+    def __init__(self, job_profile):
+        criteria, problems = normalize_criteria(job_profile.evaluation_criteria)
+        if problems:
+            logger.warning(f"Job profile {job_profile.id} has malformed evaluation criteria: {'; '.join(problems)}")
+
+        limit = PROMPT_TOKEN_BUDGET_PROFILE_FIELD
+        self.job_profile_id = job_profile.id
+        self.title = job_profile.title
+        self.technical_skills = criteria["technical_skills"]
+        self.problems = problems
+        self.fields = {
+            "title": job_profile.title,
+            "description": truncate_text(job_profile.description, limit),
+            "technical_skills": truncate_text(", ".join(criteria["technical_skills"]), limit),
+            "soft_skills": truncate_text(", ".join(criteria["soft_skills"]), limit),
+            "experience_requirements": truncate_text(criteria["experience_requirements"], limit),
+            "evaluation_focus": truncate_text(criteria["evaluation_focus"], limit),
+            "custom_prompt": truncate_text(criteria["custom_prompt"], limit),
+        }
+        self.prefix = JOB_PROFILE_PROMPT_TEMPLATE.format(**self.fields)
+        self.version = hashlib.sha256(self.prefix.encode()).hexdigest()[:12]
+
+    def render(self, instructions: str) -> str:
+        """A complete prompt: the profile prefix followed by the per-call instructions."""
+        return f"{self.prefix}\n\n{instructions.strip()}"
+
+
+def compiled_profile(job_profile) -> CompiledProfile:
+    """The compiled prompt prefix of a job profile, recompiled whenever its updated_at changes."""
+    updated_at = job_profile.updated_at.isoformat() if job_profile.updated_at else ""
+    key = f"{job_profile.id}:{updated_at}"
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = CompiledProfile(job_profile)
+        _compiled.set(key, compiled)
+        PROFILE_COMPILES.inc()
+        logger.debug(f"Compiled prompt prefix {compiled.version} for job profile {job_profile.id}")
+    return compiled
@@ -0,0 +1,63 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, literal
+
+from backend.config import BORDERLINE_SCORE, PASS_SCORE
+
+logger = logging.getLogger(__name__)
+
+# Questions are scored out of 10 by the evaluator
+MAX_QUESTION_SCORE = 10
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse comma separated "name=weight" entries, skipping (and logging) malformed ones."""
+    weights = {}
+    for entry in (spec or "").split(","):
+        name, _, weight = entry.partition("=")
+        if not name.strip():
+            continue
+        try:
+            weights[name.strip()] = float(weight)
+        except ValueError:
+            logger.warning(f"Ignoring score weight {entry.strip()!r}: expected name=number")
+    return weights
+
+
+def weight_expression(column, weights: Dict[str, float], default: float = 1.0):
+    """SQL expression giving the weight for the value of a column; values not listed get default."""
+    if not weights:
+        return literal(default)
+    return case(weights, value=column, else_=default)
+
+
+def weighted_sums(score, weight):
+    """
+    SQL aggregates (weighted points, weighted maximum) of question scores.
+
+    Questions without a score count as 0 points; callers filter out the ones that should
+    not count at all. Dividing the sums gives the weighted score as a fraction, and sums of
+    several groups can be added up first.
+    """
+    return (
+        func.sum(weight * func.coalesce(score, 0)),
+        func.sum(weight * MAX_QUESTION_SCORE)
+    )
+
+
+def percent(points: Optional[float], maximum: Optional[float]) -> float:
+    """Weighted points as a percentage of the maximum, 0 when nothing could be scored."""
+    if not maximum:
+        return 0.0
+    return round(min(100.0, max(0.0, 100.0 * float(points or 0) / float(maximum))), 1)
+
+
+def result_for_score(score: Optional[float]) -> str:
+    """'pass', 'borderline' or 'fail' for an interview score in percent."""
+    if score is None:
+        return 'fail'
+    if score >= PASS_SCORE:
+        return 'pass'
+    if score >= BORDERLINE_SCORE:
+        return 'borderline'
+    return 'fail'
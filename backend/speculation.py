@@ -0,0 +1,160 @@
+import re
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Dict, Iterable, Optional
+
+from backend.config import SPECULATIVE_WORKERS, SPECULATIVE_DRAFT_TTL, SPECULATIVE_WAIT
+from backend.ollama_client import get_ollama_client
+
+logger = logging.getLogger(__name__)
+
+# Difficulty branches of the follow-up question prompt
+BRANCHES = ('harder', 'same', 'easier')
+
+DONT_KNOW_PHRASES = (
+    "i don't know", "i dont know", "i do not know", "not sure", "no idea",
+    "don't remember", "dont remember", "skip", "pass"
+)
+
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'is', 'are', 'was',
+    'be', 'it', 'this', 'that', 'what', 'how', 'why', 'when', 'which', 'you', 'your', 'i', 'we',
+    'can', 'do', 'does', 'would', 'could', 'should', 'between', 'explain', 'describe', 'its'
+}
+
+
+def _words(text: str):
+    return re.findall(r"[a-z0-9+#]+", (text or '').lower())
+
+
+def classify_answer(question: str, answer: str, skills: Iterable[str] = ()) -> str:
+    """
+    Cheaply guess how well an answer went, to pick a follow-up difficulty branch.
+
+    Returns 'easier' for empty, very short or "I don't know" answers, 'harder' for long
+    answers that use the vocabulary of the question and required skills, else 'same'.
+    """
+    text = (answer or '').strip().lower()
+    words = _words(text)
+    if len(words) < 4 or any(phrase in text for phrase in DONT_KNOW_PHRASES):
+        return 'easier'
+
+    vocabulary = set(_words(question)) | set(_words(' '.join(skills or ())))
+    vocabulary -= STOPWORDS
+    overlap = len(set(words) & vocabulary) / len(vocabulary) if vocabulary else 0.0
+
+    if len(words) >= 40 and overlap >= 0.2:
+        return 'harder'
+    if len(words) < 12 and overlap < 0.1:
+        return 'easier'
+    return 'same'
+
+
+class QuestionSpeculator:
+    """
+    Generates draft follow-up questions for every difficulty branch while the candidate
+    is still answering, so the next turn can usually skip the LLM call entirely.
+
+    Drafts are kept in process memory, keyed by interview and question, and are thrown
+    away once a branch has been picked or the TTL runs out.
+    """
+
+    def __init__(self, max_workers: int = 3, ttl: float = 900, wait: float = 20):
+        self.ttl = ttl
+        self.wait = wait
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._drafts = {}
+        self._lock = threading.Lock()
+        self._stats = {"started": 0, "used": 0, "missed": 0, "failed": 0, "discarded": 0}
+
+    def _generate(self, prompt: str) -> Optional[str]:
+        result = get_ollama_client().generate_response(prompt, task="question")
+        if not result["success"]:
+            logger.warning(f"Speculative draft failed: {result.get('error')}")
+            return None
+        return result["response"].strip()
+
+    def _discard(self, entry: Dict, keep: Optional[str] = None):
+        for branch, future in entry["futures"].items():
+            if branch != keep:
+                future.cancel()
+                self._stats["discarded"] += 1
+
+    def _evict_expired(self, now: float):
+        for key in [k for k, entry in self._drafts.items() if now - entry["created"] > self.ttl]:
+            self._discard(self._drafts.pop(key))
+
+    def start(self, interview_id: int, question_id: int, prompts: Dict[str, str]):
+        """Start drafting a follow-up to the given question, one draft per branch prompt."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+
+            # Only the latest question of an interview can still be answered
+            for key in [k for k in self._drafts if k[0] == interview_id]:
+                self._discard(self._drafts.pop(key))
+
+            self._drafts[(interview_id, question_id)] = {
+                "created": now,
+                # Each draft runs in a copy of the caller's context so token usage is attributed to it
+                "futures": {
+                    branch: self._executor.submit(contextvars.copy_context().run, self._generate, prompt)
+                    for branch, prompt in prompts.items()
+                }
+            }
+            self._stats["started"] += 1
+
+    def take(self, interview_id: int, question_id: int, branch: str) -> Optional[str]:
+        """
+        Claim the draft for the chosen branch and drop the others.
+
+        Waits up to the configured time for a draft that is still generating, since it was
+        started earlier than a fresh request would be. Returns None if no draft is usable.
+        """
+        with self._lock:
+            entry = self._drafts.pop((interview_id, question_id), None)
+            if entry is None:
+                self._stats["missed"] += 1
+                return None
+            self._discard(entry, keep=branch)
+
+        future = entry["futures"].get(branch)
+        draft = None
+        if future is not None:
+            try:
+                draft = future.result(timeout=self.wait)
+            except TimeoutError:
+                logger.warning(f"Speculative draft for interview {interview_id} not ready after {self.wait}s")
+            except Exception as e:
+                logger.error(f"Speculative draft for interview {interview_id} failed: {str(e)}")
+
+        with self._lock:
+            self._stats["used" if draft else "failed"] += 1
+        return draft
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._drafts)
+        return stats
+
+
+_speculator = None
+_speculator_lock = threading.Lock()
+
+
+def get_question_speculator() -> QuestionSpeculator:
+    """Get the process-wide question speculator, creating it on first use."""
+    global _speculator
+    if _speculator is None:
+        with _speculator_lock:
+            if _speculator is None:
+                _speculator = QuestionSpeculator(
+                    max_workers=SPECULATIVE_WORKERS,
+                    ttl=SPECULATIVE_DRAFT_TTL,
+                    wait=SPECULATIVE_WAIT
+                )
+    return _speculator
@@ -0,0 +1,289 @@
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from backend.config import STRUCTURED_OUTPUT_SCHEMAS, STRUCTURED_OUTPUT_MAX_REPAIRS, JSON_REPAIR_TEMPLATE
+from backend.metrics import registry, Counter
+from backend.model_tiers import get_model_tiers
+from backend.ollama_client import get_ollama_client
+
+logger = logging.getLogger(__name__)
+
+STRUCTURED_OUTPUTS = registry.register(Counter(
+    "recruitbot_structured_output_total", "Structured LLM outputs by schema and outcome (valid, repaired, invalid).",
+    ("schema", "outcome")
+))
+
+# Sampling temperature for structured calls; scores and reports should not vary between runs
+STRUCTURED_TEMPERATURE = 0.0
+
+NUMBER_TEXT = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*(?:/\s*\d+)?\s*$")
+
+ANSWER_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "number", "minimum": 0, "maximum": 10},
+        "strengths": {"type": "string"},
+        "areas_for_improvement": {"type": "string"},
+        "additional_insights": {"type": "string"},
+        "overall_feedback": {"type": "string"}
+    },
+    "required": ["score", "strengths", "areas_for_improvement", "overall_feedback"]
+}
+
+BATCH_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "evaluations": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": dict(ANSWER_EVALUATION_SCHEMA["properties"], id={"type": "integer"}),
+                "required": ["id"] + ANSWER_EVALUATION_SCHEMA["required"]
+            }
+        }
+    },
+    "required": ["evaluations"]
+}
+
+EVALUATION_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overall_assessment": {"type": "string"},
+        "technical_skills": {"type": "string"},
+        "soft_skills": {"type": "string"},
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "areas_for_improvement": {"type": "array", "items": {"type": "string"}},
+        "recommendation": {"type": "string", "enum": ["Pass", "Borderline", "Fail"]}
+    },
+    "required": ["overall_assessment", "technical_skills", "soft_skills", "strengths", "areas_for_improvement",
+                 "recommendation"]
+}
+
+
+def _scan(text: str, start: int) -> Tuple[Optional[int], List[str], bool]:
+    """
+    Walk a JSON value from start, tracking open brackets and strings.
+
+    Returns the index just past the value if it is complete (else None), the closers
+    still needed and whether the text ends inside a string.
+    """
+    closers, in_string, escaped = [], False, False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if closers and closers[-1] == char:
+                closers.pop()
+            if not closers:
+                return i + 1, [], False
+    return None, closers, in_string
+
+
+# Characters a JSON value of each root type starts with
+JSON_OPENERS = {"object": "{", "array": "["}
+
+
+def _repair_truncated(fragment: str) -> Any:
+    """Close off a value cut off at the end, dropping an incomplete last member if need be."""
+    for _ in range(fragment.count(",") + 1):
+        _, closers, in_string = _scan(fragment, 0)
+        candidate = fragment.rstrip("\\") + ('"' if in_string else "")
+        candidate = re.sub(r"[\s,:]+$", "", candidate)
+        try:
+            return json.loads(candidate + "".join(reversed(closers)), strict=False)
+        except json.JSONDecodeError:
+            # Drop the last, incomplete member and try again
+            cut = fragment.rfind(",")
+            if cut <= 0:
+                break
+            fragment = fragment[:cut]
+    raise ValueError("Truncated JSON could not be repaired")
+
+
+def extract_json(text: str, root_type: Optional[str] = None) -> Any:
+    """
+    Parse the first JSON object or array in model output.
+
+    Prose and code fences around the value are skipped. Every opening bracket is tried in
+    turn, so bracketed prose before the value (``Score [out of 10]: {...}``) is passed over;
+    with root_type "object" or "array" only that kind of value is looked for. A value cut
+    off at the end (the model ran out of tokens) is closed off, dropping an incomplete last
+    member if need be.
+
+    Raises:
+        ValueError: If no JSON value can be recovered
+    """
+    text = text or ""
+    openers = JSON_OPENERS.get(root_type, "{[")
+    starts = [i for i, char in enumerate(text) if char in openers]
+    if not starts:
+        raise ValueError("No JSON object or array in the response")
+
+    error = "No valid JSON object or array in the response"
+    for start in starts:
+        end, _, _ = _scan(text, start)
+        try:
+            if end is not None:
+                return json.loads(text[start:end], strict=False)
+            # The value runs to the end of the text, so any later start is inside it
+            return _repair_truncated(text[start:])
+        except ValueError as e:
+            # Bracketed prose rather than JSON; json.JSONDecodeError is a ValueError too
+            error = str(e)
+    raise ValueError(error)
+
+
+def conform(value: Any, schema: Dict[str, Any], path: str = "$") -> Tuple[Any, List[str]]:
+    """
+    Check a value against a JSON schema subset, coercing near misses.
+
+    Supports type, properties, required, items, enum, minimum and maximum. Numbers given
+    as text ("7", "7/10") become numbers, a lone string becomes a one-item list, a list
+    of strings becomes one string, and enum values match regardless of case.
+
+    Returns:
+        Tuple[Any, List[str]]: The coerced value and a description of every violation
+    """
+    expected = schema.get("type")
+    errors = []
+
+    if expected in ("number", "integer"):
+        if isinstance(value, str) and NUMBER_TEXT.match(value):
+            value = float(NUMBER_TEXT.match(value).group(1))
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return value, [f"{path} must be a number"]
+        if expected == "integer":
+            if value != int(value):
+                return value, [f"{path} must be an integer"]
+            value = int(value)
+        if "minimum" in schema and value < schema["minimum"]:
+            errors.append(f"{path} must be at least {schema['minimum']}")
+        if "maximum" in schema and value > schema["maximum"]:
+            errors.append(f"{path} must be at most {schema['maximum']}")
+    elif expected == "string":
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = "; ".join(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not isinstance(value, str):
+            return value, [f"{path} must be a string"]
+    elif expected == "array":
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            return value, [f"{path} must be an array"]
+        items = []
+        for i, item in enumerate(value):
+            item, item_errors = conform(item, schema.get("items", {}), f"{path}[{i}]")
+            items.append(item)
+            errors.extend(item_errors)
+        value = items
+    elif expected == "object":
+        if not isinstance(value, dict):
+            return value, [f"{path} must be an object"]
+        value = dict(value)
+        for key in schema.get("required", []):
+            if value.get(key) is None:
+                errors.append(f"{path}.{key} is missing")
+        for key, subschema in schema.get("properties", {}).items():
+            if value.get(key) is not None:
+                value[key], key_errors = conform(value[key], subschema, f"{path}.{key}")
+                errors.extend(key_errors)
+
+    if "enum" in schema and not errors:
+        matches = [option for option in schema["enum"] if str(option).lower() == str(value).lower()]
+        if matches:
+            value = matches[0]
+        else:
+            errors.append(f"{path} must be one of {', '.join(map(str, schema['enum']))}")
+    return value, errors
+
+
+def parse_structured(text: str, schema: Dict[str, Any]) -> Tuple[Any, List[str]]:
+    """Extract and validate a JSON value from model output; returns (value or None, errors)."""
+    try:
+        value = extract_json(text, schema.get("type"))
+    except (ValueError, json.JSONDecodeError) as e:
+        return None, [f"not valid JSON: {str(e)}"]
+    return conform(value, schema)
+
+
+def repair_prompt(text: str, errors: List[str], schema: Dict[str, Any]) -> str:
+    """A short prompt asking the model to fix its own output instead of starting over."""
+    return JSON_REPAIR_TEMPLATE.format(
+        errors="\n".join(f"- {error}" for error in errors[:10]),
+        schema=json.dumps(schema),
+        output=text
+    )
+
+
+def request_format(schema: Dict[str, Any]) -> Union[str, Dict[str, Any]]:
+    """Ollama's "format" for a schema: the schema itself, or plain JSON mode for older servers."""
+    return schema if STRUCTURED_OUTPUT_SCHEMAS else "json"
+
+
+def generate_structured(prompt: str, schema: Dict[str, Any], name: str, task: Optional[str] = None,
+                        use_cache: bool = True, temperature: float = STRUCTURED_TEMPERATURE,
+                        max_repairs: int = STRUCTURED_OUTPUT_MAX_REPAIRS) -> Dict[str, Any]:
+    """
+    Generate JSON matching a schema with Ollama.
+
+    The call asks Ollama for schema-constrained output. Output that still fails to parse
+    or validate is sent back with the list of problems for at most max_repairs cheap
+    repair calls, on the same model, rather than regenerated from the original prompt.
+
+    Args:
+        prompt (str): The prompt, asking for the JSON described by the schema
+        schema (Dict[str, Any]): JSON schema of the expected output
+        name (str): Schema name for metrics
+        task (Optional[str]): Model tier task of the call
+        use_cache (bool): Whether a cached response for the same prompt may be returned
+        temperature (float): Sampling temperature
+        max_repairs (int): Repair calls allowed after an invalid response
+
+    Returns:
+        Dict[str, Any]: ``{"success": True, "data": ..., "model": str, "repaired": bool}``, or
+        ``{"success": False, "error": str}`` with the best-effort "data" when the output stayed invalid
+    """
+    ollama = get_ollama_client()
+    result = ollama.generate_response(prompt, use_cache=use_cache, temperature=temperature, task=task,
+                                      format=request_format(schema))
+    if not result["success"]:
+        return result
+
+    text = result["response"]
+    data, errors = parse_structured(text, schema)
+    repairs = 0
+    while errors and repairs < max_repairs:
+        repairs += 1
+        logger.warning(f"Invalid {name} output from {result['model']}, repairing: {'; '.join(errors[:3])}")
+        repaired = ollama.generate_response(repair_prompt(text, errors, schema), use_cache=False, temperature=0.0,
+                                            task=task, model=result["model"], format=request_format(schema))
+        if not repaired["success"]:
+            break
+        text = repaired["response"]
+        data, errors = parse_structured(text, schema)
+
+    outcome = "invalid" if errors else ("repaired" if repairs else "valid")
+    STRUCTURED_OUTPUTS.inc(schema=name, outcome=outcome)
+    if task and not result.get("cached"):
+        get_model_tiers().record_quality(task, result["model"], outcome == "valid")
+
+    if errors:
+        logger.error(f"Invalid {name} output from {result['model']} after {repairs} repair(s): {'; '.join(errors[:3])}")
+        return {"success": False, "error": f"Invalid {name} output: {'; '.join(errors[:3])}", "data": data,
+                "model": result["model"]}
+    return {"success": True, "data": data, "model": result["model"], "repaired": bool(repairs),
+            "cached": result.get("cached", False)}
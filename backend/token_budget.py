@@ -0,0 +1,210 @@
+import math
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Iterable, Tuple
+
+from flask import has_request_context, request
+
+from backend.config import (
+    PROMPT_TOKEN_BUDGET_QUESTION, PROMPT_TOKEN_BUDGET_REPORT, PROMPT_TOKEN_BUDGET_ANSWER
+)
+from backend.metrics import registry, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Whole-prompt budgets by prompt kind
+PROMPT_BUDGETS = {
+    "interview_question": PROMPT_TOKEN_BUDGET_QUESTION,
+    "evaluation_report": PROMPT_TOKEN_BUDGET_REPORT,
+}
+
+# Rough characters per token for English text and code with Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+
+# Older transcript answers are cut down to this many tokens before anything else is dropped
+SUMMARY_ANSWER_TOKENS = 40
+
+TRUNCATION_MARKER = " [...{omitted} tokens omitted...] "
+
+PROMPT_TOKENS = registry.register(Counter(
+    "recruitbot_llm_prompt_tokens_total", "Prompt tokens sent to the LLM.", ("job_profile", "endpoint")
+))
+COMPLETION_TOKENS = registry.register(Counter(
+    "recruitbot_llm_completion_tokens_total", "Completion tokens generated by the LLM.", ("job_profile", "endpoint")
+))
+TOKENS_PER_SECOND = registry.register(Histogram(
+    "recruitbot_llm_tokens_per_second", "Generation speed of LLM calls.", ("endpoint",),
+    buckets=(1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+))
+PROMPT_TRUNCATIONS = registry.register(Counter(
+    "recruitbot_llm_prompt_truncations_total", "Prompts cut down to fit their token budget.", ("prompt",)
+))
+
+# Who an LLM call is made for; set with llm_usage_scope around the call
+_usage_labels = ContextVar("recruitbot_llm_usage_labels", default=None)
+
+_usage_lock = threading.Lock()
+_usage_totals = {}
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Estimate the number of tokens in a piece of text."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_text(text: Optional[str], max_tokens: int) -> str:
+    """
+    Cut text down to about max_tokens, keeping its beginning and end.
+
+    The same input always gives the same output; the cut is moved to the nearest
+    whitespace so words are not split.
+    """
+    text = text or ""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+
+    marker = TRUNCATION_MARKER.format(omitted=tokens - max_tokens)
+    keep = max(0, max_tokens * CHARS_PER_TOKEN - len(marker))
+    head_end = keep * 2 // 3
+    tail_start = len(text) - (keep - head_end)
+
+    # Snap to whitespace inside the kept region
+    space = text.rfind(" ", 0, head_end)
+    if space > head_end // 2:
+        head_end = space
+    space = text.find(" ", tail_start)
+    if 0 <= space < tail_start + (len(text) - tail_start) // 2:
+        tail_start = space + 1
+
+    return text[:head_end].rstrip() + marker + text[tail_start:].lstrip()
+
+
+def summarize_answer(answer: str, max_tokens: int = SUMMARY_ANSWER_TOKENS) -> str:
+    """Deterministic short form of an answer: its first sentence, clipped, and how much was left out."""
+    answer = (answer or "").strip()
+    if count_tokens(answer) <= max_tokens:
+        return answer
+    first_line = answer.splitlines()[0]
+    end = first_line.find(". ")
+    first_sentence = first_line[:end + 1] if end >= 0 else first_line
+    clipped = first_sentence[:max_tokens * CHARS_PER_TOKEN].rstrip()
+    return f"{clipped} [... {count_tokens(answer) - count_tokens(clipped)} more tokens]"
+
+
+def enforce_budget(prompt: str, kind: str, budget: Optional[int] = None) -> str:
+    """Truncate a complete prompt that is still over its budget."""
+    budget = budget or PROMPT_BUDGETS[kind]
+    if count_tokens(prompt) <= budget:
+        return prompt
+    logger.warning(f"{kind} prompt has {count_tokens(prompt)} tokens, truncating to {budget}")
+    PROMPT_TRUNCATIONS.inc(prompt=kind)
+    return truncate_text(prompt, budget)
+
+
+def clip_answer(answer: Optional[str], kind: str = "answer") -> str:
+    """Clip a single candidate answer quoted in a prompt to PROMPT_TOKEN_BUDGET_ANSWER."""
+    if count_tokens(answer) > PROMPT_TOKEN_BUDGET_ANSWER:
+        PROMPT_TRUNCATIONS.inc(prompt=kind)
+    return truncate_text(answer, PROMPT_TOKEN_BUDGET_ANSWER)
+
+
+def fit_transcript(pairs: Iterable[Tuple[str, Optional[str]]], budget: int) -> Tuple[str, bool]:
+    """
+    Format question/answer pairs as "Q1: ... / A1: ..." within a token budget.
+
+    Answers are first clipped to PROMPT_TOKEN_BUDGET_ANSWER. If the transcript is still
+    too long, answers are replaced by a one-sentence summary oldest first, so the most
+    recent answers stay intact for as long as possible. A transcript that still does
+    not fit is truncated as a whole.
+
+    Returns:
+        Tuple[str, bool]: The transcript and whether anything was shortened
+    """
+    pairs = [(question or "", answer or "No answer provided") for question, answer in pairs]
+    answers = [truncate_text(answer, PROMPT_TOKEN_BUDGET_ANSWER) for _, answer in pairs]
+    shortened = any(clipped != answer for clipped, (_, answer) in zip(answers, pairs))
+
+    def render():
+        return "\n".join(f"Q{i + 1}: {question}\nA{i + 1}: {answers[i]}\n" for i, (question, _) in enumerate(pairs))
+
+    transcript = render()
+    for i in range(len(pairs)):
+        if count_tokens(transcript) <= budget:
+            break
+        summary = summarize_answer(answers[i])
+        if summary != answers[i]:
+            answers[i] = summary
+            shortened = True
+            transcript = render()
+
+    if count_tokens(transcript) > budget:
+        transcript = truncate_text(transcript, budget)
+        shortened = True
+
+    return transcript, shortened
+
+
+@contextmanager
+def llm_usage_scope(job_profile_id: Optional[int] = None, endpoint: Optional[str] = None):
+    """Attribute the token usage of LLM calls made inside the block to a job profile and endpoint."""
+    token = _usage_labels.set({
+        "job_profile": str(job_profile_id) if job_profile_id else "none",
+        "endpoint": endpoint,
+    })
+    try:
+        yield
+    finally:
+        _usage_labels.reset(token)
+
+
+def usage_from_response(result: Dict[str, Any], elapsed: float) -> Dict[str, Any]:
+    """Token counts and generation speed from the final object of an Ollama response."""
+    completion_tokens = result.get("eval_count") or 0
+    eval_seconds = (result.get("eval_duration") or 0) / 1e9 or elapsed
+    return {
+        "prompt_tokens": result.get("prompt_eval_count") or 0,
+        "completion_tokens": completion_tokens,
+        "tokens_per_second": round(completion_tokens / eval_seconds, 2) if eval_seconds > 0 else 0.0,
+    }
+
+
+def record_llm_usage(usage: Dict[str, Any]):
+    """Record one LLM call's token usage under the current usage scope."""
+    labels = dict(_usage_labels.get() or {"job_profile": "none", "endpoint": None})
+    if not labels["endpoint"]:
+        labels["endpoint"] = (request.endpoint or "unmatched") if has_request_context() else "background"
+
+    PROMPT_TOKENS.inc(usage["prompt_tokens"], **labels)
+    COMPLETION_TOKENS.inc(usage["completion_tokens"], **labels)
+    if usage["tokens_per_second"]:
+        TOKENS_PER_SECOND.observe(usage["tokens_per_second"], endpoint=labels["endpoint"])
+
+    key = (labels["job_profile"], labels["endpoint"])
+    with _usage_lock:
+        totals = _usage_totals.setdefault(key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "tokens_per_second_total": 0.0})
+        totals["calls"] += 1
+        totals["prompt_tokens"] += usage["prompt_tokens"]
+        totals["completion_tokens"] += usage["completion_tokens"]
+        totals["tokens_per_second_total"] += usage["tokens_per_second"]
+
+
+def token_usage_stats():
+    """Token usage in this process grouped by job profile and endpoint."""
+    with _usage_lock:
+        items = [(key, dict(totals)) for key, totals in _usage_totals.items()]
+    return [
+        {
+            "job_profile": job_profile,
+            "endpoint": endpoint,
+            "calls": totals["calls"],
+            "prompt_tokens": totals["prompt_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+            "tokens_per_second_avg": round(totals["tokens_per_second_total"] / totals["calls"], 2),
+        }
+        for (job_profile, endpoint), totals in sorted(items)
+    ]
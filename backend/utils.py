@@ -5,13 +5,38 @@ from datetime import datetime
 from langchain.llms import LlamaCpp
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
-from backend.config import LLAMA_MODEL, INTERVIEW_QUESTION_TEMPLATE, ANSWER_EVALUATION_TEMPLATE, FINAL_EVALUATION_TEMPLATE
+from backend.config import (
+    LLAMA_MODEL, INTERVIEW_QUESTION_TEMPLATE, ANSWER_EVALUATION_TEMPLATE, FINAL_EVALUATION_TEMPLATE, STRUCTURED_OUTPUT_MAX_REPAIRS
+)
+from backend.model_pool import get_model_pool
+from backend.metrics import timed
+from backend.prescoring import prescore_answer, record_scoring_stage, rubric_overlap
+from backend.structured_output import ANSWER_EVALUATION_SCHEMA, generate_structured, parse_structured, repair_prompt
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def rubric_prompt(overlap):
+    """Evaluator prompt lines listing the skills a question covers and those the answer mentions."""
+    if not overlap:
+        return ""
+    mentioned = ", ".join(overlap["mentioned"]) or "none"
+    return (f"\nRequired skills this question covers: {', '.join(overlap['expected'])}\n"
+            f"Of these, the answer names: {mentioned} (a correct answer does not have to name them)\n")
+
+def evaluation_prompt(question, answer, role, experience, technical_skills=None):
+    """The answer evaluation prompt, and the rubric overlap it was given (None without skills)."""
+    overlap = rubric_overlap(question, answer, technical_skills)
+    return ANSWER_EVALUATION_TEMPLATE.format(
+        question=question,
+        answer=answer,
+        role=role,
+        experience=experience,
+        rubric=rubric_prompt(overlap)
+    ), overlap
+
 def get_llama_model():
-    """Initialize and return the Llama model."""
+    """Initialize and return a new Llama model. Callers should borrow one from the model pool instead."""
     try:
         # Set up the model
         callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
@@ -31,20 +56,18 @@ def get_llama_model():
         logger.error(f"Error initializing Llama model: {str(e)}")
         return None
 
+@timed("llama.generate_questions")
 def generate_interview_questions(role, experience, num_questions=5):
     """Generate interview questions based on role and experience."""
     try:
-        llm = get_llama_model()
-        if not llm:
-            return {"error": "Failed to initialize AI model"}
-        
         prompt = INTERVIEW_QUESTION_TEMPLATE.format(
             num_questions=num_questions,
             role=role,
             experience=experience
         )
         
-        response = llm(prompt)
+        with get_model_pool().checkout() as llm:
+            response = llm(prompt)
         
         # Parse the response to get the questions
         try:
@@ -72,47 +95,65 @@ def generate_interview_questions(role, experience, num_questions=5):
         logger.error(f"Error generating interview questions: {str(e)}")
         return {"error": f"Failed to generate questions: {str(e)}"}
 
-def evaluate_answer(question, answer, role, experience):
-    """Evaluate the candidate's answer to a question."""
+@timed("llama.evaluate_answer")
+def evaluate_answer(question, answer, role, experience, question_type=None, answer_key=None, technical_skills=None):
+    """
+    Evaluate the candidate's answer to a question.
+
+    Answers the pre-scorer can score by rule (see backend/prescoring.py) never reach the model.
+    With the job profile's technical_skills, the model is told which of them the answer
+    mentions, and the evaluation carries that as "rubric_overlap".
+    """
+    prescored = prescore_answer(question, answer, question_type, answer_key)
+    if prescored is not None:
+        return prescored
+
     try:
-        llm = get_llama_model()
-        if not llm:
-            return {"error": "Failed to initialize AI model"}
+        prompt, overlap = evaluation_prompt(question, answer, role, experience, technical_skills)
         
-        prompt = ANSWER_EVALUATION_TEMPLATE.format(
-            question=question,
-            answer=answer,
-            role=role,
-            experience=experience
-        )
-        
-        response = llm(prompt)
-        
-        # Parse the response
-        try:
-            evaluation = json.loads(response)
-            return evaluation
-        except json.JSONDecodeError:
-            # Fallback parsing if the model doesn't return valid JSON
-            return {
-                "score": 5,  # Default middle score
-                "strengths": "Response parsing error - please try again",
-                "areas_for_improvement": "Response parsing error - please try again",
-                "additional_insights": "",
-                "overall_feedback": "The system was unable to properly evaluate your answer. Please try again."
-            }
+        with get_model_pool().checkout() as llm:
+            response = llm(prompt)
+            evaluation, errors = parse_structured(response, ANSWER_EVALUATION_SCHEMA)
+            # One short repair call rather than a fresh evaluation
+            if errors and STRUCTURED_OUTPUT_MAX_REPAIRS:
+                evaluation, errors = parse_structured(
+                    llm(repair_prompt(response, errors, ANSWER_EVALUATION_SCHEMA)), ANSWER_EVALUATION_SCHEMA
+                )
+
+        if errors:
+            return {"error": f"Failed to evaluate answer: invalid evaluation ({'; '.join(errors[:3])})"}
+        record_scoring_stage("model")
+        if overlap:
+            evaluation["rubric_overlap"] = overlap
+        return evaluation
     
     except Exception as e:
         logger.error(f"Error evaluating answer: {str(e)}")
         return {"error": f"Failed to evaluate answer: {str(e)}"}
 
+def evaluate_answer_with_ollama(question, answer, role, experience, question_type=None, answer_key=None,
+                                technical_skills=None):
+    """Evaluate the candidate's answer to a question on Ollama's scoring model tiers, after the pre-scorer."""
+    prescored = prescore_answer(question, answer, question_type, answer_key)
+    if prescored is not None:
+        return prescored
+
+    prompt, overlap = evaluation_prompt(question, answer, role, experience, technical_skills)
+    # Same stage as the llama.cpp path; rule-scored answers above are left out of its latency
+    with timed("llama.evaluate_answer"):
+        result = generate_structured(prompt, ANSWER_EVALUATION_SCHEMA, "answer_evaluation", task="scoring")
+    if not result["success"]:
+        return {"error": f"Failed to evaluate answer: {result.get('error', 'Unknown error')}"}
+    record_scoring_stage("model")
+    evaluation = result["data"]
+    if overlap:
+        evaluation["rubric_overlap"] = overlap
+    return evaluation
+
+@timed("llama.final_report")
 def generate_final_report(name, age, role, experience, responses):
     """Generate a final evaluation report based on all responses."""
     try:
-        llm = get_llama_model()
-        if not llm:
-            return {"error": "Failed to initialize AI model"}
-        
         # Format responses for the prompt
         formatted_responses = ""
         for i, resp in enumerate(responses):
@@ -128,7 +169,8 @@ def generate_final_report(name, age, role, experience, responses):
             responses=formatted_responses
         )
         
-        response = llm(prompt)
+        with get_model_pool().checkout() as llm:
+            response = llm(prompt)
         return response
     
     except Exception as e:
@@ -0,0 +1,48 @@
+import hmac
+import json
+import hashlib
+import logging
+from typing import Optional, Dict, Any
+
+import requests
+
+from backend.config import REPORT_WEBHOOK_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-RecruitBot-Signature"
+EVENT_HEADER = "X-RecruitBot-Event"
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """HMAC-SHA256 signature of a webhook body, as sent in the signature header."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def send_webhook(url: str, event: str, payload: Dict[str, Any], secret: Optional[str] = None,
+                 timeout: float = REPORT_WEBHOOK_TIMEOUT) -> int:
+    """
+    POST a JSON event to a webhook.
+
+    Args:
+        url (str): Receiver URL
+        event (str): Event name, sent in the event header and the body
+        payload (Dict[str, Any]): Event data
+        secret (Optional[str]): Shared secret used to sign the body
+
+    Returns:
+        int: The receiver's HTTP status code
+
+    Raises:
+        requests.exceptions.RequestException: If the receiver could not be reached or
+        did not answer with a 2xx status, so callers running in a job get retried
+    """
+    body = json.dumps({"event": event, "data": payload}, sort_keys=True).encode()
+    headers = {"Content-Type": "application/json", EVENT_HEADER: event}
+    if secret:
+        headers[SIGNATURE_HEADER] = sign_payload(body, secret)
+
+    response = requests.post(url, data=body, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    logger.info(f"Delivered {event} webhook to {url} ({response.status_code})")
+    return response.status_code
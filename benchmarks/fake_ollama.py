@@ -0,0 +1,200 @@
+"""
+Stand-in Ollama HTTP server for benchmarks.
+
+Serves /api/generate, /api/chat and /api/tags with the same response shapes as
+Ollama (streaming NDJSON or a single JSON object) so the application can be load
+tested without a model. Latency, prompt processing and generation speed and error
+rate are configurable. Like Ollama, a request that passes the "context" returned by an
+earlier one only has its new prompt tokens processed.
+
+Usage:
+    python -m benchmarks.fake_ollama --port 11434 --latency 0.2 --prompt-tokens-per-second 500 --tokens-per-second 40 --error-rate 0.01
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+QUESTIONS = [
+    "What is the time complexity of binary search, and why?",
+    "Explain the difference between a process and a thread.",
+    "How does TCP guarantee reliable delivery?",
+    "What is polymorphism? Give a real-world example.",
+    "Describe how you would detect a cycle in a linked list.",
+    "What causes a deadlock, and how can it be prevented?",
+    "Which data structure would you use for an LRU cache, and why?",
+    "Explain the difference between UDP and TCP.",
+]
+
+EVALUATION = {
+    "score": 7,
+    "strengths": "Clear reasoning about the core idea.",
+    "areas_for_improvement": "Mention edge cases and complexity.",
+    "additional_insights": "",
+    "overall_feedback": "A solid answer with room for more depth."
+}
+
+
+def example_for(schema):
+    """A small value matching a JSON schema, for requests that pass one as "format"."""
+    kind = schema.get("type")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if kind == "object":
+        return {key: example_for(value) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [example_for(schema.get("items", {}))]
+    if kind in ("number", "integer"):
+        return 7
+    if kind == "boolean":
+        return True
+    return "Clear reasoning about the core idea."
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "llama3.2:latest"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        server = self.server
+        server.record_request()
+
+        if self.path not in ("/api/generate", "/api/chat"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        # Only the prompt is processed; tokens carried in "context" are already evaluated
+        prompt_tokens = len(body.get("prompt") or json.dumps(body.get("messages", []))) // 4
+        prompt_seconds = prompt_tokens / server.prompt_tokens_per_second if server.prompt_tokens_per_second > 0 else 0.0
+        time.sleep(server.latency + prompt_seconds)
+        if server.rng.random() < server.error_rate:
+            self._send_json(503, {"error": "server overloaded"})
+            return
+
+        if isinstance(body.get("format"), dict):
+            text = json.dumps(example_for(body["format"]))
+        elif body.get("format"):
+            text = json.dumps(EVALUATION)
+        else:
+            text = server.rng.choice(QUESTIONS)
+        tokens = [word + " " for word in text.split(" ")]
+        tokens[-1] = tokens[-1].rstrip()
+        delay = 1.0 / server.tokens_per_second if server.tokens_per_second > 0 else 0.0
+
+        final = {
+            "model": body.get("model", ""),
+            "done": True,
+            "context": list(body.get("context") or []) + [server.rng.randrange(32000) for _ in range(prompt_tokens + len(tokens))],
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(tokens),
+        }
+
+        if not body.get("stream", True):
+            time.sleep(delay * len(tokens))
+            final["response"] = text
+            final["message"] = {"role": "assistant", "content": text}
+            self._send_json(200, final)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(delay)
+            self._write_chunk({"response": token, "message": {"role": "assistant", "content": token}, "done": False})
+        final["response"] = ""
+        self._write_chunk(final)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, body):
+        data = (json.dumps(body) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """
+    Threaded fake Ollama server.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind, 0 for any free port
+        latency (float): Seconds before the first token of every response
+        prompt_tokens_per_second (float): Prompt processing speed, 0 for instant
+        tokens_per_second (float): Generation speed, 0 for instant responses
+        error_rate (float): Fraction of generate/chat requests answered with HTTP 503
+        seed (int): Seed for the question choice and injected errors
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, tokens_per_second=40.0, error_rate=0.0, seed=None,
+                 prompt_tokens_per_second=0.0):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.latency = latency
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        """Serve in a background thread and return the server."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=0.0, help="prompt processing speed, 0 for instant")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="0 for instant responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.host, args.port, args.latency, args.tokens_per_second, args.error_rate, args.seed,
+                              args.prompt_tokens_per_second)
+    print(f"Fake Ollama listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
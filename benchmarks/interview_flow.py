@@ -0,0 +1,369 @@
+"""
+Load test the candidate interview flow against a fake Ollama server.
+
+Each simulated candidate registers, logs in, completes their profile, starts an
+interview, answers the chat turns and completes the interview, all through the
+Flask app in app.py. Candidates are spread over worker processes (one app instance
+each) and run concurrently on threads inside each worker.
+
+Reports p50/p95/p99 latency and database queries per endpoint, overall requests/s
+and peak memory per worker. Results can be saved as a named baseline and later
+runs compared against it.
+
+With --backends N the app is pointed at N fake servers through OLLAMA_BACKENDS to
+exercise the router; --failing-backends K makes K of them answer every request with
+HTTP 503 so their circuit breakers open. Requests per backend are reported.
+
+Usage:
+    python -m benchmarks.interview_flow --candidates 40 --workers 2 --concurrency 8
+    python -m benchmarks.interview_flow --save-baseline main
+    python -m benchmarks.interview_flow --compare main
+    python -m benchmarks.interview_flow --backends 3 --failing-backends 1
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import resource
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_ollama import FakeOllamaServer
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+ENDPOINTS = ('register', 'login', 'profile', 'setup', 'chat', 'complete')
+
+ANSWERS = [
+    "Binary search halves the range each step, so it is O(log n).",
+    "A process has its own address space, threads share one inside a process.",
+    "I would use a hash map together with a doubly linked list.",
+    "TCP uses sequence numbers, acknowledgements and retransmission.",
+]
+
+
+def configure_environment(config):
+    """Point the app at the benchmark database and fake Ollama server; must run before importing app."""
+    os.environ['DATABASE_URL'] = config['database_url']
+    os.environ['OLLAMA_BACKENDS'] = config['ollama_backends']
+    os.environ['JOB_WORKERS'] = str(config['job_workers'])
+    os.environ.setdefault('RESPONSE_CACHE_PATH', '')
+
+
+def prepare_database(config):
+    """Create the tables and a job profile for candidates to interview for; returns its id."""
+    configure_environment(config)
+    from app import app
+    from models import db, JobProfile
+
+    with app.app_context():
+        job_profile = JobProfile.query.filter_by(title='Benchmark Engineer').first()
+        if not job_profile:
+            job_profile = JobProfile(
+                title='Benchmark Engineer',
+                description='Backend engineer working on web services.',
+                evaluation_criteria={
+                    'technical_skills': ['python', 'sql', 'algorithms'],
+                    'soft_skills': ['communication'],
+                    'experience_requirements': '2+ years',
+                    'evaluation_focus': 'problem solving',
+                    'custom_prompt': ''
+                }
+            )
+            db.session.add(job_profile)
+            db.session.commit()
+        job_profile_id = job_profile.id
+        db.engine.dispose()
+    return job_profile_id
+
+
+class QueryCounter:
+    """Counts SQL statements executed on the current thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = self.count + 1
+
+
+def run_candidate(app, counter, config, name):
+    """Drive one candidate through the whole flow; returns a record per request."""
+    records = []
+    client = app.test_client()
+
+    def timed(endpoint, call, ok=lambda response: response.status_code < 400):
+        counter.reset()
+        started = time.perf_counter()
+        try:
+            response = call()
+            # Read the whole body so streamed responses are timed to their last byte
+            response.get_data()
+            success = ok(response)
+        except Exception:
+            response, success = None, False
+        records.append({
+            'endpoint': endpoint,
+            'seconds': time.perf_counter() - started,
+            'queries': counter.count,
+            'ok': success
+        })
+        return response
+
+    email = f"{name}@bench.example.com"
+    timed('register', lambda: client.post('/register', data={'email': email, 'password': 'bench', 'role': 'candidate'}))
+    timed('login', lambda: client.post('/login', data={'email': email, 'password': 'bench'}))
+    timed('profile', lambda: client.post('/profile', data={'name': name, 'age': '28', 'experience': '3'}))
+
+    response = timed(
+        'setup',
+        lambda: client.post('/interview/setup', data={'job_profile_id': config['job_profile_id']}),
+        ok=lambda response: '/interview/' in response.headers.get('Location', '')
+    )
+    if response is None or '/interview/' not in response.headers.get('Location', ''):
+        return records
+    interview_id = int(response.headers['Location'].rstrip('/').split('/')[-1])
+
+    for turn in range(config['turns']):
+        message = 'start_interview' if turn == 0 else ANSWERS[turn % len(ANSWERS)]
+        timed('chat', lambda: client.post(
+            f'/api/interviews/{interview_id}/chat',
+            json={'message': message, 'stream': config['stream']}
+        ))
+
+    timed('complete', lambda: client.post(f'/api/interviews/{interview_id}/complete'))
+    return records
+
+
+def run_worker(index, candidates, config):
+    """Worker process: load the app and run its share of candidates concurrently."""
+    configure_environment(config)
+
+    import logging
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from app import app
+    from jobs import job_queue
+
+    logging.disable(logging.CRITICAL)
+    job_queue.start()
+    counter = QueryCounter()
+    event.listen(Engine, 'before_cursor_execute', counter.before_cursor_execute)
+
+    names = [f"bench-{config['run_id']}-{index}-{i}" for i in range(candidates)]
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=config['concurrency']) as executor:
+        results = list(executor.map(lambda name: run_candidate(app, counter, config, name), names))
+    finished = time.time()
+
+    return {
+        'worker': index,
+        'records': [record for records in results for record in records],
+        'started': started,
+        'finished': finished,
+        # ru_maxrss is in kilobytes on Linux
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(worker_results, config):
+    records = [record for result in worker_results for record in result['records']]
+    elapsed = max(r['finished'] for r in worker_results) - min(r['started'] for r in worker_results)
+
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        selected = [record for record in records if record['endpoint'] == endpoint]
+        if not selected:
+            continue
+        latencies = [record['seconds'] * 1000 for record in selected]
+        queries = [record['queries'] for record in selected]
+        endpoints[endpoint] = {
+            'requests': len(selected),
+            'errors': sum(1 for record in selected if not record['ok']),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries)
+        }
+
+    return {
+        'config': {key: config[key] for key in (
+            'candidates', 'workers', 'concurrency', 'turns', 'stream', 'latency', 'prompt_tokens_per_second',
+            'tokens_per_second', 'error_rate', 'backends', 'failing_backends'
+        )},
+        'elapsed_seconds': round(elapsed, 3),
+        'requests': len(records),
+        'errors': sum(1 for record in records if not record['ok']),
+        'requests_per_second': round(len(records) / elapsed, 2) if elapsed else 0.0,
+        'endpoints': endpoints,
+        'workers': [{'worker': r['worker'], 'max_rss_mb': r['max_rss_mb']} for r in worker_results]
+    }
+
+
+def print_report(summary):
+    print(f"{summary['requests']} requests in {summary['elapsed_seconds']}s "
+          f"({summary['requests_per_second']} req/s, {summary['errors']} errors)")
+    print(f"{'endpoint':10} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    for endpoint, stats in summary['endpoints'].items():
+        print(f"{endpoint:10} {stats['requests']:>6} {stats['errors']:>6} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['queries_mean']:>8}")
+    for worker in summary['workers']:
+        print(f"worker {worker['worker']}: {worker['max_rss_mb']} MB peak RSS")
+    if len(summary.get('backends', [])) > 1:
+        for backend in summary['backends']:
+            print(f"backend {backend['url']}{' (failing)' if backend['failing'] else ''}: {backend['requests']} requests")
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare_to_baseline(summary, baseline, tolerance):
+    """Print the change against a baseline; returns a list of regressions beyond the tolerance."""
+    regressions = []
+
+    def check(label, current, previous, higher_is_worse=True):
+        if not previous:
+            return
+        change = (current - previous) / previous
+        worse = change > tolerance if higher_is_worse else change < -tolerance
+        print(f"{label:28} {previous:>10} -> {current:>10} ({change:+.1%}){'  REGRESSION' if worse else ''}")
+        if worse:
+            regressions.append(label)
+
+    check('requests/s', summary['requests_per_second'], baseline['requests_per_second'], higher_is_worse=False)
+    for endpoint, stats in summary['endpoints'].items():
+        previous = baseline['endpoints'].get(endpoint)
+        if not previous:
+            continue
+        check(f"{endpoint} p95 ms", stats['p95_ms'], previous['p95_ms'])
+        check(f"{endpoint} queries", stats['queries_mean'], previous['queries_mean'])
+    for worker, previous in zip(summary['workers'], baseline['workers']):
+        check(f"worker {worker['worker']} peak RSS MB", worker['max_rss_mb'], previous['max_rss_mb'])
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--candidates', type=int, default=20, help='simulated candidates in total')
+    parser.add_argument('--workers', type=int, default=2, help='worker processes, each with its own app instance')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent candidates per worker')
+    parser.add_argument('--turns', type=int, default=10, help='chat turns per interview')
+    parser.add_argument('--stream', action='store_true', help='request streamed chat responses')
+    parser.add_argument('--latency', type=float, default=0.2, help='fake Ollama seconds before the first token')
+    parser.add_argument('--prompt-tokens-per-second', type=float, default=0.0, help='fake Ollama prompt processing speed, 0 for instant')
+    parser.add_argument('--tokens-per-second', type=float, default=40.0, help='fake Ollama generation speed')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of fake Ollama requests that fail')
+    parser.add_argument('--backends', type=int, default=1, help='fake Ollama servers behind the router')
+    parser.add_argument('--failing-backends', type=int, default=0, help='fake servers that fail every request')
+    parser.add_argument('--database-url', help='defaults to a fresh SQLite file in the temp directory')
+    parser.add_argument('--job-workers', type=int, default=0, help='background job threads per worker')
+    parser.add_argument('--output', help='write the JSON summary to this file')
+    parser.add_argument('--save-baseline', metavar='NAME', help='save the summary as benchmarks/baselines/NAME.json')
+    parser.add_argument('--compare', metavar='NAME', help='compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression when comparing')
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url
+    if not database_url:
+        path = os.path.join(tempfile.gettempdir(), 'recruitbot-benchmark.sqlite3')
+        if os.path.exists(path):
+            os.remove(path)
+        database_url = f"sqlite:///{path}"
+
+    servers = [
+        FakeOllamaServer(
+            latency=args.latency, tokens_per_second=args.tokens_per_second, seed=i,
+            error_rate=1.0 if i < args.failing_backends else args.error_rate,
+            prompt_tokens_per_second=args.prompt_tokens_per_second
+        ).start()
+        for i in range(args.backends)
+    ]
+
+    config = {
+        'run_id': uuid.uuid4().hex[:8],
+        'database_url': database_url,
+        'ollama_backends': ','.join(server.base_url for server in servers),
+        'job_workers': args.job_workers,
+        'candidates': args.candidates,
+        'workers': args.workers,
+        'concurrency': args.concurrency,
+        'turns': args.turns,
+        'stream': args.stream,
+        'latency': args.latency,
+        'prompt_tokens_per_second': args.prompt_tokens_per_second,
+        'tokens_per_second': args.tokens_per_second,
+        'error_rate': args.error_rate,
+        'backends': args.backends,
+        'failing_backends': args.failing_backends
+    }
+
+    try:
+        # Prepare the schema in a separate process so workers don't race on create_all
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(1) as pool:
+            config['job_profile_id'] = pool.apply(prepare_database, (config,))
+
+        shares = [args.candidates // args.workers + (1 if i < args.candidates % args.workers else 0)
+                  for i in range(args.workers)]
+        with context.Pool(args.workers) as pool:
+            worker_results = pool.starmap(run_worker, [(i, share, config) for i, share in enumerate(shares) if share])
+    finally:
+        for server in servers:
+            server.stop()
+
+    summary = summarize(worker_results, config)
+    summary['ollama_requests'] = sum(server.requests for server in servers)
+    summary['backends'] = [
+        {'url': server.base_url, 'failing': i < args.failing_backends, 'requests': server.requests}
+        for i, server in enumerate(servers)
+    ]
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save_baseline), 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Saved baseline {baseline_path(args.save_baseline)}")
+
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to baseline '{args.compare}':")
+        regressions = compare_to_baseline(summary, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import re
+import math
+import logging
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, or_, update
+
+from models import db, Interview, Question
+from backend.config import SCORE_TYPE_WEIGHTS, SCORE_CATEGORY_WEIGHTS
+from backend.score_aggregation import parse_weights, percent, result_for_score, weight_expression, weighted_sums
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+TYPE_WEIGHTS = parse_weights(SCORE_TYPE_WEIGHTS)
+CATEGORY_WEIGHTS = parse_weights(SCORE_CATEGORY_WEIGHTS)
+
+# The score and result lines of an interview's assessment summary (Interview.feedback)
+SUMMARY_SCORE_LINE = re.compile(r'^- \*\*Score\*\*: .*$', re.M)
+SUMMARY_RESULT_LINE = re.compile(r'^- \*\*Result\*\*: .*$', re.M)
+
+
+def question_weight():
+    """SQL expression for the weight of a question in its interview's score."""
+    return weight_expression(Question.type, TYPE_WEIGHTS) * weight_expression(Question.category, CATEGORY_WEIGHTS)
+
+
+def ranked_interviews(job_profile_id):
+    """Filter for the interviews a job profile's candidates are ranked against."""
+    return and_(Interview.job_profile_id == job_profile_id, Interview.status == 'completed', Interview.score.isnot(None))
+
+
+def interview_scores(interview_filter):
+    """
+    Weighted scores of the interviews matching a filter, from one grouped query.
+
+    Unanswered questions count as 0 points. Answered questions whose evaluation has not
+    finished yet are left out; the score is recomputed once they are scored.
+
+    Returns:
+        dict: interview id to (score in percent, score in percent per question type)
+    """
+    points, maximum = weighted_sums(Question.score, question_weight())
+    rows = db.session.query(Question.interview_id, Question.type, points, maximum).join(
+        Interview, Question.interview_id == Interview.id
+    ).filter(
+        interview_filter, or_(Question.score.isnot(None), Question.answer.is_(None))
+    ).group_by(Question.interview_id, Question.type)
+
+    totals, breakdowns = {}, {}
+    for interview_id, question_type, type_points, type_maximum in rows:
+        total = totals.setdefault(interview_id, [0.0, 0.0])
+        total[0] += type_points or 0
+        total[1] += type_maximum or 0
+        breakdowns.setdefault(interview_id, {})[question_type or 'other'] = percent(type_points, type_maximum)
+    return {interview_id: (percent(*total), breakdowns[interview_id]) for interview_id, total in totals.items()}
+
+
+def standard_score(score, mean, mean_square):
+    """How many standard deviations a score lies from the mean; 0 when all scores are equal."""
+    deviation = math.sqrt(max(mean_square - mean * mean, 0.0))
+    return round((score - mean) / deviation, 3) if deviation > 1e-9 else 0.0
+
+
+def standing(interview, score):
+    """
+    (normalized score, percentile) of a new score among the other ranked candidates for
+    the interview's job profile, or (None, None) if it is the first.
+    """
+    others, below, total, total_square = db.session.query(
+        func.count(Interview.id),
+        func.count(case((Interview.score < score, Interview.id))),
+        func.sum(Interview.score),
+        func.sum(Interview.score * Interview.score)
+    ).filter(ranked_interviews(interview.job_profile_id), Interview.id != interview.id).one()
+    if not others:
+        return None, None
+
+    count = others + 1
+    mean = (total + score) / count
+    normalized = standard_score(score, mean, (total_square + score * score) / count)
+    return normalized, round(100.0 * below / others, 1)
+
+
+def summary_score_lines(score):
+    """The score and result lines of an assessment summary."""
+    return f"- **Score**: {score}%\n- **Result**: {result_for_score(score).upper()}"
+
+
+def rescore_summary(summary, score):
+    """An assessment summary with its score and result lines brought in line with a new score."""
+    if not summary:
+        return summary
+    summary = SUMMARY_SCORE_LINE.sub(lambda _: f"- **Score**: {score}%", summary, count=1)
+    return SUMMARY_RESULT_LINE.sub(lambda _: f"- **Result**: {result_for_score(score).upper()}", summary, count=1)
+
+
+def score_interview(interview):
+    """
+    Compute and cache the interview's weighted score, breakdown and standing, and update
+    the score and result in its summary.
+
+    Does not commit. Other candidates' standings are refreshed by request_ranking.
+
+    Returns:
+        float: The score in percent
+    """
+    score, breakdown = interview_scores(Interview.id == interview.id).get(interview.id, (0.0, {}))
+    interview.score = score
+    interview.score_breakdown = breakdown
+    interview.normalized_score, interview.score_percentile = standing(interview, score)
+    interview.scored_at = datetime.utcnow()
+    interview.feedback = rescore_summary(interview.feedback, score)
+    return score
+
+
+def rank_job_profile(job_profile_id, recompute=False):
+    """
+    Refresh the normalized score and percentile rank of every ranked candidate for a job profile.
+
+    Percentiles come from a percent_rank() window over the profile's scores and everything
+    is written back with one bulk UPDATE. With recompute, the weighted scores of the
+    profile's completed interviews are first recomputed from their question scores.
+
+    Returns:
+        int: candidates ranked
+    """
+    now = datetime.utcnow()
+    if recompute:
+        scores = interview_scores(and_(Interview.job_profile_id == job_profile_id, Interview.status == 'completed'))
+        if scores:
+            summaries = dict(db.session.query(Interview.id, Interview.feedback).filter(Interview.id.in_(scores)))
+            db.session.execute(update(Interview), [
+                {'id': interview_id, 'score': score, 'score_breakdown': breakdown, 'scored_at': now,
+                 'feedback': rescore_summary(summaries.get(interview_id), score)}
+                for interview_id, (score, breakdown) in scores.items()
+            ])
+
+    rows = db.session.query(
+        Interview.id, Interview.score, func.percent_rank().over(order_by=Interview.score)
+    ).filter(ranked_interviews(job_profile_id)).all()
+    if rows:
+        mean = sum(score for _, score, _ in rows) / len(rows)
+        mean_square = sum(score * score for _, score, _ in rows) / len(rows)
+        db.session.execute(update(Interview), [
+            {
+                'id': interview_id,
+                'normalized_score': standard_score(score, mean, mean_square),
+                'score_percentile': round(100.0 * float(rank), 1) if len(rows) > 1 else None
+            }
+            for interview_id, score, rank in rows
+        ])
+    db.session.commit()
+    return len(rows)
+
+
+def request_ranking(job_profile_id):
+    """Queue a ranking refresh for the job profile unless one is already waiting."""
+    return job_queue.enqueue_unique('rank_candidates', {'job_profile_id': job_profile_id})
+
+
+@job_queue.handler('rank_candidates')
+def run_ranking(payload):
+    """Background job: refresh the standings of a job profile's candidates."""
+    return {'ranked': rank_job_profile(payload['job_profile_id'])}
@@ -0,0 +1,127 @@
+"""
+Check that the application's hot queries can use an index.
+
+Runs EXPLAIN for each query against the configured DATABASE_URL and reports the plan.
+On PostgreSQL sequential scans are disabled for the check, so a query only passes if
+an index *can* serve it even when the table is still too small for the planner to
+prefer one. On SQLite any SCAN step fails the check, unless it walks an index for a query
+with a LIMIT, as does a sort through a temporary B-tree. Exits with status 1 if any query
+has to scan a whole table.
+
+Usage:
+    python check_query_plans.py [--verbose]
+"""
+import re
+import sys
+import json
+import argparse
+from datetime import datetime
+
+from sqlalchemy.orm import load_only
+
+from app import app
+from models import db, Interview, Question, BackgroundJob, BankedQuestion
+
+
+def hot_queries():
+    """The queries each index in migrations/0001_query_indexes.sql and 0006_candidate_scores.sql is meant to serve."""
+    now = datetime.utcnow()
+    return {
+        'next unanswered question': Question.query.filter_by(interview_id=1, answer=None).order_by(Question.order.desc()).limit(1),
+        'interview questions in order': Question.query.filter_by(interview_id=1).order_by(Question.order),
+        'dashboard page': Interview.query.options(load_only(Interview.id, Interview.created_at))
+            .order_by(Interview.created_at.desc(), Interview.id.desc()).limit(50),
+        'dashboard by status': Interview.query.filter_by(status='completed')
+            .order_by(Interview.created_at.desc()).limit(50),
+        'dashboard by job profile': Interview.query.filter_by(job_profile_id=1)
+            .order_by(Interview.created_at.desc()).limit(50),
+        'candidate interviews': Interview.query.filter_by(user_id=1),
+        'candidates by score': Interview.query.filter(Interview.score.isnot(None))
+            .order_by(Interview.score.desc(), Interview.id.desc()).limit(50),
+        'job profile candidates by score': Interview.query.filter(Interview.job_profile_id == 1, Interview.score.isnot(None))
+            .order_by(Interview.score.desc(), Interview.id.desc()).limit(50),
+        'job claim': db.session.query(BackgroundJob.id).filter(
+            BackgroundJob.status == 'queued', BackgroundJob.run_after <= now
+        ).order_by(BackgroundJob.run_after, BackgroundJob.id).limit(1),
+        'question bank draw': BankedQuestion.query.filter_by(job_profile_id=1, experience_bucket='mid', type='concept'),
+    }
+
+
+def _driver_sql(conn, query):
+    compiled = query.statement.compile(dialect=conn.dialect)
+    if compiled.positiontup is not None:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    return str(compiled), params
+
+
+def _postgres_scans(plan, scans):
+    if plan.get('Node Type') == 'Seq Scan':
+        scans.append(plan.get('Relation Name'))
+    for child in plan.get('Plans', []):
+        _postgres_scans(child, scans)
+    return scans
+
+
+# "SCAN questions" (or "SCAN TABLE questions" before SQLite 3.36), optionally "... USING [COVERING] INDEX ix"
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?P<index> USING (?:COVERING )?INDEX)?')
+
+
+def _sqlite_scans(lines, limited):
+    scans = []
+    for line in lines:
+        match = SQLITE_SCAN.match(line)
+        if match:
+            # Walking a whole index is only cheap when a LIMIT stops it early
+            if not match.group('index') or not limited:
+                scans.append(match.group(1))
+        elif line.startswith('USE TEMP B-TREE'):
+            # The rows are sorted after reading them all instead of being read in index order
+            scans.append(line[len('USE TEMP B-TREE FOR '):] + ' sort')
+    return scans
+
+
+def explain(conn, query):
+    """Return (plan lines, tables read by full scan and sorts done without an index) for a query."""
+    sql, params = _driver_sql(conn, query)
+
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        row = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+        plan = (json.loads(row) if isinstance(row, str) else row)[0]['Plan']
+        lines = conn.exec_driver_sql(f"EXPLAIN {sql}", params).scalars().all()
+        return lines, _postgres_scans(plan, [])
+
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        lines = [row[-1] for row in rows]
+        return lines, _sqlite_scans(lines, limited=query._limit_clause is not None)
+
+    raise RuntimeError(f"Query plan checks are not supported for {conn.dialect.name}")
+
+
+def check_query_plans(verbose=False):
+    """Explain every hot query, print a report and return the names of queries that scan."""
+    failing = []
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for name, query in hot_queries().items():
+                with conn.begin():
+                    lines, scans = explain(conn, query)
+                status = 'FULL SCAN: ' + ', '.join(scans) if scans else 'ok'
+                print(f"{name:32} {status}")
+                if verbose or scans:
+                    for line in lines:
+                        print(f"    {line}")
+                if scans:
+                    failing.append(name)
+    return failing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not just failing ones')
+    args = parser.parse_args()
+
+    sys.exit(1 if check_query_plans(verbose=args.verbose) else 0)
@@ -0,0 +1,169 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import joinedload, load_only
+
+from models import db, User, Interview, JobProfile
+from backend.score_aggregation import BORDERLINE_SCORE, PASS_SCORE
+
+DASHBOARD_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+INTERVIEW_STATUSES = ('pending', 'in_progress', 'generating_report', 'completed')
+
+# Newest first, or best candidates first (interviews without a score are left out)
+SORT_ORDERS = ('newest', 'score')
+
+# Score bands match the badges on the dashboard and result pages
+SCORE_BANDS = {
+    'pass': lambda score: score >= PASS_SCORE,
+    'borderline': lambda score: and_(score >= BORDERLINE_SCORE, score < PASS_SCORE),
+    'fail': lambda score: score < BORDERLINE_SCORE
+}
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
+
+
+def parse_dashboard_filters(args):
+    """Read dashboard filters from request args, dropping values that don't validate."""
+    filters = {}
+
+    status = args.get('status')
+    if status in INTERVIEW_STATUSES:
+        filters['status'] = status
+
+    job_profile_id = args.get('job_profile_id', type=int)
+    if job_profile_id:
+        filters['job_profile_id'] = job_profile_id
+
+    date_from = _parse_date(args.get('date_from'))
+    if date_from:
+        filters['date_from'] = date_from
+
+    date_to = _parse_date(args.get('date_to'))
+    if date_to:
+        filters['date_to'] = date_to
+
+    score_band = args.get('score_band')
+    if score_band in SCORE_BANDS:
+        filters['score_band'] = score_band
+
+    sort = args.get('sort')
+    if sort in SORT_ORDERS and sort != 'newest':
+        filters['sort'] = sort
+
+    return filters
+
+
+def apply_dashboard_filters(query, filters):
+    if 'status' in filters:
+        query = query.filter(Interview.status == filters['status'])
+    if 'job_profile_id' in filters:
+        query = query.filter(Interview.job_profile_id == filters['job_profile_id'])
+    if 'date_from' in filters:
+        query = query.filter(Interview.created_at >= filters['date_from'])
+    if 'date_to' in filters:
+        # Inclusive of the whole end day
+        query = query.filter(Interview.created_at < filters['date_to'] + timedelta(days=1))
+    if 'score_band' in filters:
+        query = query.filter(SCORE_BANDS[filters['score_band']](Interview.score))
+    return query
+
+
+def encode_cursor(interview, sort='newest'):
+    if sort == 'score':
+        return f"{interview.score!r}_{interview.id}"
+    return f"{interview.created_at.isoformat()}_{interview.id}"
+
+
+def decode_cursor(cursor, sort='newest'):
+    try:
+        key, interview_id = cursor.rsplit('_', 1)
+        return (float(key) if sort == 'score' else datetime.fromisoformat(key)), int(interview_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def dashboard_page(filters, cursor=None, limit=DASHBOARD_PAGE_SIZE):
+    """
+    Fetch one page of dashboard rows, newest first or (sort 'score') highest score first.
+
+    Candidates and job profiles are joined in the same query and only the columns the
+    dashboard shows are loaded (the large report/feedback text stays in the database).
+    Pages are keyed on (created_at, id) or (score, id), so deep pages cost the same as
+    the first one.
+
+    Returns:
+        tuple: (list of Interview, cursor for the next page or None)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    query = Interview.query.options(
+        load_only(
+            Interview.id, Interview.user_id, Interview.job_profile_id, Interview.status,
+            Interview.score, Interview.score_percentile, Interview.created_at, Interview.completed_at
+        ),
+        joinedload(Interview.candidate).load_only(User.id, User.name, User.email),
+        joinedload(Interview.job_profile).load_only(JobProfile.id, JobProfile.title)
+    )
+    query = apply_dashboard_filters(query, filters)
+
+    sort = filters.get('sort', 'newest')
+    key = Interview.score if sort == 'score' else Interview.created_at
+    if sort == 'score':
+        query = query.filter(Interview.score.isnot(None))
+
+    position = decode_cursor(cursor, sort) if cursor else None
+    if position:
+        value, interview_id = position
+        query = query.filter(or_(key < value, and_(key == value, Interview.id < interview_id)))
+
+    rows = query.order_by(key.desc(), Interview.id.desc()).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1], sort) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def dashboard_summary(filters):
+    """Count, pass rate and average score over all interviews matching the filters, in one query."""
+    completed = Interview.status == 'completed'
+    query = db.session.query(
+        func.count(Interview.id),
+        func.count(case((completed, Interview.id))),
+        func.count(case((and_(completed, Interview.score >= PASS_SCORE), Interview.id))),
+        func.avg(case((completed, Interview.score)))
+    )
+    total, completed_count, passed, average_score = apply_dashboard_filters(query, filters).one()
+
+    return {
+        'total': total,
+        'completed': completed_count,
+        'pass_rate': (passed / completed_count * 100) if completed_count else 0.0,
+        'average_score': float(average_score) if average_score is not None else 0.0
+    }
+
+
+def dashboard_row(interview):
+    """JSON representation of a dashboard row."""
+    return {
+        'id': interview.id,
+        'candidate': {
+            'id': interview.candidate.id,
+            'name': interview.candidate.name,
+            'email': interview.candidate.email
+        } if interview.candidate else None,
+        'job_profile': {
+            'id': interview.job_profile.id,
+            'title': interview.job_profile.title
+        } if interview.job_profile else None,
+        'status': interview.status,
+        'score': interview.score,
+        'score_percentile': interview.score_percentile,
+        'created_at': interview.created_at.isoformat() if interview.created_at else None,
+        'completed_at': interview.completed_at.isoformat() if interview.completed_at else None
+    }
@@ -0,0 +1,90 @@
+from flask import g, has_request_context
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from models import db, User, JobProfile
+from backend.config import ENTITY_CACHE_ENABLED, ENTITY_CACHE_TTL, ENTITY_CACHE_MAX_ENTRIES
+from backend.metrics import registry, Counter
+from backend.response_cache import MemoryTier
+
+ENTITY_LOOKUPS = registry.register(Counter(
+    'recruitbot_entity_cache_lookups_total', 'User and job profile lookups by where they were answered from.',
+    ('entity', 'source')
+))
+
+_process_cache = MemoryTier(ENTITY_CACHE_MAX_ENTRIES, ENTITY_CACHE_TTL) if ENTITY_CACHE_ENABLED else None
+
+
+def _key(model, entity_id):
+    return f"{model.__tablename__}:{int(entity_id)}"
+
+
+def _snapshot(instance):
+    """Detached copy of a row's columns that is never refreshed or flushed, so requests can share it."""
+    mapper = inspect(instance).mapper
+    copy = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(copy, attr.key, getattr(instance, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _get(model, entity_id):
+    """
+    Look a row up in the request's identity map, then the process cache, then the database.
+
+    The returned instance is a read-only snapshot of the row's columns: it is not part of
+    the session, so changes to it are never saved and its relationships cannot be loaded.
+    Load the row with db.session.get to change it, then invalidate its cache entry.
+    """
+    if entity_id is None:
+        return None
+    key = _key(model, entity_id)
+
+    local = g.setdefault('entity_map', {}) if has_request_context() else None
+    if local is not None and key in local:
+        ENTITY_LOOKUPS.inc(entity=model.__tablename__, source='request')
+        return local[key]
+
+    instance = _process_cache.get(key) if _process_cache is not None else None
+    source = 'process'
+    if instance is None:
+        row = db.session.get(model, int(entity_id))
+        instance = _snapshot(row) if row is not None else None
+        source = 'database'
+        if instance is not None and _process_cache is not None:
+            _process_cache.set(key, instance)
+
+    ENTITY_LOOKUPS.inc(entity=model.__tablename__, source=source)
+    if local is not None:
+        local[key] = instance
+    return instance
+
+
+def _invalidate(model, entity_id):
+    key = _key(model, entity_id)
+    if _process_cache is not None:
+        _process_cache.delete(key)
+    if has_request_context():
+        g.get('entity_map', {}).pop(key, None)
+
+
+def get_user(user_id):
+    """Read-only snapshot of a user, or None."""
+    return _get(User, user_id)
+
+
+def get_job_profile(job_profile_id):
+    """Read-only snapshot of a job profile, or None."""
+    return _get(JobProfile, job_profile_id)
+
+
+def invalidate_user(user_id):
+    """Drop a user from this process's caches after it was changed."""
+    _invalidate(User, user_id)
+
+
+def invalidate_job_profile(job_profile_id):
+    """Drop a job profile from this process's caches after it was changed or deleted."""
+    _invalidate(JobProfile, job_profile_id)
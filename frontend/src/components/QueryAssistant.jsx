@@ -16,6 +16,8 @@ function QueryAssistant() {
       
       const response = await fetch(apiUrl, {
         method: 'POST',
+        // The endpoint runs a model call, so it needs the logged-in session
+        credentials: 'include',
         headers: {
           'Content-Type': 'application/json'
         },
@@ -22,6 +22,8 @@ function QueryAssistantStandalone() {
     try {
       const response = await fetch('http://localhost:5000/api/query/ask', {
         method: 'POST',
+        // The endpoint runs a model call, so it needs the logged-in session
+        credentials: 'include',
         headers: {
           'Content-Type': 'application/json'
         },
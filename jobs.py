@@ -0,0 +1,299 @@
+import json
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from models import db, BackgroundJob
+from backend.config import JOB_WORKERS, JOB_POLL_INTERVAL, JOB_MAX_ATTEMPTS, JOB_RETRY_BACKOFF, JOB_LEASE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """
+    A small job queue stored in the ``background_jobs`` table and drained by worker threads.
+
+    Jobs are claimed with a conditional UPDATE, so several worker processes can share the
+    same table. Failed jobs are retried with exponential backoff and moved to the dead-letter
+    list (status ``dead``) once they run out of attempts. Running jobs are heartbeated, so
+    jobs interrupted by a crash or restart are picked up again once their lease expires.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.handlers = {}
+        self.workers = JOB_WORKERS
+        self.poll_interval = JOB_POLL_INTERVAL
+        self.lease_timeout = JOB_LEASE_TIMEOUT
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._last_recovery = None
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._heartbeat_thread = None
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['job_queue'] = self
+
+    def handler(self, kind):
+        """Register the function that runs jobs of the given kind. It receives the job payload."""
+        def decorator(f):
+            self.handlers[kind] = f
+            return f
+        return decorator
+
+    def enqueue(self, kind, payload, max_attempts=None, delay=0, commit=True):
+        """
+        Add a job, due in delay seconds, and wake up an idle worker once it is committed.
+
+        With commit=False the job is only flushed and goes out with the caller's next commit,
+        so a request can save its own changes and queue its jobs in one transaction.
+        """
+        job = BackgroundJob(
+            kind=kind,
+            payload=payload,
+            status='queued',
+            max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+            run_after=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        db.session.add(job)
+        self._finish_enqueue(commit)
+        return job
+
+    def enqueue_unique(self, kind, payload, delay=0, dedupe_key=None, commit=True):
+        """
+        Enqueue a job unless one with the same dedupe key is still waiting to run; returns either.
+
+        The key defaults to the kind and a hash of the payload. Only queued jobs count, so a
+        change that arrives while a job is running still queues a follow-up run. commit is
+        as for enqueue.
+        """
+        if dedupe_key is None:
+            digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+            dedupe_key = f"{kind}:{digest}"
+        now = datetime.utcnow()
+        values = dict(
+            kind=kind,
+            payload=payload,
+            status='queued',
+            attempts=0,
+            max_attempts=JOB_MAX_ATTEMPTS,
+            run_after=now + timedelta(seconds=delay),
+            created_at=now,
+            dedupe_key=dedupe_key
+        )
+
+        # Insert-or-ignore against the partial unique index on queued dedupe keys
+        dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(db.session.get_bind().dialect.name)
+        if dialect is not None:
+            db.session.execute(dialect.insert(BackgroundJob).values(**values).on_conflict_do_nothing(
+                index_elements=['dedupe_key'],
+                index_where=BackgroundJob.status == 'queued'
+            ))
+        else:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(db.insert(BackgroundJob).values(**values))
+            except IntegrityError:
+                pass
+
+        # The newest job with the key: the queued one, or one a worker claimed in the meantime
+        job = BackgroundJob.query.filter_by(dedupe_key=dedupe_key).order_by(BackgroundJob.id.desc()).first()
+        self._finish_enqueue(commit)
+        return job
+
+    def _finish_enqueue(self, commit):
+        # Workers are woken by the after_commit hook below, once the job is visible to them
+        db.session.info['jobs_enqueued'] = True
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+
+    def retry(self, job):
+        """Put a dead or finished job back in the queue with a fresh set of attempts."""
+        job.status = 'queued'
+        job.attempts = 0
+        job.last_error = None
+        job.run_after = datetime.utcnow()
+        job.finished_at = None
+        db.session.commit()
+        self._wakeup.set()
+        return job
+
+    def start(self, workers=None):
+        """Start worker threads in this process."""
+        workers = self.workers if workers is None else workers
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if workers:
+            logger.info(f"Started {workers} background job workers")
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping.clear()
+
+    def run_forever(self, workers=None):
+        """Start workers and block until interrupted, for dedicated worker processes."""
+        self.start(workers)
+        try:
+            while not self._stopping.wait(3600):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+
+    def run_pending(self, limit=None):
+        """Run queued jobs in the calling thread until none are due. Returns the number processed."""
+        processed = 0
+        with self.app.app_context():
+            while limit is None or processed < limit:
+                job = self._claim()
+                if job is None:
+                    break
+                self._run(job)
+                processed += 1
+        return processed
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    job = self._claim()
+                    if job is not None:
+                        self._run(job)
+                        continue
+            except Exception as e:
+                logger.error(f"Background job worker error: {str(e)}")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat_thread is None or not self._heartbeat_thread.is_alive():
+            self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            self._heartbeat_thread.start()
+
+    def _heartbeat(self):
+        # Renew the lease of every job running in this process a few times per lease period
+        while not self._stopping.wait(self.lease_timeout / 4):
+            with self._running_lock:
+                running = list(self._running)
+            if not running:
+                continue
+            try:
+                with self.app.app_context():
+                    BackgroundJob.query.filter(
+                        BackgroundJob.id.in_(running),
+                        BackgroundJob.status == 'running'
+                    ).update({'heartbeat_at': datetime.utcnow()}, synchronize_session=False)
+                    db.session.commit()
+            except Exception as e:
+                logger.error(f"Background job heartbeat failed: {str(e)}")
+
+    def _recover_stale(self, now):
+        # Jobs left running by a killed or restarted worker stop heartbeating and are put
+        # back in the queue once their lease expires
+        if self._last_recovery and (now - self._last_recovery).total_seconds() < self.lease_timeout / 2:
+            return
+        self._last_recovery = now
+        stale = BackgroundJob.query.filter(
+            BackgroundJob.status == 'running',
+            func.coalesce(BackgroundJob.heartbeat_at, BackgroundJob.started_at) < now - timedelta(seconds=self.lease_timeout)
+        )
+        # A job that keeps taking its worker down must not be retried forever
+        dead = stale.filter(BackgroundJob.attempts >= BackgroundJob.max_attempts).update({
+            'status': 'dead',
+            'finished_at': now,
+            'last_error': 'Lease expired: the worker running the job stopped'
+        }, synchronize_session=False)
+        requeued = stale.update({'status': 'queued', 'run_after': now}, synchronize_session=False)
+        db.session.commit()
+        if dead:
+            logger.error(f"Moved {dead} background jobs with expired leases to the dead-letter list")
+        if requeued:
+            logger.warning(f"Requeued {requeued} background jobs with expired leases")
+
+    def _claim(self):
+        now = datetime.utcnow()
+        self._recover_stale(now)
+
+        job_id = db.session.query(BackgroundJob.id).filter(
+            BackgroundJob.status == 'queued',
+            BackgroundJob.run_after <= now
+        ).order_by(BackgroundJob.run_after, BackgroundJob.id).limit(1).scalar()
+        if job_id is None:
+            return None
+
+        # Only one worker wins the conditional update
+        claimed = BackgroundJob.query.filter_by(id=job_id, status='queued').update({
+            'status': 'running',
+            'started_at': now,
+            'heartbeat_at': now,
+            'attempts': BackgroundJob.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            return self._claim()
+
+        return db.session.get(BackgroundJob, job_id)
+
+    def _run(self, job):
+        job_id = job.id
+        handler = self.handlers.get(job.kind)
+        self._ensure_heartbeat()
+        with self._running_lock:
+            self._running.add(job_id)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            result = handler(job.payload)
+
+            job = db.session.get(BackgroundJob, job_id)
+            job.status = 'done'
+            job.result = result
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            logger.debug(f"Background job {job_id} ({job.kind}) finished")
+
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(BackgroundJob, job_id)
+            job.last_error = str(e)
+            if job.attempts >= job.max_attempts:
+                job.status = 'dead'
+                job.finished_at = datetime.utcnow()
+                logger.error(f"Background job {job_id} ({job.kind}) moved to dead-letter list after {job.attempts} attempts: {str(e)}")
+            else:
+                delay = JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+                job.status = 'queued'
+                job.run_after = datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+                logger.warning(f"Background job {job_id} ({job.kind}) failed, retrying in ~{delay:.0f}s: {str(e)}")
+            db.session.commit()
+
+        finally:
+            with self._running_lock:
+                self._running.discard(job_id)
+
+
+job_queue = JobQueue()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('jobs_enqueued', False):
+        job_queue._wakeup.set()
@@ -1,4 +1,9 @@
 from app import app
+from jobs import job_queue
+
+# Server entry point: start background job workers here, not on every import of the app
+# (JOB_WORKERS=0 leaves the queue to `flask jobs-worker`)
+job_queue.start()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
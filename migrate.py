@@ -0,0 +1,111 @@
+import os
+import re
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Files are applied in version order: 0001_description.sql, 0002_...
+MIGRATION_FILE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.sql$')
+
+ADD_COLUMN = re.compile(r'^ALTER\s+TABLE\s+"?(\w+)"?\s+ADD\s+COLUMN\s+"?(\w+)"?', re.IGNORECASE)
+
+
+def available_migrations():
+    """Return (version, name, path) for every migration file, oldest first."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    """Split a migration file into statements, dropping comment-only lines."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+def _column_exists(conn, statement):
+    # Tables added after a database was created are built by db.create_all() from the
+    # current models, so they already have the columns later migrations add to them
+    match = ADD_COLUMN.match(statement)
+    if not match:
+        return False
+    table, column = match.groups()
+    return column in {existing['name'] for existing in inspect(conn).get_columns(table)}
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(16) PRIMARY KEY, name VARCHAR(200) NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def migration_status(engine):
+    """Return a list of (version, name, applied) for all migration files."""
+    applied = applied_versions(engine)
+    return [(version, name, version in applied) for version, name, _ in available_migrations()]
+
+
+def apply_migrations(engine):
+    """
+    Apply pending migrations, each in its own transaction together with its version row.
+
+    Returns:
+        list: versions that were applied
+    """
+    applied = applied_versions(engine)
+    newly_applied = []
+
+    for version, name, path in available_migrations():
+        if version in applied:
+            continue
+
+        with open(path) as f:
+            statements = split_statements(f.read())
+
+        with engine.begin() as conn:
+            for statement in statements:
+                if _column_exists(conn, statement):
+                    logger.info(f"Migration {version}_{name}: column already exists, skipping: {statement}")
+                    continue
+                conn.exec_driver_sql(statement)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+            )
+
+        logger.info(f"Applied migration {version}_{name}")
+        newly_applied.append(version)
+
+    return newly_applied
+
+
+def stamp_migrations(engine):
+    """
+    Record every migration as applied without running it.
+
+    For databases whose schema was just created from the models by db.create_all(),
+    which already includes everything the migrations would add.
+    """
+    applied = applied_versions(engine)
+    with engine.begin() as conn:
+        for version, name, _ in available_migrations():
+            if version not in applied:
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                    {'version': version, 'name': name, 'applied_at': datetime.utcnow()}
+                )
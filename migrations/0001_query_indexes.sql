@@ -0,0 +1,16 @@
+-- Indexes for the hot query patterns of the interview flow, dashboard and job queue.
+-- Also declared on the ORM models, so fresh databases get them from db.create_all().
+
+-- Next unanswered question / all questions of an interview in order
+CREATE INDEX IF NOT EXISTS idx_questions_interview_order ON questions (interview_id, "order");
+CREATE INDEX IF NOT EXISTS idx_questions_unanswered ON questions (interview_id) WHERE answer IS NULL;
+
+-- Recruiter dashboard: newest first, optionally filtered by status or job profile
+CREATE INDEX IF NOT EXISTS idx_interviews_created_at ON interviews (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_interviews_status_created_at ON interviews (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_interviews_job_profile_created_at ON interviews (job_profile_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_interviews_user_id ON interviews (user_id);
+
+-- Background job claims and question bank draws
+CREATE INDEX IF NOT EXISTS idx_background_jobs_status_run_after ON background_jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS idx_question_bank_slot ON question_bank (job_profile_id, experience_bucket, type);
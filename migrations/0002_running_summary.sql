@@ -0,0 +1,6 @@
+-- Incremental evaluation report: a short assessment per answered question and a
+-- running summary per interview, updated in the background after each answer.
+
+ALTER TABLE interviews ADD COLUMN running_summary TEXT;
+ALTER TABLE interviews ADD COLUMN summary_through INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE questions ADD COLUMN assessment TEXT;
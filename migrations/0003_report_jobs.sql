@@ -0,0 +1,5 @@
+-- Asynchronous completion: interviews point at the job generating their report, and
+-- running jobs are heartbeated so interrupted ones are requeued after a restart.
+
+ALTER TABLE background_jobs ADD COLUMN heartbeat_at TIMESTAMP;
+ALTER TABLE interviews ADD COLUMN report_job_id INTEGER REFERENCES background_jobs (id);
@@ -0,0 +1,5 @@
+-- Conversation context: interviews keep the Ollama context tokens of their last
+-- generated question, so follow-up prompts only send the new turn.
+
+ALTER TABLE interviews ADD COLUMN llm_context TEXT;
+ALTER TABLE interviews ADD COLUMN llm_context_key VARCHAR(64);
@@ -0,0 +1,4 @@
+-- Answer keys: multiple-choice questions store their correct option so answers naming
+-- an option are scored without the LLM.
+
+ALTER TABLE questions ADD COLUMN answer_key VARCHAR(1);
@@ -0,0 +1,10 @@
+-- Candidate scores: interviews cache their weighted score's standard score, percentile
+-- rank within the job profile and per-type breakdown, and are indexed by score for ranking.
+
+ALTER TABLE interviews ADD COLUMN normalized_score FLOAT;
+ALTER TABLE interviews ADD COLUMN score_percentile FLOAT;
+ALTER TABLE interviews ADD COLUMN score_breakdown JSON;
+ALTER TABLE interviews ADD COLUMN scored_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_interviews_score ON interviews (score, id);
+CREATE INDEX IF NOT EXISTS idx_interviews_job_profile_score ON interviews (job_profile_id, score, id);
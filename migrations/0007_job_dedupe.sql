@@ -0,0 +1,6 @@
+-- Job deduplication: enqueue_unique stores a key per kind and payload, and a partial
+-- unique index keeps at most one queued job per key so duplicates are ignored on insert.
+
+ALTER TABLE background_jobs ADD COLUMN dedupe_key VARCHAR(128);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_background_jobs_dedupe ON background_jobs (dedupe_key) WHERE status = 'queued';
@@ -0,0 +1,5 @@
+-- Conversation context keys are now a sha256 of the model and prompt version, since
+-- long Ollama model tags overflowed "model:version" in the 64-character column.
+-- Contexts stored under the old key format are dropped; the next turn sends the full prompt.
+
+UPDATE interviews SET llm_context = NULL, llm_context_key = NULL WHERE llm_context_key LIKE '%:%';
@@ -45,18 +45,49 @@ class User(UserMixin, db.Model):
 
 class Interview(db.Model):
     __tablename__ = 'interviews'
+    __table_args__ = (
+        # Dashboard listing (newest first, keyset paginated) and its filters
+        db.Index('idx_interviews_created_at', 'created_at', 'id'),
+        db.Index('idx_interviews_status_created_at', 'status', 'created_at'),
+        db.Index('idx_interviews_job_profile_created_at', 'job_profile_id', 'created_at'),
+        db.Index('idx_interviews_user_id', 'user_id'),
+        # Candidates ranked by score, overall or for one job profile
+        db.Index('idx_interviews_score', 'score', 'id'),
+        db.Index('idx_interviews_job_profile_score', 'job_profile_id', 'score', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     job_profile_id = db.Column(db.Integer, db.ForeignKey('job_profiles.id'), nullable=False)
     experience_level = db.Column(db.String(50), nullable=False)
     score = db.Column(db.Float, nullable=True)
-    status = db.Column(db.String(20), default='pending')  # pending, completed, failed
+    status = db.Column(db.String(20), default='pending')  # pending, in_progress, generating_report, completed
     feedback = db.Column(db.Text, nullable=True)
     report = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     completed_at = db.Column(db.DateTime, nullable=True)
     
+    # Running summary of the answers so far, covering questions up to order summary_through
+    running_summary = db.Column(db.Text, nullable=True)
+    summary_through = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
+    # Background job generating the final report when the interview was completed asynchronously
+    report_job_id = db.Column(db.Integer, db.ForeignKey('background_jobs.id'), nullable=True)
+    
+    # Ollama context tokens after the last generated question (backend.conversation.pack_context),
+    # valid for the model and job profile prompt version hashed into llm_context_key
+    # (backend.conversation.context_key)
+    llm_context = db.Column(db.Text, nullable=True)
+    llm_context_key = db.Column(db.String(64), nullable=True)
+    
+    # Cached by candidate_scores: score is the weighted question score in percent, normalized_score
+    # its standard score and score_percentile the share of other candidates for the job profile
+    # scoring lower; score_breakdown holds the score per question type
+    normalized_score = db.Column(db.Float, nullable=True)
+    score_percentile = db.Column(db.Float, nullable=True)
+    score_breakdown = db.Column(db.JSON, nullable=True)
+    scored_at = db.Column(db.DateTime, nullable=True)
+    
     # Relationship with questions
     questions = db.relationship('Question', backref='interview', lazy=True)
     
@@ -70,9 +101,14 @@ class Interview(db.Model):
             'job_profile': self.job_profile.to_dict() if self.job_profile else None,
             'experience_level': self.experience_level,
             'score': self.score,
+            'normalized_score': self.normalized_score,
+            'score_percentile': self.score_percentile,
+            'score_breakdown': self.score_breakdown,
             'status': self.status,
             'feedback': self.feedback,
             'report': self.report,
+            'running_summary': self.running_summary,
+            'report_job_id': self.report_job_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
@@ -80,6 +116,12 @@ class Interview(db.Model):
 
 class Question(db.Model):
     __tablename__ = 'questions'
+    __table_args__ = (
+        # Questions of an interview in order, and the open question awaiting an answer
+        db.Index('idx_questions_interview_order', 'interview_id', 'order'),
+        db.Index('idx_questions_unanswered', 'interview_id',
+                 postgresql_where=db.text('answer IS NULL'), sqlite_where=db.text('answer IS NULL')),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     interview_id = db.Column(db.Integer, db.ForeignKey('interviews.id'), nullable=False)
@@ -88,11 +130,13 @@ class Question(db.Model):
     text = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50))  # e.g., "DSA", "OOP", etc.
     type = db.Column(db.String(20))  # 'mcq', 'concept', 'coding'
+    answer_key = db.Column(db.String(1))  # Correct option of an 'mcq' question; never sent to the candidate
     
     # Response and evaluation
     answer = db.Column(db.Text)
     score = db.Column(db.Float)  # Score for this question
     feedback = db.Column(db.Text)  # Feedback on the answer
+    assessment = db.Column(db.Text)  # Short assessment written into the running summary
     
     # Order in the interview
     order = db.Column(db.Integer)
@@ -111,6 +155,7 @@ class Question(db.Model):
             'answer': self.answer,
             'score': self.score,
             'feedback': self.feedback,
+            'assessment': self.assessment,
             'order': self.order,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'answered_at': self.answered_at.isoformat() if self.answered_at else None
@@ -134,6 +179,9 @@ class JobProfile(db.Model):
     # Relationship with interviews
     interviews = db.relationship('Interview', backref='job_profile', lazy=True)
     
+    # Pre-generated questions, removed together with the profile
+    question_bank = db.relationship('BankedQuestion', backref='job_profile', lazy=True, cascade='all, delete-orphan')
+    
     def __repr__(self):
         return f'<JobProfile {self.title}>'
     
@@ -146,4 +194,216 @@ class JobProfile(db.Model):
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+class BankedQuestion(db.Model):
+    __tablename__ = 'question_bank'
+    __table_args__ = (
+        db.Index('idx_question_bank_slot', 'job_profile_id', 'experience_bucket', 'type'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_profile_id = db.Column(db.Integer, db.ForeignKey('job_profiles.id'), nullable=False)
+    experience_bucket = db.Column(db.String(20), nullable=False)  # 'junior', 'mid', 'senior'
+    type = db.Column(db.String(20), nullable=False)  # 'mcq', 'concept', 'coding'
+    text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<BankedQuestion {self.id} for JobProfile {self.job_profile_id}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_profile_id': self.job_profile_id,
+            'experience_bucket': self.experience_bucket,
+            'type': self.type,
+            'text': self.text,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class BackgroundJob(db.Model):
+    __tablename__ = 'background_jobs'
+    __table_args__ = (
+        # Workers claim the oldest due job of a status
+        db.Index('idx_background_jobs_status_run_after', 'status', 'run_after'),
+        # At most one queued job per dedupe key, so enqueue_unique can insert-or-ignore
+        db.Index('idx_background_jobs_dedupe', 'dedupe_key', unique=True,
+                 postgresql_where=db.text("status = 'queued'"), sqlite_where=db.text("status = 'queued'")),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. 'evaluate_answer'
+    payload = db.Column(db.JSON, nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, dead
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    dedupe_key = db.Column(db.String(128), nullable=True)  # Set by enqueue_unique
+    
+    # Scheduling
+    run_after = db.Column(db.DateTime, default=datetime.utcnow)  # Earliest time the next attempt may start
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Renewed while a worker is running the job
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<BackgroundJob {self.id} {self.kind} ({self.status})>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': self.payload,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'last_error': self.last_error,
+            'result': self.result,
+            'dedupe_key': self.dedupe_key,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class RescoreRun(db.Model):
+    __tablename__ = 'rescore_runs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='queued')  # queued, running, paused, done, failed
+    filters = db.Column(db.JSON, nullable=False)  # job_profile_id, interview_ids, completed_only
+    batch_size = db.Column(db.Integer, nullable=False)
+    
+    # Progress; questions are processed in id order, so the last id is the resume point
+    last_question_id = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, default=0)
+    processed = db.Column(db.Integer, default=0)
+    failed = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('background_jobs.id'), nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<RescoreRun {self.id} ({self.status})>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'filters': self.filters,
+            'batch_size': self.batch_size,
+            'last_question_id': self.last_question_id,
+            'total': self.total,
+            'processed': self.processed,
+            'failed': self.failed,
+            'percent': round(self.processed / self.total * 100, 1) if self.total else 0.0,
+            'last_error': self.last_error,
+            'job_id': self.job_id,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobProfileAnalytics(db.Model):
+    """Interview totals per job profile, kept up to date by analytics.py."""
+    __tablename__ = 'analytics_job_profiles'
+    
+    job_profile_id = db.Column(db.Integer, db.ForeignKey('job_profiles.id', ondelete='CASCADE'), primary_key=True)
+    interviews = db.Column(db.Integer, nullable=False, default=0)  # Started, in any status
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    passed = db.Column(db.Integer, nullable=False, default=0)
+    borderline = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Sums rather than averages, so profiles can be added up exactly
+    scored = db.Column(db.Integer, nullable=False, default=0)  # Completed interviews with a score
+    score_total = db.Column(db.Float, nullable=False, default=0)
+    completion_seconds_total = db.Column(db.Float, nullable=False, default=0)
+    
+    last_completed_at = db.Column(db.DateTime, nullable=True)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<JobProfileAnalytics for JobProfile {self.job_profile_id}>'
+    
+    def to_dict(self):
+        return {
+            'job_profile_id': self.job_profile_id,
+            'interviews': self.interviews,
+            'completed': self.completed,
+            'passed': self.passed,
+            'borderline': self.borderline,
+            'failed': self.failed,
+            'pass_rate': round(self.passed / self.completed * 100, 1) if self.completed else None,
+            'average_score': round(self.score_total / self.scored, 1) if self.scored else None,
+            'average_completion_seconds': round(self.completion_seconds_total / self.completed) if self.completed else None,
+            'last_completed_at': self.last_completed_at.isoformat() if self.last_completed_at else None,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+class CategoryAnalytics(db.Model):
+    """Answer scores per job profile, question category and question type, kept up to date by analytics.py."""
+    __tablename__ = 'analytics_categories'
+    
+    job_profile_id = db.Column(db.Integer, db.ForeignKey('job_profiles.id', ondelete='CASCADE'), primary_key=True)
+    category = db.Column(db.String(50), primary_key=True)  # '' for questions without a category
+    type = db.Column(db.String(20), primary_key=True)  # '' for questions without a type
+    answers = db.Column(db.Integer, nullable=False, default=0)
+    scored = db.Column(db.Integer, nullable=False, default=0)
+    score_total = db.Column(db.Float, nullable=False, default=0)  # Question scores, out of 10 each
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CategoryAnalytics {self.category}/{self.type} for JobProfile {self.job_profile_id}>'
+    
+    def to_dict(self):
+        return {
+            'job_profile_id': self.job_profile_id,
+            'category': self.category or None,
+            'type': self.type or None,
+            'answers': self.answers,
+            'scored': self.scored,
+            'average_score': round(self.score_total / self.scored, 2) if self.scored else None,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+class DailyAnalytics(db.Model):
+    """Completed interviews per day and job profile, kept up to date by analytics.py."""
+    __tablename__ = 'analytics_daily'
+    
+    day = db.Column(db.Date, primary_key=True)  # Day of completion (UTC)
+    job_profile_id = db.Column(db.Integer, db.ForeignKey('job_profiles.id', ondelete='CASCADE'), primary_key=True)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    passed = db.Column(db.Integer, nullable=False, default=0)
+    scored = db.Column(db.Integer, nullable=False, default=0)
+    score_total = db.Column(db.Float, nullable=False, default=0)
+    completion_seconds_total = db.Column(db.Float, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DailyAnalytics {self.day} for JobProfile {self.job_profile_id}>'
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'job_profile_id': self.job_profile_id,
+            'completed': self.completed,
+            'passed': self.passed,
+            'pass_rate': round(self.passed / self.completed * 100, 1) if self.completed else None,
+            'average_score': round(self.score_total / self.scored, 1) if self.scored else None,
+            'average_completion_seconds': round(self.completion_seconds_total / self.completed) if self.completed else None
+        }
@@ -0,0 +1,183 @@
+import logging
+
+from models import db, JobProfile, Question, BankedQuestion
+from backend.config import QUESTION_BANK_DEPTH
+from backend.ollama_client import get_ollama_client
+from backend.prescoring import split_answer_key
+from backend.prompt_templates import compiled_profile
+from backend.token_budget import llm_usage_scope
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+QUESTION_TYPES = ('mcq', 'concept', 'coding')
+
+# Experience buckets with the years of experience they describe in prompts
+EXPERIENCE_BUCKETS = {
+    'junior': '0-2',
+    'mid': '2-5',
+    'senior': '5+'
+}
+
+QUESTION_TYPE_INSTRUCTIONS = {
+    'mcq': 'a multiple-choice question with four options labelled A-D',
+    'concept': 'a conceptual question that requires a short written explanation',
+    'coding': 'a coding problem that asks for an approach and its time/space complexity'
+}
+
+# Multiple-choice questions end with their answer key; it is split off before the question is shown
+ANSWER_KEY_INSTRUCTION = 'After the options, add one last line "Answer: <letter>" naming the correct option.'
+
+
+def output_instructions(question_type):
+    """The closing prompt lines telling the model what to return for a question type."""
+    if question_type == 'mcq':
+        return f"{ANSWER_KEY_INSTRUCTION}\nReturn ONLY the question, its options and the answer line, nothing else."
+    return "Return ONLY the question text, nothing else."
+
+
+def experience_bucket(years):
+    """Map years of experience to a question bank bucket."""
+    if years is None or years < 2:
+        return 'junior'
+    if years < 5:
+        return 'mid'
+    return 'senior'
+
+
+def draw_banked_question(interview, job_profile, years, question_type):
+    """
+    Take a stocked question for the interview, or None if the bank has nothing suitable.
+
+    Drawn questions are removed from the bank, questions already asked in this interview
+    are skipped, and a refill is requested when the stock runs low. Nothing is committed;
+    the draw and the refill go out with the caller's commit.
+    """
+    bucket = experience_bucket(years)
+    asked = {text for (text,) in db.session.query(Question.text).filter_by(interview_id=interview.id)}
+
+    candidates = BankedQuestion.query.filter_by(
+        job_profile_id=job_profile.id,
+        experience_bucket=bucket,
+        type=question_type
+    ).order_by(BankedQuestion.id).limit(QUESTION_BANK_DEPTH + len(asked)).all()
+
+    text = None
+    for candidate in candidates:
+        # Asked questions are stored without their answer key, so compare them the same way
+        if split_answer_key(candidate.text)[0] in asked:
+            continue
+        candidate_text = candidate.text
+        # Another request may have drawn the same row, only the delete that wins counts
+        claimed = BankedQuestion.query.filter_by(id=candidate.id).delete(synchronize_session=False)
+        if claimed:
+            text = candidate_text
+            break
+
+    if len(candidates) - (1 if text else 0) < QUESTION_BANK_DEPTH:
+        request_refill(job_profile, bucket, question_type)
+
+    return text
+
+
+def request_refill(job_profile, bucket, question_type):
+    """Queue a refill for one bank slot unless one is already pending; committed by the caller."""
+    payload = {
+        'job_profile_id': job_profile.id,
+        'experience_bucket': bucket,
+        'type': question_type,
+        'version': job_profile.updated_at.isoformat() if job_profile.updated_at else None
+    }
+    return job_queue.enqueue_unique('refill_question_bank', payload, commit=False)
+
+
+def stock_question_bank(job_profile):
+    """Queue refills for every bucket and question type of a job profile."""
+    for bucket in EXPERIENCE_BUCKETS:
+        for question_type in QUESTION_TYPES:
+            request_refill(job_profile, bucket, question_type)
+    db.session.commit()
+
+
+def invalidate_question_bank(job_profile):
+    """Drop all stocked questions for an edited job profile and start refilling them."""
+    deleted = BankedQuestion.query.filter_by(job_profile_id=job_profile.id).delete(synchronize_session=False)
+    db.session.commit()
+    logger.info(f"Invalidated {deleted} banked questions for job profile {job_profile.id}")
+
+    if job_profile.is_active:
+        stock_question_bank(job_profile)
+
+
+def build_bank_prompt(job_profile, bucket, question_type, existing):
+    """Prompt for one stand-alone question to stock the bank with."""
+    avoid = "\n".join(f"- {text}" for text in existing)
+    return compiled_profile(job_profile).render(f"""
+You are preparing questions for candidates at {bucket} level ({EXPERIENCE_BUCKETS[bucket]} years of experience).
+
+Generate {QUESTION_TYPE_INSTRUCTIONS[question_type]} that is appropriate for their experience level.
+The question should be challenging but fair.
+Focus on the technical skills required for this position.
+{"Do not repeat any of these questions:" if avoid else ""}
+{avoid}
+{output_instructions(question_type)}""")
+
+
+@job_queue.handler('refill_question_bank')
+def refill_question_bank(payload):
+    """Background job: top one bank slot up to QUESTION_BANK_DEPTH questions."""
+    job_profile = JobProfile.query.get(payload['job_profile_id'])
+    if not job_profile or not job_profile.is_active:
+        return {'skipped': True}
+
+    # The profile was edited after this refill was queued; the invalidation queued a new one
+    version = job_profile.updated_at.isoformat() if job_profile.updated_at else None
+    if payload.get('version') != version:
+        return {'skipped': True}
+
+    bucket = payload['experience_bucket']
+    question_type = payload['type']
+    existing = [text for (text,) in db.session.query(BankedQuestion.text).filter_by(
+        job_profile_id=job_profile.id,
+        experience_bucket=bucket,
+        type=question_type
+    )]
+
+    ollama = get_ollama_client()
+    added = 0
+    # Allow a few wasted generations (duplicates, failures) before giving up on this run
+    for _ in range(max(0, QUESTION_BANK_DEPTH - len(existing)) + 2):
+        if len(existing) >= QUESTION_BANK_DEPTH:
+            break
+
+        # Every stocked question must be a fresh generation, so skip the response cache
+        with llm_usage_scope(job_profile.id, 'refill_question_bank'):
+            result = ollama.generate_response(
+                build_bank_prompt(job_profile, bucket, question_type, existing),
+                use_cache=False,
+                temperature=0.9,
+                task='question'
+            )
+        if not result["success"]:
+            raise RuntimeError(result.get("error", "Question generation failed"))
+
+        text = result["response"].strip()
+        if not text or text in existing:
+            continue
+
+        # Stop if the profile was edited while we were generating
+        db.session.refresh(job_profile)
+        if (job_profile.updated_at.isoformat() if job_profile.updated_at else None) != version:
+            break
+
+        db.session.add(BankedQuestion(
+            job_profile_id=job_profile.id,
+            experience_bucket=bucket,
+            type=question_type,
+            text=text
+        ))
+        db.session.commit()
+        existing.append(text)
+        added += 1
+
+    return {'added': added, 'stocked': len(existing)}
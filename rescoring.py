@@ -0,0 +1,243 @@
+import json
+import logging
+from datetime import datetime
+from itertools import groupby
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+from sqlalchemy.orm import load_only
+
+from models import db, User, Interview, Question, JobProfile, RescoreRun
+from backend.config import (
+    BATCH_ANSWER_EVALUATION_TEMPLATE, RESCORE_BATCH_SIZE, RESCORE_CHUNK_SIZE, RESCORE_WORKERS
+)
+from backend.prescoring import prescore_answer, record_scoring_stage
+from backend.prompt_templates import compiled_profile
+from backend.structured_output import BATCH_EVALUATION_SCHEMA, conform, generate_structured
+from backend.token_budget import clip_answer, llm_usage_scope, truncate_text
+from analytics import refresh_job_profile
+from candidate_scores import rank_job_profile
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+# Scoring should be repeatable between runs
+RESCORE_TEMPERATURE = 0.0
+
+BATCH_ENTRY_SCHEMA = BATCH_EVALUATION_SCHEMA['properties']['evaluations']['items']
+
+
+def rescore_query(filters):
+    """Answered questions matching a rescore run's filters."""
+    query = Question.query.join(Interview, Question.interview_id == Interview.id).filter(Question.answer.isnot(None))
+    if filters.get('job_profile_id'):
+        query = query.filter(Interview.job_profile_id == filters['job_profile_id'])
+    if filters.get('interview_ids'):
+        query = query.filter(Interview.id.in_(filters['interview_ids']))
+    if filters.get('completed_only', True):
+        query = query.filter(Interview.status == 'completed')
+    return query
+
+
+def start_rescore(filters, batch_size=None, created_by=None, background=True):
+    """Create a rescore run and, unless background is False, queue the job that works through it."""
+    run = RescoreRun(
+        status='queued',
+        filters=filters,
+        batch_size=max(1, batch_size or RESCORE_BATCH_SIZE),
+        created_by=created_by,
+        total=rescore_query(filters).count()
+    )
+    db.session.add(run)
+    db.session.commit()
+    if background:
+        run.job_id = job_queue.enqueue('rescore_answers', {'run_id': run.id}).id
+        db.session.commit()
+    return run
+
+
+def resume_rescore(run):
+    """Queue a paused or failed run again; it continues after its last checkpoint."""
+    run.status = 'queued'
+    run.last_error = None
+    run.job_id = job_queue.enqueue('rescore_answers', {'run_id': run.id}).id
+    db.session.commit()
+    return run
+
+
+def build_batch_prompt(job_profile, items):
+    """One prompt scoring several answers for the same job profile."""
+    fields = compiled_profile(job_profile).fields
+    instructions = "\n".join(filter(None, [
+        f"- Technical skills: {fields['technical_skills']}",
+        f"- Evaluation focus: {fields['evaluation_focus']}",
+        fields['custom_prompt']
+    ]))
+    rendered = "\n\n".join(
+        f"Answer id {item['id']} (candidate with {item['experience']} years of experience)\n"
+        f"Question: {item['question']}\n"
+        f"Candidate Answer: {item['answer']}"
+        for item in items
+    )
+    return BATCH_ANSWER_EVALUATION_TEMPLATE.format(role=job_profile.title, instructions=instructions, items=rendered)
+
+
+def batch_scores(data, ids):
+    """Map answer id to its evaluation from a batch result, keeping the valid entries for the batch's answers."""
+    entries = data.get('evaluations') if isinstance(data, dict) else data
+    evaluations = {}
+    for entry in entries if isinstance(entries, list) else []:
+        entry, errors = conform(entry, BATCH_ENTRY_SCHEMA)
+        if not errors and entry['id'] in ids:
+            evaluations[entry['id']] = entry
+    return evaluations
+
+
+def score_batch(job_profile_id, prompt, ids):
+    """Worker thread: score one batch prompt. Returns (evaluations by id, error or None)."""
+    with llm_usage_scope(job_profile_id, 'rescore'):
+        result = generate_structured(prompt, BATCH_EVALUATION_SCHEMA, 'batch_evaluation', task='scoring',
+                                     use_cache=False, temperature=RESCORE_TEMPERATURE)
+    # Entries that are valid on their own are kept even if others in the batch are not
+    evaluations = batch_scores(result.get("data"), set(ids))
+    for _ in evaluations:
+        record_scoring_stage('model')
+    if not evaluations:
+        return {}, result.get("error") or "The model returned no scores for the batch"
+    return evaluations, None
+
+
+def _load_chunk(run):
+    return rescore_query(run.filters).options(
+        load_only(Question.id, Question.interview_id, Question.text, Question.answer, Question.type, Question.answer_key)
+    ).filter(Question.id > (run.last_question_id or 0)).order_by(Question.id).limit(RESCORE_CHUNK_SIZE).all()
+
+
+def _batch_items(questions, prescored):
+    """
+    Group a chunk of questions into (job_profile, items) batches for the model.
+
+    Answers the pre-scorer can score by rule are added to prescored (question id to
+    evaluation) instead.
+    """
+    interview_ids = {q.interview_id for q in questions}
+    interviews = {
+        interview.id: interview for interview in
+        Interview.query.options(load_only(Interview.id, Interview.user_id, Interview.job_profile_id))
+        .filter(Interview.id.in_(interview_ids))
+    }
+    experience = dict(
+        db.session.query(User.id, User.experience).filter(User.id.in_({i.user_id for i in interviews.values()}))
+    )
+    profiles = {p.id: p for p in JobProfile.query.filter(JobProfile.id.in_({i.job_profile_id for i in interviews.values()}))}
+
+    items = []
+    for question in questions:
+        interview = interviews[question.interview_id]
+        evaluation = prescore_answer(question.text, question.answer, question.type, question.answer_key)
+        if evaluation is not None:
+            prescored[question.id] = evaluation
+            continue
+        items.append((interview.job_profile_id, {
+            'id': question.id,
+            'question': truncate_text(question.text, 200),
+            'answer': clip_answer(question.answer, 'rescore_answer'),
+            'experience': experience.get(interview.user_id) or 'unknown'
+        }))
+
+    items.sort(key=lambda pair: pair[0])
+    for job_profile_id, group in groupby(items, key=lambda pair: pair[0]):
+        yield profiles[job_profile_id], [item for _, item in group]
+
+
+def process_rescore_run(run_id, progress=None):
+    """
+    Work through a rescore run chunk by chunk until it is done or paused.
+
+    Each chunk of questions is split into batched prompts per job profile, scored on a
+    bounded thread pool, then written back with one bulk UPDATE committed together with
+    the new checkpoint, so an interrupted run resumes after the last finished chunk.
+    Answers the pre-scorer can score by rule skip the model. Answers the model did not
+    return a valid score for keep their old score and are counted as failed. Once done,
+    the interview scores, rankings and analytics of the job profiles involved are recomputed.
+
+    Args:
+        run_id (int): RescoreRun to process
+        progress (callable): Called with the run after every chunk
+    """
+    run = db.session.get(RescoreRun, run_id)
+    if run is None or run.status in ('done', 'paused'):
+        return run
+
+    run.status = 'running'
+    run.started_at = run.started_at or datetime.utcnow()
+    db.session.commit()
+
+    with ThreadPoolExecutor(max_workers=RESCORE_WORKERS, thread_name_prefix='rescore') as executor:
+        while True:
+            db.session.refresh(run)
+            if run.status == 'paused':
+                logger.info(f"Rescore run {run.id} paused at question {run.last_question_id}")
+                return run
+
+            questions = _load_chunk(run)
+            if not questions:
+                break
+
+            prescored, futures = {}, []
+            for job_profile, items in _batch_items(questions, prescored):
+                for start in range(0, len(items), run.batch_size):
+                    batch = items[start:start + run.batch_size]
+                    ids = [item['id'] for item in batch]
+                    futures.append(executor.submit(score_batch, job_profile.id, build_batch_prompt(job_profile, batch), ids))
+
+            updates, errors = [], []
+            results = [(prescored, None)] + [future.result() for future in futures]
+            for evaluations, error in results:
+                if error:
+                    errors.append(error)
+                for question_id, evaluation in evaluations.items():
+                    updates.append({
+                        'id': question_id,
+                        'score': evaluation['score'],
+                        'feedback': json.dumps({k: v for k, v in evaluation.items() if k != 'id'})
+                    })
+
+            if updates:
+                db.session.execute(update(Question), updates)
+            run.last_question_id = questions[-1].id
+            run.processed += len(questions)
+            run.failed += len(questions) - len(updates)
+            if errors:
+                run.last_error = errors[-1]
+            db.session.commit()
+
+            if progress:
+                progress(run)
+
+    profile_ids = [profile_id for profile_id, in rescore_query(run.filters).with_entities(Interview.job_profile_id).distinct()]
+    for profile_id in profile_ids:
+        rank_job_profile(profile_id, recompute=True)
+        refresh_job_profile(profile_id)
+
+    run.status = 'done'
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    logger.info(f"Rescore run {run.id} finished: {run.processed - run.failed} rescored, {run.failed} failed")
+    return run
+
+
+@job_queue.handler('rescore_answers')
+def run_rescore(payload):
+    """Background job: process a rescore run. A requeued job resumes from the run's checkpoint."""
+    try:
+        run = process_rescore_run(payload['run_id'])
+    except Exception as e:
+        db.session.rollback()
+        run = db.session.get(RescoreRun, payload['run_id'])
+        if run:
+            run.status = 'failed'
+            run.last_error = str(e)
+            db.session.commit()
+        raise
+    return run.to_dict() if run else {'skipped': True}
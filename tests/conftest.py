@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+import pytest
+
+# The app creates its schema when imported, so point it at a throwaway SQLite database first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="recruitbot-tests-"), "test.db")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def db_session(app):
+    """The database session inside an application context, rolled back after the test."""
+    from models import db
+    with app.app_context():
+        yield db.session
+        db.session.rollback()
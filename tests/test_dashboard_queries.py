@@ -0,0 +1,121 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from dashboard_queries import dashboard_page, decode_cursor, encode_cursor, parse_dashboard_filters
+from models import Interview, JobProfile, User
+
+BASE_TIME = datetime(2024, 3, 1, 9, 0)
+
+# (minutes after BASE_TIME, score); two interviews share a creation time and three a score
+INTERVIEWS = [(0, 80.0), (1, 65.0), (2, 65.0), (2, 40.0), (3, 65.0), (4, None), (5, 90.0)]
+
+
+@pytest.fixture
+def job_profile(db_session):
+    """A job profile with its own interviews, so pages filtered on it only see these."""
+    profile = JobProfile(title=f"Test profile {uuid.uuid4().hex[:8]}", evaluation_criteria={})
+    candidate = User(email=f"{uuid.uuid4().hex[:8]}@example.com", name="Test Candidate")
+    candidate.set_password("secret")
+    db_session.add_all([profile, candidate])
+    db_session.flush()
+    for minutes, score in INTERVIEWS:
+        db_session.add(Interview(user_id=candidate.id, job_profile_id=profile.id, experience_level="Mid",
+                                 status="completed", score=score, created_at=BASE_TIME + timedelta(minutes=minutes)))
+    db_session.commit()
+    yield profile
+    Interview.query.filter_by(job_profile_id=profile.id).delete()
+    db_session.delete(profile)
+    db_session.delete(candidate)
+    db_session.commit()
+
+
+def all_pages(filters, limit):
+    ids, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = dashboard_page(filters, cursor, limit=limit)
+        ids.extend(row.id for row in rows)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def interviews(profile):
+    return Interview.query.filter_by(job_profile_id=profile.id).all()
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 50])
+def test_newest_pages_cover_every_interview_once(job_profile, limit):
+    expected = [i.id for i in sorted(interviews(job_profile), key=lambda i: (i.created_at, i.id), reverse=True)]
+    ids, pages = all_pages({"job_profile_id": job_profile.id}, limit)
+    assert ids == expected
+    assert pages == -(-len(expected) // limit)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4])
+def test_score_pages_break_ties_by_id_and_skip_unscored(job_profile, limit):
+    scored = [i for i in interviews(job_profile) if i.score is not None]
+    expected = [i.id for i in sorted(scored, key=lambda i: (i.score, i.id), reverse=True)]
+    ids, _ = all_pages({"job_profile_id": job_profile.id, "sort": "score"}, limit)
+    assert ids == expected
+    assert len(ids) == len(INTERVIEWS) - 1
+
+
+def test_new_interviews_do_not_shift_later_pages(job_profile, db_session):
+    filters = {"job_profile_id": job_profile.id}
+    first, cursor = dashboard_page(filters, limit=3)
+    expected, _ = dashboard_page(filters, cursor, limit=3)
+
+    newest = Interview(user_id=first[0].user_id, job_profile_id=job_profile.id, experience_level="Mid",
+                       created_at=BASE_TIME + timedelta(hours=1))
+    db_session.add(newest)
+    db_session.commit()
+
+    second, _ = dashboard_page(filters, cursor, limit=3)
+    assert [i.id for i in second] == [i.id for i in expected]
+    assert dashboard_page(filters, limit=1)[0][0].id == newest.id
+
+
+def test_score_band_filter(job_profile):
+    rows, cursor = dashboard_page({"job_profile_id": job_profile.id, "score_band": "borderline"})
+    assert sorted(i.score for i in rows) == [65.0, 65.0, 65.0]
+    assert cursor is None
+
+
+def test_cursor_round_trip(job_profile):
+    interview = next(i for i in interviews(job_profile) if i.score is not None)
+    assert decode_cursor(encode_cursor(interview)) == (interview.created_at, interview.id)
+    assert decode_cursor(encode_cursor(interview, "score"), "score") == (interview.score, interview.id)
+
+
+@pytest.mark.parametrize("cursor, sort", [
+    ("garbage", "newest"),
+    ("2024-03-01T09:00:00_x", "newest"),
+    ("not-a-date_5", "newest"),
+    ("2024-03-01T09:00:00_5", "score"),
+    (None, "newest"),
+])
+def test_decode_cursor_rejects_invalid_input(cursor, sort):
+    assert decode_cursor(cursor, sort) is None
+
+
+def test_invalid_cursor_starts_from_the_first_page(job_profile):
+    filters = {"job_profile_id": job_profile.id}
+    assert dashboard_page(filters, "garbage", limit=2) == dashboard_page(filters, limit=2)
+
+
+def test_parse_dashboard_filters():
+    args = MultiDict({"status": "completed", "job_profile_id": "3", "date_from": "2024-03-01",
+                      "date_to": "2024-03-31", "score_band": "pass", "sort": "score"})
+    assert parse_dashboard_filters(args) == {
+        "status": "completed", "job_profile_id": 3, "date_from": datetime(2024, 3, 1),
+        "date_to": datetime(2024, 3, 31), "score_band": "pass", "sort": "score"
+    }
+
+
+def test_parse_dashboard_filters_drops_invalid_values():
+    args = MultiDict({"status": "archived", "job_profile_id": "abc", "date_from": "03/01/2024",
+                      "score_band": "excellent", "sort": "newest"})
+    assert parse_dashboard_filters(args) == {}
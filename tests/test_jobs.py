@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.config import JOB_RETRY_BACKOFF
+from jobs import job_queue
+from models import BackgroundJob
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def queue(db_session, monkeypatch, calls):
+    """The job queue with an empty job table and a test handler recording its payloads in calls."""
+    BackgroundJob.query.delete()
+    db_session.commit()
+
+    def handler(payload):
+        calls.append(payload)
+        if payload.get("fail"):
+            raise RuntimeError("handler failed")
+        return {"echo": payload}
+
+    monkeypatch.setitem(job_queue.handlers, "test_job", handler)
+    monkeypatch.setattr(job_queue, "_last_recovery", None)
+    yield job_queue
+    BackgroundJob.query.delete()
+    db_session.commit()
+
+
+def reload(db_session, job):
+    # run_pending works in its own application context, and so its own session
+    db_session.expire_all()
+    return db_session.get(BackgroundJob, job.id)
+
+
+def test_enqueue_unique_returns_the_queued_job(queue):
+    first = queue.enqueue_unique("test_job", {"a": 1, "b": 2})
+    assert queue.enqueue_unique("test_job", {"b": 2, "a": 1}).id == first.id
+    assert queue.enqueue_unique("test_job", {"a": 2}).id != first.id
+    assert queue.enqueue_unique("test_job", {"a": 3}, dedupe_key="custom").id == \
+        queue.enqueue_unique("test_job", {"a": 4}, dedupe_key="custom").id
+    assert BackgroundJob.query.filter_by(kind="test_job").count() == 3
+
+
+def test_enqueue_unique_queues_a_follow_up_while_a_job_runs(queue, db_session):
+    first = queue.enqueue_unique("test_job", {"a": 1})
+    assert queue._claim().id == first.id
+
+    follow_up = queue.enqueue_unique("test_job", {"a": 1})
+    assert follow_up.id != first.id
+    assert follow_up.status == "queued"
+    assert queue.enqueue_unique("test_job", {"a": 1}).id == follow_up.id
+
+
+def test_enqueue_without_commit_goes_out_with_the_callers_transaction(queue, db_session):
+    queue.enqueue_unique("test_job", {"a": 1}, commit=False)
+    queue.enqueue("test_job", {"a": 2}, commit=False)
+    db_session.rollback()
+    assert BackgroundJob.query.count() == 0
+
+
+def test_run_pending_runs_due_jobs(queue, db_session, calls):
+    job = queue.enqueue("test_job", {"a": 1})
+    later = queue.enqueue("test_job", {"a": 2}, delay=60)
+
+    assert queue.run_pending() == 1
+    job = reload(db_session, job)
+    assert job.status == "done"
+    assert job.attempts == 1
+    assert job.result == {"echo": {"a": 1}}
+    assert job.finished_at is not None
+    assert reload(db_session, later).status == "queued"
+    assert calls == [{"a": 1}]
+
+
+def test_failed_job_is_retried_with_backoff_then_dead_lettered(queue, db_session, calls):
+    job = queue.enqueue("test_job", {"fail": True}, max_attempts=2)
+
+    before = datetime.utcnow()
+    assert queue.run_pending() == 1
+    job = reload(db_session, job)
+    assert job.status == "queued"
+    assert job.attempts == 1
+    assert job.last_error == "handler failed"
+    delay = (job.run_after - before).total_seconds()
+    assert JOB_RETRY_BACKOFF * 0.8 - 1 <= delay <= JOB_RETRY_BACKOFF * 1.2 + 1
+
+    # Not due yet
+    assert queue.run_pending() == 0
+
+    job.run_after = datetime.utcnow()
+    db_session.commit()
+    assert queue.run_pending() == 1
+    job = reload(db_session, job)
+    assert job.status == "dead"
+    assert job.attempts == 2
+    assert job.finished_at is not None
+    assert len(calls) == 2
+
+
+def test_job_without_a_handler_fails(queue, db_session):
+    job = queue.enqueue("test_unknown_job", {}, max_attempts=1)
+    assert queue.run_pending() == 1
+    job = reload(db_session, job)
+    assert job.status == "dead"
+    assert "No handler registered" in job.last_error
+
+
+def test_retry_requeues_a_dead_job(queue, db_session):
+    job = queue.enqueue("test_job", {"fail": True}, max_attempts=1)
+    queue.run_pending()
+    job = reload(db_session, job)
+    assert job.status == "dead"
+
+    job.payload = {"fail": False}
+    queue.retry(job)
+    assert (job.status, job.attempts, job.last_error, job.finished_at) == ("queued", 0, None, None)
+    assert queue.run_pending() == 1
+    assert reload(db_session, job).status == "done"
+
+
+def running_job(db_session, heartbeat_age, attempts, max_attempts=3):
+    heartbeat = datetime.utcnow() - timedelta(seconds=heartbeat_age)
+    job = BackgroundJob(kind="test_job", payload={}, status="running", attempts=attempts, max_attempts=max_attempts,
+                        run_after=heartbeat, started_at=heartbeat, heartbeat_at=heartbeat)
+    db_session.add(job)
+    db_session.commit()
+    return job
+
+
+def test_expired_leases_are_requeued_or_dead_lettered(queue, db_session):
+    expired = queue.lease_timeout + 10
+    healthy = running_job(db_session, heartbeat_age=1, attempts=1)
+    stale = running_job(db_session, heartbeat_age=expired, attempts=1)
+    exhausted = running_job(db_session, heartbeat_age=expired, attempts=3)
+
+    queue._recover_stale(datetime.utcnow())
+
+    assert reload(db_session, healthy).status == "running"
+    assert reload(db_session, stale).status == "queued"
+    exhausted = reload(db_session, exhausted)
+    assert exhausted.status == "dead"
+    assert exhausted.last_error.startswith("Lease expired")
+
+
+def test_stale_recovery_runs_at_most_twice_per_lease(queue, db_session):
+    now = datetime.utcnow()
+    queue._recover_stale(now)
+    stale = running_job(db_session, heartbeat_age=queue.lease_timeout + 10, attempts=1)
+
+    queue._recover_stale(now + timedelta(seconds=queue.lease_timeout / 4))
+    assert reload(db_session, stale).status == "running"
+    queue._recover_stale(now + timedelta(seconds=queue.lease_timeout / 2))
+    assert reload(db_session, stale).status == "queued"
+
+
+def test_claim_takes_each_job_once(queue):
+    first = queue.enqueue("test_job", {"a": 1})
+    second = queue.enqueue("test_job", {"a": 2})
+    assert [queue._claim().id, queue._claim().id] == [first.id, second.id]
+    assert queue._claim() is None
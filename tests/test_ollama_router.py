@@ -0,0 +1,133 @@
+from collections import Counter
+
+import pytest
+
+from backend.ollama_router import NoBackendAvailable, OllamaRouter, llm_route, parse_backends
+
+URLS = ["http://gpu1:11434", "http://gpu2:11434", "http://gpu3:11434"]
+
+
+def make_router(weights=(1.0, 1.0, 1.0), failure_threshold=2, cooldown=30.0):
+    return OllamaRouter(list(zip(URLS, weights)), failure_threshold=failure_threshold, cooldown=cooldown,
+                        health_interval=0)
+
+
+def call(router, key=None, success=True):
+    backend = router.acquire(key)
+    router.release(backend, success)
+    return backend
+
+
+def test_parse_backends():
+    assert parse_backends("http://a:1=2, http://b:2/", "http://default") == [("http://a:1", 2.0), ("http://b:2", 1.0)]
+    assert parse_backends("", "http://default/") == [("http://default", 1.0)]
+
+
+def test_a_key_always_goes_to_the_same_backend():
+    router = make_router()
+    first = {key: call(router, key).url for key in range(50)}
+    assert first == {key: call(router, key).url for key in range(50)}
+    # Another router with the same backends, as in another worker process, agrees
+    assert first == {key: call(make_router(), key).url for key in range(50)}
+
+
+def test_llm_route_sets_the_key():
+    router = make_router()
+    with llm_route(42):
+        routed = router.acquire()
+    router.release(routed, True)
+    assert routed.url == call(router, "42").url
+
+
+def test_keys_spread_by_weight():
+    router = make_router(weights=(1.0, 1.0, 2.0))
+    counts = Counter(call(router, key).url for key in range(4000))
+    assert counts[URLS[2]] == pytest.approx(2000, rel=0.1)
+    assert counts[URLS[0]] == pytest.approx(1000, rel=0.15)
+
+
+def test_removing_a_backend_only_moves_its_own_keys():
+    router, smaller = make_router(), OllamaRouter([(URLS[0], 1.0), (URLS[1], 1.0)], health_interval=0)
+    for key in range(200):
+        before = call(router, key).url
+        if before != URLS[2]:
+            assert call(smaller, key).url == before
+
+
+def test_unkeyed_requests_go_to_the_least_loaded_backend():
+    router = make_router()
+    busy = [router.acquire() for _ in range(2)]
+    assert len({backend.url for backend in busy}) == 2
+    idle = router.acquire()
+    assert idle.url not in {backend.url for backend in busy}
+
+
+def test_breaker_opens_after_consecutive_failures_and_keys_fail_over():
+    router = make_router(failure_threshold=2)
+    home = call(router, "interview-1")
+    for _ in range(2):
+        router.release(router.acquire("interview-1"), False)
+    assert router.stats()[URLS.index(home.url)]["breaker"] == "open"
+
+    moved = call(router, "interview-1")
+    assert moved.url != home.url
+
+
+def test_a_success_resets_the_failure_count():
+    router = OllamaRouter([(URLS[0], 1.0)], failure_threshold=2, health_interval=0)
+    for success in (False, True, False):
+        call(router, success=success)
+    assert router.stats()[0]["breaker"] == "closed"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("backend.ollama_router.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_half_open_breaker_lets_one_trial_through(clock):
+    router = OllamaRouter([(URLS[0], 1.0), (URLS[1], 1.0)], failure_threshold=1, cooldown=30.0, health_interval=0)
+    first, second = router.backends
+    second.healthy = False
+    call(router, success=False)
+    assert router.stats()[0]["breaker"] == "open"
+
+    clock[0] += 31
+    trial = router.acquire()
+    assert trial is first
+    # Only one trial at a time; everything else goes to the other backend
+    second.healthy = True
+    assert call(router, "interview-1") is second
+    assert call(router) is second
+
+    router.release(trial, True)
+    assert router.stats()[0]["breaker"] == "closed"
+
+
+def test_failed_trial_reopens_the_breaker(clock):
+    router = OllamaRouter([(URLS[0], 1.0), (URLS[1], 1.0)], failure_threshold=3, cooldown=30.0, health_interval=0)
+    router.backends[1].healthy = False
+    for _ in range(3):
+        call(router, success=False)
+    clock[0] += 31
+    assert router.stats()[0]["breaker"] == "half_open"
+
+    # A single failed trial is enough to open the breaker again
+    call(router, success=False)
+    assert router.stats()[0]["breaker"] == "open"
+
+
+def test_no_backend_available():
+    router = OllamaRouter([(URLS[0], 1.0), (URLS[1], 1.0)], failure_threshold=1, health_interval=0)
+    for backend in router.backends:
+        backend.healthy = False
+    with pytest.raises(NoBackendAvailable):
+        router.acquire()
+
+
+def test_a_lone_backend_is_always_tried():
+    router = OllamaRouter([(URLS[0], 1.0)], failure_threshold=1, health_interval=0)
+    router.release(router.acquire(), False)
+    assert call(router).url == URLS[0]
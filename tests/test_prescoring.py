@@ -0,0 +1,78 @@
+import pytest
+
+from backend.prescoring import AnswerKeyFilter, prescore_answer, rubric_overlap, split_answer_key
+
+QUESTION = "Which structure gives O(1) average lookup?\nA. List\nB. Hash table\nC. Tree\nD. Heap\n"
+
+KEY_LINES = [
+    "Answer: B",
+    "**Answer**: B",
+    "**Answer:** B",
+    "Answer : B",
+    "Answer - B",
+    "Correct answer: (B)",
+    "**Correct Answer:** B.",
+]
+
+
+def stream(text, chunk_size):
+    """Run text through a fresh filter in chunks, as the SSE view does with model tokens."""
+    key_filter = AnswerKeyFilter()
+    shown = [key_filter.feed(text[i:i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    return "".join(shown) + key_filter.finish()
+
+
+@pytest.mark.parametrize("key_line", KEY_LINES)
+@pytest.mark.parametrize("chunk_size", [1, 4, 1000])
+@pytest.mark.parametrize("ending", ["", "\n"])
+def test_answer_key_is_held_back(key_line, chunk_size, ending):
+    assert stream(QUESTION + key_line + ending, chunk_size) == QUESTION
+
+
+@pytest.mark.parametrize("line", [
+    "Answer the question below.",
+    "Answers vary: B",
+    "Answer: Because of hashing",
+    "**Note**: choose one option",
+    "A. List",
+])
+def test_other_lines_are_shown(line):
+    text = f"{line}\nWhich option?"
+    assert stream(text, 1) == text
+
+
+def test_line_is_released_once_it_cannot_be_a_key():
+    key_filter = AnswerKeyFilter()
+    assert key_filter.feed("Ans") == ""
+    assert key_filter.feed("wer the") == "Answer the"
+
+
+@pytest.mark.parametrize("key_line", KEY_LINES)
+def test_split_answer_key(key_line):
+    assert split_answer_key(QUESTION + key_line) == (QUESTION.strip(), "B")
+
+
+@pytest.mark.parametrize("answer, score", [("B", 10), ("(b)", 10), ("Option B", 10), ("C. Tree", 0)])
+def test_mcq_answers_are_checked_against_the_key(answer, score):
+    evaluation = prescore_answer(QUESTION, answer, "mcq", "B")
+    assert evaluation["score"] == score
+    assert evaluation["scored_by"] == "answer_key"
+
+
+@pytest.mark.parametrize("answer", ["", "  ", "I don't know", "idk", "no idea.", "?"])
+def test_non_answers_score_zero(answer):
+    assert prescore_answer("What is TCP?", answer, "concept")["score"] == 0
+
+
+@pytest.mark.parametrize("answer", ["TCP", "Quicksort", "None", "pass", "O(log n)"])
+def test_short_answers_go_to_the_model(answer):
+    assert prescore_answer("Name the protocol.", answer, "concept") is None
+
+
+def test_rubric_overlap_prefers_skills_named_in_the_question():
+    overlap = rubric_overlap("How do you index a SQL table?", "Use a B-tree on the sql column", ["Python", "SQL"])
+    assert overlap == {"expected": ["SQL"], "mentioned": ["SQL"]}
+    assert rubric_overlap("Explain closures", "Functions keep their scope", ["Python", "SQL"]) == {
+        "expected": ["Python", "SQL"], "mentioned": []
+    }
+    assert rubric_overlap("Explain closures", "x", []) is None
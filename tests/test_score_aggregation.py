@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, insert, literal, select
+
+from backend.config import BORDERLINE_SCORE, PASS_SCORE
+from backend.score_aggregation import parse_weights, percent, result_for_score, weight_expression, weighted_sums
+
+
+@pytest.mark.parametrize("score, result", [
+    (None, "fail"),
+    (0, "fail"),
+    (BORDERLINE_SCORE - 0.1, "fail"),
+    (BORDERLINE_SCORE, "borderline"),
+    (PASS_SCORE - 0.1, "borderline"),
+    (PASS_SCORE, "pass"),
+    (100, "pass"),
+])
+def test_result_for_score(score, result):
+    assert result_for_score(score) == result
+
+
+@pytest.mark.parametrize("points, maximum, expected", [
+    (7, 10, 70.0),
+    (2, 3, 66.7),
+    (None, 10, 0.0),
+    (5, 0, 0.0),
+    (5, None, 0.0),
+    (12, 10, 100.0),
+    (-1, 10, 0.0),
+])
+def test_percent(points, maximum, expected):
+    assert percent(points, maximum) == expected
+
+
+def test_parse_weights():
+    assert parse_weights("technical=2, behavioral=0.5") == {"technical": 2.0, "behavioral": 0.5}
+    assert parse_weights("") == {}
+    assert parse_weights(None) == {}
+
+
+def test_parse_weights_skips_malformed_entries(caplog):
+    assert parse_weights("technical=2,,=3,behavioral,coding=high") == {"technical": 2.0}
+    assert "'behavioral'" in caplog.text
+    assert "'coding=high'" in caplog.text
+
+
+@pytest.fixture
+def questions():
+    engine = create_engine("sqlite://")
+    table = Table("questions", MetaData(), Column("id", Integer, primary_key=True), Column("interview", Integer),
+                  Column("type", String), Column("score", Float))
+    table.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [
+            {"interview": 1, "type": "technical", "score": 9},
+            {"interview": 1, "type": "technical", "score": 8},
+            {"interview": 1, "type": "behavioral", "score": 4},
+            {"interview": 2, "type": "technical", "score": 6},
+            {"interview": 2, "type": "behavioral", "score": None},
+        ])
+    with engine.connect() as conn:
+        yield conn, table
+
+
+def test_weighted_sums(questions):
+    conn, table = questions
+    weight = weight_expression(table.c.type, {"technical": 2.0, "behavioral": 0.5})
+    rows = conn.execute(select(table.c.interview, *weighted_sums(table.c.score, weight))
+                        .group_by(table.c.interview).order_by(table.c.interview)).all()
+
+    # (2*9 + 2*8 + 0.5*4) / (2*10 + 2*10 + 0.5*10) = 36 / 45
+    assert percent(*rows[0][1:]) == 80.0
+    # An unscored question counts as 0 of its weighted maximum: (2*6 + 0) / (2*10 + 0.5*10) = 12 / 25
+    assert percent(*rows[1][1:]) == 48.0
+
+
+def test_weighted_sums_without_weights(questions):
+    conn, table = questions
+    points, maximum = conn.execute(select(*weighted_sums(table.c.score, weight_expression(table.c.type, {})))
+                                   .where(table.c.interview == 1)).one()
+    assert (points, maximum) == (21, 30)
+    unweighted = conn.execute(select(*weighted_sums(table.c.score, literal(1))).where(table.c.interview == 1)).one()
+    assert tuple(unweighted) == (points, maximum)
@@ -0,0 +1,127 @@
+import pytest
+
+from backend import structured_output
+from backend.structured_output import (ANSWER_EVALUATION_SCHEMA, EVALUATION_REPORT_SCHEMA, conform, extract_json,
+                                       generate_structured, parse_structured)
+
+GOOD_EVALUATION = ('{"score": 8, "strengths": "Clear", "areas_for_improvement": "Depth", '
+                   '"overall_feedback": "Solid"}')
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"score": 7}', {"score": 7}),
+    ('Here is my evaluation:\n{"score": 7}\nHope that helps.', {"score": 7}),
+    ('```json\n{"score": 7}\n```', {"score": 7}),
+    ('Score [out of 10]: {"score": 7}', {"score": 7}),
+    ('Notes {see below} then {"score": 7}', {"score": 7}),
+    ('{"text": "a } and a { inside a string"}', {"text": "a } and a { inside a string"}),
+    ('[1, 2, 3]', [1, 2, 3]),
+])
+def test_extract_json(text, expected):
+    assert extract_json(text) == expected
+
+
+def test_extract_json_root_type_skips_the_other_kind():
+    assert extract_json('Skills [Python, SQL]: {"score": 7}', "object") == {"score": 7}
+    assert extract_json('{"ignored": true} [1, 2]', "array") == [1, 2]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"score": 7, "strengths": "Clear and', {"score": 7, "strengths": "Clear and"}),
+    ('{"score": 7, "items": [1, 2', {"score": 7, "items": [1, 2]}),
+    ('{"score": 7, "strengths":', {"score": 7}),
+    ('{"score": 7, "stren', {"score": 7}),
+    ('Result [draft]: {"score": 7, "strengths": "Cl', {"score": 7, "strengths": "Cl"}),
+])
+def test_extract_json_repairs_truncated_output(text, expected):
+    assert extract_json(text) == expected
+
+
+def test_truncated_output_is_not_mistaken_for_an_inner_value():
+    # The nested object is complete, but the value the model was writing is the outer one
+    assert extract_json('{"evaluations": [{"id": 1, "score": 7}, {"id": 2, "sc') == \
+        {"evaluations": [{"id": 1, "score": 7}, {"id": 2}]}
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "just [brackets] in prose", None])
+def test_extract_json_without_a_value(text):
+    with pytest.raises(ValueError):
+        extract_json(text)
+
+
+@pytest.mark.parametrize("value, expected", [("7", 7.0), ("7/10", 7.0), (" 7.5 / 10 ", 7.5), (7, 7)])
+def test_conform_coerces_number_text(value, expected):
+    assert conform(value, {"type": "number"}) == (expected, [])
+
+
+def test_conform_number_errors():
+    assert conform("seven", {"type": "number"})[1] == ["$ must be a number"]
+    assert conform(True, {"type": "number"})[1] == ["$ must be a number"]
+    assert conform(11, {"type": "number", "maximum": 10})[1] == ["$ must be at most 10"]
+    assert conform(7.5, {"type": "integer"})[1] == ["$ must be an integer"]
+    assert conform("3", {"type": "integer"}) == (3, [])
+
+
+def test_conform_strings_and_arrays():
+    assert conform(["Clear", "Concise"], {"type": "string"}) == ("Clear; Concise", [])
+    assert conform(8, {"type": "string"}) == ("8", [])
+    assert conform("Clear", {"type": "array", "items": {"type": "string"}}) == (["Clear"], [])
+    assert conform({"a": 1}, {"type": "array"})[1] == ["$ must be an array"]
+
+
+def test_conform_enum_matches_regardless_of_case():
+    schema = EVALUATION_REPORT_SCHEMA["properties"]["recommendation"]
+    assert conform("pass", schema) == ("Pass", [])
+    assert conform("Maybe", schema)[1] == ["$ must be one of Pass, Borderline, Fail"]
+
+
+def test_conform_object_reports_missing_and_nested_errors():
+    value, errors = conform({"score": "12/10", "strengths": "Clear"}, ANSWER_EVALUATION_SCHEMA)
+    assert value["score"] == 12.0
+    assert errors == ["$.areas_for_improvement is missing", "$.overall_feedback is missing", "$.score must be at most 10"]
+
+
+def test_parse_structured():
+    value, errors = parse_structured(f"Evaluation:\n```json\n{GOOD_EVALUATION}\n```", ANSWER_EVALUATION_SCHEMA)
+    assert errors == []
+    assert value["score"] == 8
+
+    value, errors = parse_structured("I cannot evaluate this answer.", ANSWER_EVALUATION_SCHEMA)
+    assert value is None
+    assert errors[0].startswith("not valid JSON")
+
+
+class FakeOllama:
+    """Returns the queued responses in order and records the prompts it was sent."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_response(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return {"success": True, "response": self.responses.pop(0), "model": "test-model"}
+
+
+def test_generate_structured_repairs_invalid_output(monkeypatch):
+    fake = FakeOllama('{"score": "great"}', GOOD_EVALUATION)
+    monkeypatch.setattr(structured_output, "get_ollama_client", lambda: fake)
+
+    result = generate_structured("Evaluate", ANSWER_EVALUATION_SCHEMA, "test_evaluation", max_repairs=1)
+
+    assert result["success"] and result["repaired"]
+    assert result["data"]["score"] == 8
+    # The repair call sends back the bad output and what is wrong with it
+    assert '{"score": "great"}' in fake.prompts[1]
+    assert "$.score must be a number" in fake.prompts[1]
+
+
+def test_generate_structured_gives_up_after_max_repairs(monkeypatch):
+    fake = FakeOllama('{"score": 7}', '{"score": 7}')
+    monkeypatch.setattr(structured_output, "get_ollama_client", lambda: fake)
+
+    result = generate_structured("Evaluate", ANSWER_EVALUATION_SCHEMA, "test_evaluation", max_repairs=1)
+
+    assert not result["success"]
+    assert result["data"] == {"score": 7}
+    assert len(fake.prompts) == 2
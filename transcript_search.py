@@ -0,0 +1,318 @@
+import re
+import html
+import logging
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import joinedload, load_only
+
+from models import db, User, Interview, Question, JobProfile
+from backend.config import SEARCH_ENABLED
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+# Interview fields kept in the index; changing any of them re-indexes the interview
+INDEXED_FIELDS = {Question: ('text', 'answer', 'interview_id'), Interview: ('report', 'feedback')}
+
+# Placed around matches by the database; swapped for <mark> once the snippet is escaped
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+# A quoted phrase or a single word of a search query
+QUERY_TERM = re.compile(r'"([^"]+)"|(\S+)')
+
+
+class SqliteSearchIndex:
+    """FTS5 table keyed by interview id (its rowid), ranked with bm25."""
+
+    def create(self, conn):
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'interview_search'")).first()
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS interview_search "
+            "USING fts5(answers, report, questions, tokenize = 'porter unicode61')"
+        ))
+        return not exists
+
+    def delete(self, conn, interview_ids):
+        for interview_id in interview_ids:
+            conn.execute(text("DELETE FROM interview_search WHERE rowid = :id"), {'id': interview_id})
+
+    def upsert(self, conn, documents):
+        self.delete(conn, [document['id'] for document in documents])
+        if documents:
+            conn.execute(text(
+                "INSERT INTO interview_search (rowid, answers, report, questions) "
+                "VALUES (:id, :answers, :report, :questions)"
+            ), documents)
+
+    def match_query(self, query):
+        """An FTS5 query for the words and "quoted phrases" of a search, all required; OR is kept."""
+        terms = []
+        for phrase, word in QUERY_TERM.findall(query):
+            if word == 'OR' and terms and terms[-1] != 'OR':
+                terms.append('OR')
+                continue
+            term = (phrase or word.lstrip('-')).replace('"', ' ').strip()
+            if term:
+                terms.append(f'"{term}"')
+        if terms and terms[-1] == 'OR':
+            terms.pop()
+        return ' '.join(terms)
+
+    def search(self, conn, query, where, params, limit, offset):
+        match = self.match_query(query)
+        if not match:
+            return [], 0
+        params = dict(params, match=match, limit=limit, offset=offset)
+        source = f"interview_search JOIN interviews ON interviews.id = interview_search.rowid " \
+                 f"WHERE interview_search MATCH :match{where}"
+        total = conn.execute(text(f"SELECT count(*) FROM {source}"), params).scalar()
+        rows = conn.execute(text(
+            f"SELECT interview_search.rowid, bm25(interview_search, 3.0, 2.0, 1.0) AS rank, "
+            f"snippet(interview_search, -1, '{MATCH_START}', '{MATCH_END}', '...', 16) "
+            f"FROM {source} ORDER BY rank, interview_search.rowid DESC LIMIT :limit OFFSET :offset"
+        ), params).all()
+        # bm25 is lower for better matches
+        return [(interview_id, -rank, snippet) for interview_id, rank, snippet in rows], total
+
+
+class PostgresSearchIndex:
+    """tsvector column with a GIN index, answers weighted above reports above question texts."""
+
+    DOCUMENT = (
+        "setweight(to_tsvector('english', coalesce(:answers, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(:report, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(:questions, '')), 'C')"
+    )
+
+    def create(self, conn):
+        exists = conn.execute(text("SELECT to_regclass('interview_search')")).scalar()
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS interview_search ("
+            "interview_id INTEGER PRIMARY KEY REFERENCES interviews (id) ON DELETE CASCADE, "
+            "answers TEXT, report TEXT, questions TEXT, document TSVECTOR NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS idx_interview_search_document ON interview_search USING GIN (document)"
+        ))
+        return not exists
+
+    def delete(self, conn, interview_ids):
+        if interview_ids:
+            conn.execute(text("DELETE FROM interview_search WHERE interview_id = ANY(:ids)"), {'ids': list(interview_ids)})
+
+    def upsert(self, conn, documents):
+        if documents:
+            conn.execute(text(
+                f"INSERT INTO interview_search (interview_id, answers, report, questions, document) "
+                f"VALUES (:id, :answers, :report, :questions, {self.DOCUMENT}) "
+                f"ON CONFLICT (interview_id) DO UPDATE SET answers = excluded.answers, report = excluded.report, "
+                f"questions = excluded.questions, document = excluded.document"
+            ), documents)
+
+    def search(self, conn, query, where, params, limit, offset):
+        params = dict(params, query=query, limit=limit, offset=offset)
+        source = f"interview_search JOIN interviews ON interviews.id = interview_search.interview_id, " \
+                 f"websearch_to_tsquery('english', :query) AS query WHERE interview_search.document @@ query{where}"
+        total = conn.execute(text(f"SELECT count(*) FROM {source}"), params).scalar()
+        rows = conn.execute(text(
+            f"SELECT interview_search.interview_id, ts_rank_cd(interview_search.document, query) AS rank, "
+            f"ts_headline('english', concat_ws(' ... ', interview_search.answers, interview_search.report), query, "
+            f"'StartSel={MATCH_START}, StopSel={MATCH_END}, MaxFragments=2, MaxWords=16, MinWords=6') "
+            f"FROM {source} ORDER BY rank DESC, interview_search.interview_id DESC LIMIT :limit OFFSET :offset"
+        ), params).all()
+        return [tuple(row) for row in rows], total
+
+
+_index = None
+
+
+def get_search_index():
+    """The search index of the application database, or None if search is off or unsupported."""
+    return _index
+
+
+def ensure_search_index(engine):
+    """
+    Create the search index for the database if it does not exist yet.
+
+    Returns:
+        bool: True if the index was just created (and needs filling with reindex_all)
+    """
+    global _index
+    if not SEARCH_ENABLED:
+        return False
+    index = {'sqlite': SqliteSearchIndex, 'postgresql': PostgresSearchIndex}.get(engine.dialect.name)
+    if index is None:
+        logger.warning(f"Transcript search is not supported on {engine.dialect.name}")
+        return False
+    try:
+        with engine.begin() as conn:
+            created = index().create(conn)
+    except Exception as e:
+        logger.error(f"Could not create the transcript search index, search is disabled: {str(e)}")
+        return False
+    _index = index()
+    return created
+
+
+def build_documents(conn, interview_ids):
+    """Indexed text of each existing interview: its answers, report and feedback, and question texts."""
+    ids = list(interview_ids)
+    documents = {
+        interview_id: {'id': interview_id, 'answers': [], 'questions': [],
+                       'report': '\n\n'.join(filter(None, [report, feedback]))}
+        for interview_id, report, feedback in conn.execute(
+            db.select(Interview.id, Interview.report, Interview.feedback).where(Interview.id.in_(ids))
+        )
+    }
+    for interview_id, question, answer in conn.execute(
+        db.select(Question.interview_id, Question.text, Question.answer)
+        .where(Question.interview_id.in_(ids)).order_by(Question.interview_id, Question.order)
+    ):
+        document = documents.get(interview_id)
+        if document:
+            document['questions'].append(question or '')
+            if answer:
+                document['answers'].append(answer)
+    for document in documents.values():
+        document['answers'] = '\n'.join(document['answers'])
+        document['questions'] = '\n'.join(document['questions'])
+    return list(documents.values())
+
+
+def index_interviews(conn, interview_ids):
+    """Bring the index rows of the given interviews up to date; deleted interviews are dropped."""
+    documents = build_documents(conn, interview_ids)
+    _index.delete(conn, set(interview_ids) - {document['id'] for document in documents})
+    _index.upsert(conn, documents)
+
+
+def reindex_all(batch_size=500):
+    """Rebuild the index for every interview. Returns the number of interviews indexed."""
+    if _index is None:
+        return 0
+    indexed, last_id = 0, 0
+    while True:
+        ids = [interview_id for interview_id, in db.session.query(Interview.id).filter(
+            Interview.id > last_id
+        ).order_by(Interview.id).limit(batch_size)]
+        if not ids:
+            return indexed
+        with db.engine.begin() as conn:
+            index_interviews(conn, ids)
+        indexed += len(ids)
+        last_id = ids[-1]
+
+
+@job_queue.handler('reindex_search')
+def run_reindex(payload):
+    """Background job: fill or rebuild the transcript search index."""
+    return {'indexed': reindex_all()}
+
+
+def _changed(instance):
+    state = inspect(instance)
+    return any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS[type(instance)])
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_interviews(session, flush_context):
+    """Remember which interviews' indexed text this flush changed."""
+    if _index is None:
+        return
+    pending = session.info.setdefault('search_pending', set())
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(instance) not in INDEXED_FIELDS:
+            continue
+        if instance not in session.deleted and not _changed(instance):
+            continue
+        if isinstance(instance, Interview):
+            pending.add(instance.id)
+        else:
+            # A question moved to another interview changes both
+            pending.add(instance.interview_id)
+            pending.update(inspect(instance).attrs.interview_id.history.deleted)
+    pending.discard(None)
+
+
+@job_queue.handler('reindex_interview')
+def run_interview_reindex(payload):
+    """Background job: bring one interview's index row up to date."""
+    if _index is None:
+        return {'skipped': True}
+    with db.engine.begin() as conn:
+        index_interviews(conn, [payload['interview_id']])
+    return {'interview_id': payload['interview_id']}
+
+
+@event.listens_for(db.session, 'before_commit')
+def _queue_changed_interviews(session):
+    """Queue a re-index of the interviews changed by the committing transaction, as part of it."""
+    if _index is None:
+        return
+    # Flush first so changes made since the last flush are collected too
+    session.flush()
+    pending = session.info.pop('search_pending', None)
+    # A re-index still waiting to run reads the latest text anyway, so it is not queued twice
+    for interview_id in sorted(pending or ()):
+        job_queue.enqueue_unique('reindex_interview', {'interview_id': interview_id}, commit=False)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _forget_rolled_back_changes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('search_pending', None)
+
+
+def render_snippet(snippet):
+    """HTML for a snippet: escaped text with the matches in <mark>."""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>')
+
+
+def search_interviews(query, job_profile_id=None, status=None, page=1, per_page=20):
+    """
+    Full-text search over interview answers, reports and questions, best match first.
+
+    Args:
+        query (str): Words and "quoted phrases", all of which must match; OR between terms
+        job_profile_id (int): Only interviews for this job profile
+        status (str): Only interviews in this status
+        page (int): 1-based page number
+        per_page (int): Results per page
+
+    Returns:
+        dict: ``results`` (interview, rank and snippet HTML per match), ``total``, ``page``
+        and ``pages``; None if search is not available
+    """
+    if _index is None:
+        return None
+    where, params = "", {}
+    if job_profile_id:
+        where += " AND interviews.job_profile_id = :job_profile_id"
+        params['job_profile_id'] = job_profile_id
+    if status:
+        where += " AND interviews.status = :status"
+        params['status'] = status
+
+    page = max(1, page)
+    with db.engine.connect() as conn:
+        matches, total = _index.search(conn, query, where, params, per_page, (page - 1) * per_page)
+
+    interviews = {
+        interview.id: interview for interview in Interview.query.options(
+            load_only(Interview.id, Interview.user_id, Interview.job_profile_id, Interview.status,
+                      Interview.score, Interview.score_percentile, Interview.created_at, Interview.completed_at),
+            joinedload(Interview.candidate).load_only(User.id, User.name, User.email),
+            joinedload(Interview.job_profile).load_only(JobProfile.id, JobProfile.title)
+        ).filter(Interview.id.in_([interview_id for interview_id, _, _ in matches]))
+    }
+    return {
+        'results': [
+            {'interview': interviews[interview_id], 'rank': float(rank), 'snippet': render_snippet(snippet)}
+            for interview_id, rank, snippet in matches if interview_id in interviews
+        ],
+        'total': total,
+        'page': page,
+        'pages': (total + per_page - 1) // per_page
+    }
@@ -0,0 +1,183 @@
+import re
+import logging
+
+from models import db, Interview, Question
+from backend.config import EVALUATION_REPORT_INSTRUCTIONS, INCREMENTAL_REPORT_MAX_CATCHUP, RUNNING_SUMMARY_MAX_TOKENS
+from backend.model_tiers import get_model_tiers
+from backend.ollama_client import get_ollama_client
+from backend.ollama_router import llm_route
+from backend.prompt_templates import compiled_profile
+from backend.token_budget import clip_answer, enforce_budget, llm_usage_scope, truncate_text
+from entity_cache import get_job_profile
+from jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+# Tokens kept of each question and assessment in the final report prompt
+QUESTION_TOKENS = 80
+ASSESSMENT_TOKENS = 80
+
+# Summaries should be factual, so keep sampling close to deterministic
+SUMMARY_TEMPERATURE = 0.2
+
+SUMMARY_STEP_PATTERN = re.compile(r'ASSESSMENT:\s*(?P<assessment>.*?)\s*SUMMARY:\s*(?P<summary>.*)', re.IGNORECASE | re.DOTALL)
+
+
+def build_summary_step_prompt(job_profile, running_summary, question):
+    """Prompt that assesses one answer and folds it into the running summary."""
+    score = f"{question.score}/10" if question.score is not None else "not scored yet"
+    return compiled_profile(job_profile).render(f"""
+You are keeping notes on the candidate's interview.
+
+Your notes on the interview so far:
+{running_summary or "(no answers yet)"}
+
+The candidate was asked:
+"{truncate_text(question.text, QUESTION_TOKENS * 2)}"
+
+Their answer was: "{clip_answer(question.answer)}"
+Score given by the grader: {score}
+
+Reply in exactly this format:
+ASSESSMENT: <one or two sentences on this answer: what was correct, what was missing>
+SUMMARY: <your updated notes on the whole interview so far, at most {RUNNING_SUMMARY_MAX_TOKENS * 3 // 4} words, covering strengths, weaknesses and skills demonstrated>""")
+
+
+def parse_summary_step(text, running_summary):
+    """Split a summary step response into (assessment, updated summary)."""
+    match = SUMMARY_STEP_PATTERN.search(text)
+    if match:
+        assessment = match.group('assessment').strip()
+        summary = match.group('summary').strip()
+    else:
+        # The model ignored the format: keep its reply as the assessment and append it to the notes
+        assessment = text.strip()
+        summary = f"{running_summary}\n- {assessment}" if running_summary else f"- {assessment}"
+    return truncate_text(assessment, ASSESSMENT_TOKENS), truncate_text(summary, RUNNING_SUMMARY_MAX_TOKENS)
+
+
+def fold_answers_into_summary(interview_id):
+    """
+    Assess every answered question not yet in the interview's running summary, in order.
+
+    Each step only advances the interview if nobody else advanced it in the meantime,
+    so a background update and a completion catching up can safely race.
+
+    Returns:
+        int: questions folded in by this call
+    """
+    interview = Interview.query.get(interview_id)
+    if not interview:
+        return 0
+    job_profile = get_job_profile(interview.job_profile_id)
+
+    through = interview.summary_through or 0
+    running_summary = interview.running_summary
+    pending = Question.query.filter(
+        Question.interview_id == interview.id,
+        Question.order > through,
+        Question.answer.isnot(None)
+    ).order_by(Question.order).all()
+
+    folded = 0
+    ollama = get_ollama_client()
+    for question in pending:
+        # Answers arrive in order; stop at a gap rather than summarize out of order
+        if question.order != through + 1:
+            break
+
+        with llm_usage_scope(job_profile.id, 'running_summary'), llm_route(interview.id):
+            result = ollama.generate_response(
+                build_summary_step_prompt(job_profile, running_summary, question),
+                temperature=SUMMARY_TEMPERATURE,
+                task='scoring'
+            )
+        if not result["success"]:
+            raise RuntimeError(f"Failed to summarize question {question.id}: {result.get('error', 'Unknown error')}")
+
+        if not result.get("cached"):
+            well_formed = SUMMARY_STEP_PATTERN.search(result["response"]) is not None
+            get_model_tiers().record_quality('scoring', result["model"], well_formed)
+        assessment, summary = parse_summary_step(result["response"], running_summary)
+        advanced = Interview.query.filter_by(id=interview.id, summary_through=through).update(
+            {'running_summary': summary, 'summary_through': question.order},
+            synchronize_session=False
+        )
+        if not advanced:
+            db.session.rollback()
+            break
+        question.assessment = assessment
+        db.session.commit()
+
+        through, running_summary = question.order, summary
+        folded += 1
+
+    return folded
+
+
+def request_summary_update(interview, commit=True):
+    """Queue a background update of the interview's running summary unless one is already queued."""
+    # One queued update folds every answer saved before it runs
+    return job_queue.enqueue_unique('update_running_summary', {'interview_id': interview.id}, commit=commit)
+
+
+@job_queue.handler('update_running_summary')
+def update_running_summary(payload):
+    """Background job: fold newly answered questions into the running summary."""
+    return {'folded': fold_answers_into_summary(payload['interview_id'])}
+
+
+def build_incremental_report_prompt(user, job_profile, interview, questions):
+    """
+    Final report prompt built from the running summary and per-question assessments.
+
+    Catches up on at most INCREMENTAL_REPORT_MAX_CATCHUP answers the background jobs
+    have not summarized yet (usually just the last one). Returns None when the summary
+    is too far behind or cannot be brought up to date, so the caller can fall back to
+    the full transcript prompt.
+    """
+    answered = [q for q in questions if q.answer]
+    if not answered:
+        return None
+
+    missing = [q for q in answered if q.order > (interview.summary_through or 0)]
+    if len(missing) > INCREMENTAL_REPORT_MAX_CATCHUP:
+        logger.info(f"Running summary of interview {interview.id} is {len(missing)} answers behind, using the full transcript")
+        return None
+    if missing:
+        try:
+            fold_answers_into_summary(interview.id)
+        except Exception as e:
+            logger.error(f"Could not bring the running summary of interview {interview.id} up to date: {str(e)}")
+            return None
+        db.session.refresh(interview)
+        for question in answered:
+            db.session.refresh(question)
+        if any(q.order > (interview.summary_through or 0) for q in answered):
+            return None
+
+    notes = "\n".join(
+        f"Q{q.order} ({q.type or 'question'}): {truncate_text(q.text, QUESTION_TOKENS)}\n"
+        f"   Score: {f'{q.score}/10' if q.score is not None else 'n/a'}. Assessment: {q.assessment or 'No assessment'}"
+        for q in answered
+    )
+    unanswered = len(questions) - len(answered)
+
+    prompt = compiled_profile(job_profile).render(f"""
+You are now writing the final evaluation of the candidate's interview.
+
+Candidate Information:
+- Name: {user.name}
+- Experience: {user.experience} years
+- Position: {job_profile.title}
+
+Your running notes on the interview:
+{interview.running_summary}
+
+Assessment of each answer:
+{notes}
+{f"{unanswered} question(s) were left unanswered." if unanswered else ""}
+
+{EVALUATION_REPORT_INSTRUCTIONS.format(basis="these notes")}""")
+
+    return enforce_budget(prompt, 'evaluation_report')